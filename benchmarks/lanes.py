@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark do motor em lotes (`LaneBatch`) contra N simulações separadas.
+
+Executa o mesmo programa com N imagens iniciais de registradores e memória
+sorteadas: uma vez com N objetos `TomasuloCore` (sem journal de undo, como
+em `simulator.batch`) e uma vez com um único `LaneBatch` de N lanes.
+
+Uso: python benchmarks/lanes.py [N ...]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from simulator.core import TomasuloCore
+from simulator.lanes import LaneBatch
+
+# Soma os elementos não nulos de mem[0..R1-1]: o número de iterações e os desvios dependem dos dados
+PROGRAM = """
+      ADDI R3, R0, 0
+      ADDI R4, R0, 0
+loop: LW R5, 0(R4)
+      BEQ R5, R0, skip
+      ADD R3, R3, R5
+      MUL R6, R5, R5
+      SW R6, 64(R4)
+skip: ADDI R4, R4, 1
+      BNE R4, R1, loop
+      DIV R7, R3, R2
+"""
+MEMORY_SIZE = 128
+
+
+def _inputs(lanes, seed=0):
+    rng = np.random.default_rng(seed)
+    registers = rng.integers(-8, 8, size=(lanes, 32))
+    registers[:, 0] = 0
+    registers[:, 1] = rng.integers(16, 48, size=lanes)
+    memory = rng.integers(0, 3, size=(lanes, MEMORY_SIZE))
+    return registers, memory
+
+
+def run_cores(registers, memory):
+    cycles = []
+    for lane_registers, lane_memory in zip(registers, memory):
+        core = TomasuloCore(undo_budget=0)
+        core.load_program(PROGRAM)
+        for i, value in enumerate(lane_registers):
+            core.registers.values[i] = int(value)
+        core.memory.update(enumerate(int(v) for v in lane_memory))
+        while core.cycle_step():
+            pass
+        cycles.append(core.cycle)
+    return np.array(cycles)
+
+
+def run_lanes(registers, memory):
+    batch = LaneBatch(PROGRAM, len(registers), registers=registers, memory=memory)
+    batch.run()
+    return batch.cycle
+
+
+def main(argv):
+    sizes = [int(n) for n in argv] or [10, 100, 1000]
+    print(f"{'lanes':>6}{'núcleos (s)':>14}{'lotes (s)':>12}{'ganho':>9}")
+    for lanes in sizes:
+        registers, memory = _inputs(lanes)
+        start = time.perf_counter()
+        expected = run_cores(registers, memory)
+        cores_time = time.perf_counter() - start
+        start = time.perf_counter()
+        cycles = run_lanes(registers, memory)
+        lanes_time = time.perf_counter() - start
+        assert (cycles == expected).all(), "os dois motores divergiram"
+        print(f"{lanes:>6}{cores_time:>14.3f}{lanes_time:>12.3f}{cores_time / lanes_time:>8.1f}x")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
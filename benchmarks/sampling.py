@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Benchmark da simulação amostrada (BBVs + k-means) contra a simulação completa.
+
+Usa um programa com fases de comportamento diferente (laço de ALU, cadeia
+de MUL/DIV, laço de memória) dentro de um laço externo e
+compara tempo e ciclos das duas simulações.
+
+Uso: python benchmarks/sampling.py [repetições]
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from simulator.batch import simulate
+from simulator.sampling import simulate_sampled
+
+PROGRAM = """
+      ADDI R12, R0, {outer}
+outer: ADDI R1, R0, 2000
+alu:  ADDI R2, R2, 1
+      ADD R3, R3, R2
+      SUB R4, R3, R2
+      ADDI R1, R1, -1
+      BNE R1, R0, alu
+      ADDI R1, R0, 800
+      ADDI R5, R0, 3
+mul:  MUL R6, R5, R1
+      DIV R7, R6, R5
+      ADD R8, R8, R7
+      ADDI R1, R1, -1
+      BNE R1, R0, mul
+      ADDI R1, R0, 1500
+mem:  SW R1, 0(R1)
+      LW R9, 0(R1)
+      SUB R10, R9, R4
+      ADD R11, R11, R10
+      ADDI R1, R1, -1
+      BNE R1, R0, mem
+      ADDI R12, R12, -1
+      BNE R12, R0, outer
+"""
+
+
+def program(repetitions):
+    return PROGRAM.format(outer=repetitions)
+
+
+def main(argv):
+    repetitions = int(argv[0]) if argv else 40
+    text = program(repetitions)
+    sampled = simulate_sampled(text, interval=1000, warmup=1000)
+    full = simulate(text, max_cycles=10**8)
+    deviation = (sampled.cycles - full.cycles) / full.cycles * 100
+    print(f"instruções: {sampled.total_instructions}, grupos: {sampled.clusters}, pontos: {len(sampled.points)}, "
+          f"simuladas em detalhe: {sampled.detailed_instructions}")
+    print(f"completa:  {full.cycles:>10} ciclos  {full.wall_time:8.2f} s")
+    print(f"amostrada: {sampled.cycles:>10.0f} ciclos  {sampled.wall_time:8.2f} s  "
+          f"(± {sampled.cycles_error or 0:.0f}, erro {deviation:+.2f}%, ganho {full.wall_time / sampled.wall_time:.1f}x)")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos backends de armazenamento do ROB e das estações de reserva.
+
+Compara o backend de objetos ('objects') com o backend em colunas NumPy
+('numpy') nas operações sobre a estrutura inteira: flush de metade do ROB,
+reset das estações, varredura de entradas ocupadas e snapshot.
+
+Uso: python benchmarks/storage_backends.py
+"""
+import copy
+import os
+import sys
+import timeit
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from simulator.components.array_storage import ArrayReorderBuffer, ArrayReservationStations
+from simulator.components.reorder_buffer import ReorderBuffer
+from simulator.components.reservation_station import ReservationStations
+
+ROB_SIZES = (32, 256, 1024)
+BACKENDS = {
+    'objects': (ReorderBuffer, ReservationStations),
+    'numpy': (ArrayReorderBuffer, ArrayReservationStations),
+}
+
+
+def _build(backend, rob_size):
+    """ROB cheio e estações ocupadas (um quarto do tamanho do ROB por tipo)."""
+    rob_class, rs_class = BACKENDS[backend]
+    rob = rob_class(size=rob_size)
+    stations = rs_class({'INT': rob_size // 4, 'FP': rob_size // 4, 'MEM': rob_size // 4})
+    for i in range(rob_size):
+        index = rob.allocate()
+        entry = rob.entries[index]
+        entry.state = 'Issued'
+        entry.pc = i
+        entry.value = i
+    for rs_type in stations.stations:
+        while stations.allocate(rs_type, 0) is not None:
+            pass
+    return rob, stations
+
+
+def _operations(rob, stations):
+    half = list(range(len(rob.entries) // 2, len(rob.entries)))
+    return {
+        'flush (metade do ROB)': lambda: rob.reset_entries(half),
+        'reset das estações': stations.reset,
+        'varredura de ocupadas': lambda: (rob.occupied(), [stations.busy_stations(t) for t in stations.stations]),
+        'snapshot (deepcopy)': lambda: copy.deepcopy((rob, stations)),
+    }
+
+
+def main():
+    print(f"{'operação':<24}{'ROB':>6}{'objects (µs)':>15}{'numpy (µs)':>14}{'ganho':>9}")
+    for rob_size in ROB_SIZES:
+        names = None
+        timings = {}
+        for backend in BACKENDS:
+            # O estado é reconstruído a cada repetição, pois flush/reset alteram a estrutura
+            results = {}
+            for name in _operations(*_build(backend, rob_size)):
+                def run(name=name):
+                    rob, stations = _build(backend, rob_size)
+                    operation = _operations(rob, stations)[name]
+                    return timeit.timeit(operation, number=1)
+                results[name] = min(run() for _ in range(20)) * 1e6
+            timings[backend] = results
+            names = list(results)
+        for name in names:
+            objects_time, numpy_time = timings['objects'][name], timings['numpy'][name]
+            print(f"{name:<24}{rob_size:>6}{objects_time:>15.1f}{numpy_time:>14.1f}{objects_time / numpy_time:>8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -34,7 +34,7 @@ ADDI R3, R0, 1    # R3 = 1"""
         # Mostrar estado dos registradores
         print("Registradores:")
         for reg in ['R0', 'R1', 'R2', 'R3', 'R4']:
-            print(f"  {reg}: {core.registers.values[reg]}")
+            print(f"  {reg}: {core.registers.get_value(reg)}")
         
         # Mostrar estado do ROB
         print("ROB:")
@@ -58,7 +58,7 @@ ADDI R3, R0, 1    # R3 = 1"""
     print(f"\n=== Resultado Final ===")
     print("Registradores finais:")
     for reg in ['R0', 'R1', 'R2', 'R3', 'R4']:
-        print(f"  {reg}: {core.registers.values[reg]}")
+        print(f"  {reg}: {core.registers.get_value(reg)}")
 
 if __name__ == "__main__":
     debug_branch() 
\ No newline at end of file
@@ -33,7 +33,7 @@ ADDI R3, R0, 1    # R3 = 1"""
         # Mostrar registradores
         print("Registradores:")
         for reg in ['R0', 'R1', 'R2', 'R3']:
-            print(f"  {reg}: {core.registers.values[reg]}")
+            print(f"  {reg}: {core.registers.get_value(reg)}")
         
         # Mostrar ROB
         print("ROB:")
@@ -55,7 +55,7 @@ ADDI R3, R0, 1    # R3 = 1"""
     print(f"\n=== Resultado Final ===")
     print("Registradores finais:")
     for reg in ['R0', 'R1', 'R2', 'R3']:
-        print(f"  {reg}: {core.registers.values[reg]}")
+        print(f"  {reg}: {core.registers.get_value(reg)}")
 
 if __name__ == "__main__":
     simple_branch_test() 
\ No newline at end of file
@@ -1 +1,3 @@
-# Simulator package 
\ No newline at end of file
+# Simulator package
+from simulator.batch import SimulationResult, simulate
+from simulator.config import MachineConfig
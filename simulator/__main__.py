@@ -0,0 +1,78 @@
+"""
+Ponto de entrada headless: `python -m simulator programa.asm [...]`.
+
+Simula cada programa até o fim (ou até o limite de ciclos) e imprime os
+registradores finais, as métricas e a vazão do simulador.
+"""
+import argparse
+import json
+import sys
+
+from simulator.batch import simulate
+from simulator.config import MachineConfig
+
+
+def _read_program(path):
+    if path == '-':
+        return sys.stdin.read()
+    with open(path, encoding='utf-8') as f:
+        return f.read()
+
+
+def _parse_fast_forward(text):
+    """'1000' -> 1000 instruções; qualquer outro texto é uma label."""
+    return int(text) if text.isdigit() else text
+
+
+def _print_result(path, result):
+    status = "ok" if result.finished else "limite de ciclos atingido"
+    print(f"== {path} ({status})")
+    print(f"Ciclos: {result.cycles}")
+    if result.skipped_instructions:
+        print(f"Instruções avançadas sem simulação detalhada: {result.skipped_instructions}")
+    for key, value in result.metrics.items():
+        if key == 'ipc':
+            print(f"  {key}: {value:.3f}")
+        else:
+            print(f"  {key}: {value}")
+    non_zero = {reg: value for reg, value in result.registers.items() if value != 0}
+    print("Registradores: " + (", ".join(f"{reg}={value}" for reg, value in non_zero.items()) or "-"))
+    print(f"Vazão: {result.cycles_per_second:.0f} ciclos/s ({result.wall_time:.4f} s)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m simulator",
+                                     description="Executa programas MIPS no simulador de Tomasulo sem GUI.")
+    parser.add_argument('programs', nargs='+', help="arquivos de programa ('-' para stdin)")
+    parser.add_argument('--max-cycles', type=int, default=None, help="limite de ciclos por programa")
+    parser.add_argument('--json', action='store_true', help="imprime um objeto JSON por programa")
+    parser.add_argument('--machine', metavar='ARQUIVO',
+                        help="arquivo JSON com a configuração da máquina (ROB, estações, unidades, latências...)")
+    parser.add_argument('--fast-forward', metavar='N|LABEL', type=_parse_fast_forward, default=None,
+                        help="executa funcionalmente as N primeiras instruções (ou até a label) antes da simulação detalhada")
+    parser.add_argument('--event-driven', action='store_true',
+                        help="salta os ciclos em que nada muda (mesmo resultado, mais rápido com operações longas)")
+    args = parser.parse_args(argv)
+    try:
+        machine = MachineConfig.from_file(args.machine) if args.machine else None
+    except (OSError, ValueError) as error:
+        parser.error(f"configuração da máquina inválida: {error}")
+
+    exit_code = 0
+    for path in args.programs:
+        try:
+            result = simulate(_read_program(path), max_cycles=args.max_cycles, machine=machine,
+                              fast_forward=args.fast_forward, event_driven=args.event_driven)
+        except ValueError as error:
+            parser.error(f"{path}: {error}")
+        if not result.finished:
+            exit_code = 1
+        if args.json:
+            print(json.dumps({'program': path, **result.to_dict()}))
+        else:
+            _print_result(path, result)
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,132 @@
+"""
+API de execução em lote (headless) do simulador de Tomasulo.
+
+Este módulo não importa a GUI (tkinter), de modo que pode ser usado em
+scripts e pipelines que executam muitos programas em sequência.
+"""
+import time
+from typing import Any, Dict, Optional
+
+from simulator import config as default_config
+from simulator.config import MachineConfig
+from simulator.core import TomasuloCore
+from simulator.functional import fast_forward as run_fast_forward
+
+
+class SimulationResult:
+    """Resultado de uma simulação completa de um programa."""
+
+    def __init__(self, cycles, finished, registers, memory, metrics, wall_time, skipped_instructions=0):
+        self.cycles: int = cycles
+        self.finished: bool = finished  # False se o limite de ciclos foi atingido
+        self.registers: Dict[str, int] = registers
+        self.memory: Dict[int, int] = memory
+        self.metrics: Dict[str, Any] = metrics
+        self.wall_time: float = wall_time
+        self.skipped_instructions: int = skipped_instructions  # Executadas no avanço rápido (sem tempo)
+
+    @property
+    def cycles_per_second(self):
+        """Vazão do simulador em ciclos simulados por segundo."""
+        if self.wall_time <= 0:
+            return 0.0
+        return self.cycles / self.wall_time
+
+    def to_dict(self):
+        return {
+            'cycles': self.cycles,
+            'finished': self.finished,
+            'registers': dict(self.registers),
+            'memory': dict(self.memory),
+            'metrics': dict(self.metrics),
+            'wall_time': self.wall_time,
+            'skipped_instructions': self.skipped_instructions,
+            'cycles_per_second': self.cycles_per_second,
+        }
+
+    def __repr__(self):
+        return (f"SimulationResult(cycles={self.cycles}, finished={self.finished}, "
+                f"ipc={self.metrics.get('ipc', 0.0):.3f})")
+
+
+def run_core(core: TomasuloCore, max_cycles: int, event_driven: bool = False):
+    """Executa `cycle_step()` até o fim do programa ou até `max_cycles`.
+
+    Com `event_driven`, usa `event_step()`, que salta os ciclos ociosos
+    (mesmo resultado, mais rápido quando há operações longas). Retorna True
+    se o programa terminou antes do limite de ciclos.
+    """
+    if event_driven:
+        while core.cycle < max_cycles:
+            if not core.event_step(max_cycles):
+                return True
+        return not core._has_work_to_do()
+    step = core.cycle_step
+    while core.cycle < max_cycles:
+        if not step():
+            return True
+    return not core._has_work_to_do()
+
+
+def simulate(program: str, config=None, max_cycles: Optional[int] = None,
+             machine: Optional[MachineConfig] = None, fast_forward=None,
+             event_driven: bool = False) -> SimulationResult:
+    """Carrega `program` (texto MIPS), simula até o fim e retorna o resultado.
+
+    `config` é o módulo (ou objeto) de configuração de onde vem o limite de
+    ciclos padrão (`MAX_CYCLES`); por padrão, `simulator.config`. `machine`
+    define o modelo da máquina simulada (ROB, estações, unidades, latências...).
+    Com `fast_forward` (número de instruções ou label), o início do programa
+    é executado pelo simulador funcional e só o restante é simulado em detalhe.
+    Com `event_driven`, os ciclos ociosos são saltados (`TomasuloCore.event_step`).
+    """
+    if config is None:
+        config = default_config
+    if max_cycles is None:
+        max_cycles = config.MAX_CYCLES
+    core = TomasuloCore(undo_budget=0, machine=machine)  # Sem histórico de "Voltar" em lote
+    core.load_program(program)
+    start = time.perf_counter()
+    skipped = 0
+    if fast_forward is not None:
+        if isinstance(fast_forward, str):
+            skipped = run_fast_forward(core, until=fast_forward)
+        else:
+            skipped = run_fast_forward(core, count=fast_forward)
+    finished = run_core(core, max_cycles, event_driven)
+    wall_time = time.perf_counter() - start
+    return SimulationResult(
+        cycles=core.cycle,
+        finished=finished,
+        registers=core.registers.as_dict(),
+        memory=dict(core.memory),
+        metrics=core.metrics.copy(),
+        wall_time=wall_time,
+        skipped_instructions=skipped,
+    )
+
+
+def simulate_trace(trace, config=None, max_cycles: Optional[int] = None,
+                   machine: Optional[MachineConfig] = None, event_driven: bool = False) -> SimulationResult:
+    """Simula só o tempo de um trace gravado (`simulator.trace.record_trace`) em uma máquina.
+
+    Os registradores e a memória do resultado não são calculados no modo
+    trace; ciclos e métricas são os da máquina `machine`.
+    """
+    if config is None:
+        config = default_config
+    if max_cycles is None:
+        max_cycles = config.MAX_CYCLES
+    core = TomasuloCore(undo_budget=0, machine=machine)
+    core.load_trace(trace)
+    start = time.perf_counter()
+    finished = run_core(core, max_cycles, event_driven)
+    wall_time = time.perf_counter() - start
+    return SimulationResult(
+        cycles=core.cycle,
+        finished=finished,
+        registers=core.registers.as_dict(),
+        memory=dict(core.memory),
+        metrics=core.metrics.copy(),
+        wall_time=wall_time,
+    )
@@ -0,0 +1,294 @@
+"""
+Avaliação offline de preditores de desvio sobre um fluxo de desvios gravado.
+
+Em vez de rodar o pipeline inteiro para cada preditor candidato, o fluxo de
+desvios do caminho executado (PC e resultado de cada desvio condicional) é
+extraído uma vez, de um trace (`simulator.trace`/`simulator.tracefile`), de
+um histórico de desvios do núcleo ou de uma execução funcional, e cada
+configuração é avaliada sobre ele, em ordem (prevê, depois treina), como no
+`FunctionalSimulator`.
+
+Os preditores de contadores ('1bit', '2bit', 'gshare', 'tournament') são
+avaliados de forma vetorizada: os índices das tabelas saem de operações
+sobre arrays inteiros e o estado de cada contador saturado antes de cada
+desvio vem de uma varredura de prefixos (composição das transições do
+contador) segmentada por entrada da tabela, em O(n log n) sem laço Python
+por desvio. O TAGE, cuja alocação é inerentemente sequencial, usa a
+própria classe do preditor. As configurações são distribuídas entre
+processos.
+
+Uso: python -m simulator.bpeval programa.asm -p 2bit:table_bits=4,8,12 \\
+         -p gshare:table_bits=10,12:history_bits=4,8 -p tage
+"""
+import argparse
+import inspect
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from simulator.components.branch_predictor import PREDICTORS, make_predictor
+from simulator.isa import ISA
+from simulator.sweep import _parse_axis, grid
+from simulator.trace import record_trace
+from simulator.tracefile import MAGIC, TraceFile
+
+BRANCH_OPCODES = np.array([opcode for opcode, spec in enumerate(ISA) if spec.kind == 'branch'])
+
+
+class BranchStream:
+    """Desvios condicionais do caminho executado, em ordem: `pcs`, `taken` e o total de instruções (para o MPKI)."""
+
+    def __init__(self, pcs, taken, instructions=None):
+        self.pcs = np.asarray(pcs, dtype=np.int64)
+        self.taken = np.asarray(taken, dtype=bool)
+        self.instructions = instructions
+
+    def __len__(self):
+        return len(self.pcs)
+
+    @classmethod
+    def from_trace(cls, trace):
+        """De um `Trace` em memória ou de um `TraceFile` (lido bloco a bloco)."""
+        if isinstance(trace, TraceFile):
+            pcs, taken = [], []
+            for chunk in trace.iter_chunks():
+                branches = chunk[np.isin(chunk['opcode'], BRANCH_OPCODES)]
+                pcs.append(branches['pc'].astype(np.int64))
+                taken.append(branches['taken'] == 1)
+            if not pcs:
+                return cls([], [], 0)
+            return cls(np.concatenate(pcs), np.concatenate(taken), len(trace))
+        opcodes = np.frombuffer(trace.opcode, dtype=np.int64)
+        mask = np.isin(opcodes, BRANCH_OPCODES)
+        return cls(np.frombuffer(trace.pc, dtype=np.int64)[mask],
+                   np.frombuffer(trace.taken, dtype=np.int64)[mask] == 1, len(trace))
+
+    @classmethod
+    def from_history(cls, records, instructions=None):
+        """De registros no formato de `TomasuloCore.branch_history` ('pc' e 'actual')."""
+        pcs, taken = [], []
+        for record in records:
+            pcs.append(record['pc'])
+            taken.append(record['actual'])
+        return cls(pcs, taken, instructions)
+
+    @classmethod
+    def from_program(cls, program, max_instructions=None):
+        """Executa `program` no simulador funcional e extrai os seus desvios."""
+        return cls.from_trace(record_trace(program, max_instructions))
+
+
+# ----------------------------------------------------------------------
+# Avaliação vetorizada
+
+def _compose_table():
+    """COMPOSE[a, b]: a função de estados "a, depois b", com cada função de um contador de 2 bits
+    empacotada em um byte (o novo estado de s nos bits 2s e 2s + 1)."""
+    maps = np.arange(256)
+    new_state = [(maps >> (2 * state)) & 3 for state in range(4)]
+    composed = np.zeros((256, 256), dtype=np.uint8)
+    for state in range(4):
+        middle = new_state[state]  # a(s), para cada a
+        composed |= ((maps[None, :] >> (2 * middle[:, None])) & 3).astype(np.uint8) << (2 * state)
+    return composed
+
+
+COMPOSE = _compose_table()
+_IDENTITY, _INCREMENT, _DECREMENT = (sum(target << (2 * state) for state, target in enumerate(targets))
+                                     for targets in ((0, 1, 2, 3), (1, 2, 3, 3), (0, 0, 1, 2)))
+
+
+def _counter_states(index, updates, initial=1):
+    """Estado de cada contador de 2 bits antes de cada passo.
+
+    `index` é a entrada da tabela usada em cada passo e `updates` o que o
+    passo faz com ela: +1, -1 ou 0 (nada). Cada passo é uma função
+    estado -> estado; dentro de cada entrada, as funções dos passos
+    anteriores são compostas por uma varredura de prefixos (Hillis-Steele,
+    log2 do maior número de passos de uma entrada) e aplicadas ao estado
+    inicial.
+    """
+    n = len(index)
+    if not n:
+        return np.zeros(0, dtype=np.int8)
+    order = np.argsort(index, kind='stable')
+    sorted_index = index[order]
+    steps = np.choose(np.sign(updates[order]) + 1, (_DECREMENT, _IDENTITY, _INCREMENT)).astype(np.uint8)
+
+    starts = np.ones(n, dtype=bool)
+    starts[1:] = sorted_index[1:] != sorted_index[:-1]
+    positions = np.arange(n)
+    segment_start = np.maximum.accumulate(np.where(starts, positions, 0))
+    # Varredura exclusiva: o passo i vê só as funções dos passos anteriores da mesma entrada
+    prefix = np.empty_like(steps)
+    prefix[1:] = steps[:-1]
+    prefix[starts] = _IDENTITY
+    longest = int(np.diff(np.append(np.flatnonzero(starts), n)).max())
+    offset = 1
+    while offset < longest:
+        inside = positions[offset:] - offset >= segment_start[offset:]
+        prefix[offset:] = np.where(inside, COMPOSE[prefix[:-offset], prefix[offset:]], prefix[offset:])
+        offset *= 2
+    result = np.empty(n, dtype=np.int8)
+    result[order] = (prefix >> (2 * initial)) & 3
+    return result
+
+
+def _global_history(taken, bits):
+    """Histórico global antes de cada desvio: o resultado mais recente no bit 0."""
+    history = np.zeros(len(taken), dtype=np.int64)
+    outcomes = taken.astype(np.int64)
+    for age in range(1, min(bits, len(taken)) + 1):
+        history[age:] |= outcomes[:-age] << (age - 1)
+    return history
+
+
+def _one_bit(stream):
+    predicted = np.zeros(len(stream), dtype=bool)
+    predicted[1:] = stream.taken[:-1]
+    return predicted
+
+
+def _two_bit(stream, table_bits):
+    updates = np.where(stream.taken, 1, -1)
+    return _counter_states(stream.pcs & ((1 << table_bits) - 1), updates) >= 2
+
+
+def _gshare(stream, table_bits, history_bits):
+    index = (stream.pcs ^ _global_history(stream.taken, history_bits)) & ((1 << table_bits) - 1)
+    return _counter_states(index, np.where(stream.taken, 1, -1)) >= 2
+
+
+def _tournament(stream, table_bits, history_bits, chooser_bits):
+    bimodal = _two_bit(stream, table_bits)
+    gshare = _gshare(stream, table_bits, history_bits)
+    bimodal_correct = bimodal == stream.taken
+    gshare_correct = gshare == stream.taken
+    updates = np.where(bimodal_correct == gshare_correct, 0, np.where(gshare_correct, 1, -1))
+    chooser = _counter_states(stream.pcs & ((1 << chooser_bits) - 1), updates)
+    return np.where(chooser >= 2, gshare, bimodal)
+
+
+VECTORIZED = {
+    '1bit': _one_bit,
+    '2bit': _two_bit,
+    'gshare': _gshare,
+    'tournament': _tournament,
+}
+
+
+def _sequential(stream, name, params):
+    """Avaliação desvio a desvio com a própria classe do preditor (referência e TAGE)."""
+    predictor = make_predictor(name, **params)
+    predicted = np.zeros(len(stream), dtype=bool)
+    for i, (pc, taken) in enumerate(zip(stream.pcs.tolist(), stream.taken.tolist())):
+        predicted[i] = predictor.predict(pc)
+        predictor.update(pc, taken)
+    return predicted
+
+
+def predictions(stream, name, vectorized=True, **params):
+    """Previsão do preditor `name` para cada desvio do fluxo."""
+    make_predictor(name, **params)  # Valida o nome e os parâmetros
+    if vectorized and name in VECTORIZED:
+        bound = inspect.signature(PREDICTORS[name]).bind(**params)
+        bound.apply_defaults()
+        return VECTORIZED[name](stream, **bound.arguments)
+    return _sequential(stream, name, params)
+
+
+def evaluate(stream, name, **params):
+    """Erros de predição de uma configuração: linha com taxa de erro e MPKI (erros por mil instruções)."""
+    mispredictions = int(np.count_nonzero(predictions(stream, name, **params) != stream.taken))
+    branches = len(stream)
+    return {
+        'predictor': name,
+        'params': params,
+        'branches': branches,
+        'mispredictions': mispredictions,
+        'rate': mispredictions / branches if branches else 0.0,
+        'mpki': 1000 * mispredictions / stream.instructions if stream.instructions else None,
+    }
+
+
+_worker_stream = None
+
+
+def _init_worker(stream):
+    global _worker_stream
+    _worker_stream = stream
+
+
+def _evaluate_job(name, params):
+    """Executado nos processos do pool, com o fluxo recebido uma vez por processo."""
+    return evaluate(_worker_stream, name, **params)
+
+
+def evaluate_many(stream, configs, workers=None):
+    """Avalia cada (nome, parâmetros) de `configs`; retorna as linhas na mesma ordem."""
+    for name, params in configs:
+        make_predictor(name, **params)
+    if workers == 1 or len(configs) < 2:
+        return [evaluate(stream, name, **params) for name, params in configs]
+    with ProcessPoolExecutor(max_workers=min(workers or os.cpu_count(), len(configs)),
+                             initializer=_init_worker, initargs=(stream,)) as pool:
+        futures = [pool.submit(_evaluate_job, name, params) for name, params in configs]
+        return [future.result() for future in futures]
+
+
+def format_table(rows):
+    """Tabela de texto com uma linha por configuração, da menor taxa de erro para a maior."""
+    lines = [f"{'preditor':<12} {'parâmetros':<36} {'desvios':>10} {'erros':>9} {'taxa':>8} {'MPKI':>8}"]
+    for row in sorted(rows, key=lambda row: row['rate']):
+        params = ' '.join(f"{key}={value}" for key, value in row['params'].items()) or '-'
+        mpki = '-' if row['mpki'] is None else f"{row['mpki']:.2f}"
+        lines.append(f"{row['predictor']:<12} {params:<36} {row['branches']:>10} {row['mispredictions']:>9} "
+                     f"{row['rate']:>8.2%} {mpki:>8}")
+    return '\n'.join(lines)
+
+
+def _parse_predictor(text):
+    """'nome[:param=v1,v2[:param=...]]' -> lista de (nome, parâmetros), um por ponto da grade."""
+    name, *axes = text.split(':')
+    if name not in PREDICTORS:
+        raise argparse.ArgumentTypeError(f"preditor desconhecido: {name!r} (opções: {', '.join(PREDICTORS)})")
+    return [(name, params) for params in grid(dict(_parse_axis(axis) for axis in axes))]
+
+
+def _load_stream(path, max_instructions):
+    with open(path, 'rb') as f:
+        is_trace = f.read(len(MAGIC)) == MAGIC
+    if is_trace:
+        with TraceFile(path) as trace_file:
+            return BranchStream.from_trace(trace_file)
+    with open(path, encoding='utf-8') as f:
+        return BranchStream.from_program(f.read(), max_instructions)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m simulator.bpeval",
+                                     description="Compara preditores de desvio sobre o fluxo de desvios de um programa ou trace.")
+    parser.add_argument('source', help="arquivo de programa ou trace binário (simulator.tracefile)")
+    parser.add_argument('-p', '--predictor', action='append', type=_parse_predictor, default=[],
+                        metavar='NOME[:PARAM=V1,V2]', help="preditor e grade de parâmetros (pode ser repetido; "
+                                                          "padrão: todos com os tamanhos padrão)")
+    parser.add_argument('--max-instructions', type=int, default=None, help="limite da execução funcional")
+    parser.add_argument('--workers', type=int, default=None, help="número de processos (padrão: todos os núcleos)")
+    args = parser.parse_args(argv)
+
+    configs = [config for configs in args.predictor for config in configs] or [(name, {}) for name in PREDICTORS]
+    try:
+        for name, params in configs:
+            make_predictor(name, **params)
+        stream = _load_stream(args.source, args.max_instructions)
+    except ValueError as error:
+        parser.error(str(error))
+    print(f"{len(stream)} desvios em {stream.instructions} instruções", file=sys.stderr)
+    print(format_table(evaluate_many(stream, configs, args.workers)))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,243 @@
+"""
+Armazenamento alternativo (struct-of-arrays) do ROB e das estações de reserva.
+
+Os campos de todas as entradas ficam em arrays NumPy pré-alocados, um por
+campo. Cada entrada continua acessível como objeto (`ROBEntryView`,
+`ReservationStationView`, com `__slots__`), com os mesmos atributos das
+classes originais, de modo que o núcleo funciona sem alterações. Operações
+sobre a estrutura inteira (flush, reset, varreduras e snapshots) passam a
+ser vetorizadas. Flush, reset e snapshots ficam mais rápidos em qualquer
+tamanho; a varredura de ocupadas só compensa em ROBs grandes (centenas de
+entradas) e, no ROB padrão de 32, é mais lenta que a de objetos (veja
+benchmarks/storage_backends.py).
+
+Os campos inteiros usam 64 bits, a largura dos registradores da ISA
+(`isa.WORD_BITS`): os resultados já chegam reduzidos a ela, como no backend
+de objetos.
+"""
+import numpy as np
+
+from simulator import config
+from simulator.components.reorder_buffer import ReorderBuffer
+from simulator.components.reservation_station import ReservationStations
+from simulator.journal import Journaled
+
+_NONE = np.iinfo(np.int64).min  # Sentinela para None em campos inteiros
+ROB_STATES = ('Empty', 'Issued', 'Executing', 'Writeback', 'Commit')
+_STATE_CODE = {state: code for code, state in enumerate(ROB_STATES)}
+
+# Tipos de coluna: 'int' (int64, None permitido), 'bool', 'optbool' (int8, -1 = None),
+# 'state' (código do estado do ROB) e 'object' (lista Python)
+ROB_COLUMNS = (
+    ('state', 'state', 'Empty'),
+    ('instruction', 'object', None),
+    ('destination', 'int', None),
+    ('value', 'int', None),
+    ('ready', 'bool', False),
+    ('pc', 'int', -1),
+    ('predicted_taken', 'optbool', None),
+    ('actual_outcome', 'optbool', None),
+    ('target_pc', 'int', -1),
+    ('old_tag', 'int', None),
+    ('issue_cycle', 'int', None),
+    ('execute_cycle', 'int', None),
+    ('write_cycle', 'int', None),
+    ('flush_cycle', 'int', None),
+)
+
+RS_COLUMNS = (
+    ('busy', 'bool', False),
+    ('op', 'object', None),
+    ('vj', 'int', None),
+    ('vk', 'int', None),
+    ('qj', 'int', None),
+    ('qk', 'int', None),
+    ('a', 'int', None),
+    ('dest', 'int', None),
+    ('cycles_remaining', 'int', 0),
+    ('ready', 'bool', False),
+    ('result', 'int', None),
+    ('seq', 'int', None),
+)
+
+
+def _encode(kind, value):
+    if kind == 'int':
+        return _NONE if value is None else value
+    if kind == 'optbool':
+        return -1 if value is None else int(value)
+    if kind == 'state':
+        return _STATE_CODE[value]
+    return value
+
+
+def _new_column(kind, default, size):
+    if kind == 'object':
+        return [default] * size
+    dtype = {'int': np.int64, 'bool': np.bool_, 'optbool': np.int8, 'state': np.int8}[kind]
+    return np.full(size, _encode(kind, default), dtype=dtype)
+
+
+def _field(name, kind):
+    """Cria a property que lê/escreve o campo `name` da entrada na sua coluna."""
+    if kind == 'int':
+        def get(self):
+            value = self._columns[name][self._index]
+            return None if value == _NONE else int(value)
+    elif kind == 'bool':
+        def get(self):
+            return bool(self._columns[name][self._index])
+    elif kind == 'optbool':
+        def get(self):
+            value = self._columns[name][self._index]
+            return None if value < 0 else bool(value)
+    elif kind == 'state':
+        def get(self):
+            return ROB_STATES[self._columns[name][self._index]]
+    else:
+        def get(self):
+            return self._columns[name][self._index]
+
+    def set(self, value):
+        self._columns[name][self._index] = _encode(kind, value)
+    return property(get, set)
+
+
+def _rebuild_view(cls, columns, index, journal, extra):
+    view = cls.__new__(cls)
+    view._bind(columns, index)
+    object.__setattr__(view, '_journal', journal)
+    for name, value in extra.items():
+        object.__setattr__(view, name, value)
+    return view
+
+
+class _ColumnView(Journaled):
+    """Visão de uma linha das colunas; as escritas passam pelo journal como atributos comuns."""
+    __slots__ = ('_columns', '_index', '_journal')
+    COLUMNS = ()
+
+    def _bind(self, columns, index):
+        object.__setattr__(self, '_columns', columns)
+        object.__setattr__(self, '_index', index)
+        object.__setattr__(self, '_journal', None)
+
+    def reset(self):
+        for name, kind, default in self.COLUMNS:
+            setattr(self, name, default)
+
+    def __reduce__(self):
+        # Além da linha, os slots próprios de cada visão (ex.: `type` das estações)
+        extra = {name: getattr(self, name) for name in type(self).__slots__ if hasattr(self, name)}
+        return (_rebuild_view, (type(self), self._columns, self._index, self._journal, extra))
+
+
+class ROBEntryView(_ColumnView):
+    __slots__ = ()
+    COLUMNS = ROB_COLUMNS
+
+
+class ReservationStationView(_ColumnView):
+    __slots__ = ('type',)
+    COLUMNS = RS_COLUMNS
+
+
+for _name, _kind, _default in ROB_COLUMNS:
+    setattr(ROBEntryView, _name, _field(_name, _kind))
+for _name, _kind, _default in RS_COLUMNS:
+    setattr(ReservationStationView, _name, _field(_name, _kind))
+
+
+def _positions(column, index):
+    return range(len(column))[index] if isinstance(index, slice) else index
+
+
+def _restore_columns(columns, index, saved):
+    for name, values in saved.items():
+        column = columns[name]
+        if isinstance(column, list):
+            for i, value in zip(_positions(column, index), values):
+                column[i] = value
+        else:
+            column[index] = values
+
+
+class _ColumnStore:
+    """Operações vetorizadas comuns às estruturas baseadas em colunas."""
+
+    def _fill(self, specs, index):
+        """Volta as linhas `index` (slice ou array de índices) aos valores padrão, registrando no journal."""
+        columns = self.columns
+        journal = self._journal
+        if journal is not None and journal.current is not None:
+            saved = {}
+            for name, kind, default in specs:
+                column = columns[name]
+                if kind == 'object':
+                    saved[name] = [column[i] for i in _positions(column, index)]
+                else:
+                    saved[name] = column[index].copy()
+            journal.log(_restore_columns, columns, index, saved)
+        for name, kind, default in specs:
+            column = columns[name]
+            if kind == 'object':
+                for i in _positions(column, index):
+                    column[i] = default
+            else:
+                column[index] = _encode(kind, default)
+
+
+class ArrayReorderBuffer(_ColumnStore, ReorderBuffer):
+    """ReorderBuffer com os campos das entradas em arrays NumPy."""
+
+    def __init__(self, size=32):
+        self.columns = {name: _new_column(kind, default, size) for name, kind, default in ROB_COLUMNS}
+        super().__init__(size)
+
+    def _make_entry(self, index):
+        entry = ROBEntryView.__new__(ROBEntryView)
+        entry._bind(self.columns, index)
+        return entry
+
+    def occupied(self):
+        # 'Empty' tem código 0: as ocupadas são as posições não nulas (sem criar a máscara da comparação)
+        return self.columns['state'].nonzero()[0].tolist()
+
+    def reset_entries(self, indices):
+        if len(indices):
+            self._fill(ROB_COLUMNS, np.asarray(indices, dtype=np.intp))
+
+
+class ArrayReservationStations(_ColumnStore, ReservationStations):
+    """ReservationStations com os campos das estações em arrays NumPy."""
+
+    def __init__(self, counts=None):
+        # As estações de todos os tipos compartilham as mesmas colunas, em faixas contíguas
+        self._next_row = 0
+        self._ranges = {}
+        total = sum((config.RESERVATION_STATIONS if counts is None else counts).values())
+        self.columns = {name: _new_column(kind, default, total) for name, kind, default in RS_COLUMNS}
+        super().__init__(counts)
+
+    def _make_station(self, rs_type, index):
+        row = self._next_row
+        self._next_row += 1
+        start, _ = self._ranges.get(rs_type, (row, row))
+        self._ranges[rs_type] = (start, row + 1)
+        station = ReservationStationView.__new__(ReservationStationView)
+        station._bind(self.columns, row)
+        object.__setattr__(station, 'type', rs_type)
+        return station
+
+    def busy_stations(self, rs_type):
+        start, stop = self._ranges[rs_type]
+        stations = self.stations[rs_type]
+        return [(i, stations[i]) for i in self.columns['busy'][start:stop].nonzero()[0].tolist()]
+
+    def reset(self):
+        """Reseta todas as estações de uma vez (escrita vetorizada nas colunas)."""
+        self._fill(RS_COLUMNS, slice(None))
+        for station_type in self.stations:
+            self.free[station_type][:] = self.stations[station_type]
+        self.by_rob.clear()
+        self.busy_count = 0
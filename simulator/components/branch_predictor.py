@@ -1,27 +1,304 @@
-from collections import defaultdict
+"""
+Preditores de desvio.
 
-class OneBitPredictor:
+Todos seguem a mesma interface: `predict(pc)` retorna True para "tomado" e
+`update(pc, tomado)` treina o preditor com o resultado real. As tabelas
+são `array`s de inteiros, com o tamanho dado em bits de índice (uma tabela
+com `table_bits=10` tem 1024 entradas); as escritas nelas e nos
+registradores de histórico são registradas no journal de desfazer.
+
+Nos preditores com histórico global, o núcleo atualiza o histórico de forma
+especulativa no despacho (`speculate`), guarda o histórico visto por cada
+desvio (`checkpoint`) para treinar as tabelas com ele na execução
+(`update(pc, tomado, histórico)`) e o conserta no flush (`recover`). Sem o
+histórico explícito (simulação funcional, em ordem), `update` também
+acrescenta o resultado ao histórico.
+
+O preditor do núcleo é escolhido pelo nome (`make_predictor`, chaves de
+`PREDICTORS`), a partir da configuração da máquina.
+"""
+from array import array
+
+from simulator.journal import Journaled
+
+
+def _counter(value, taken, maximum):
+    """Contador saturado de 0 a `maximum`."""
+    if taken:
+        return value + 1 if value < maximum else value
+    return value - 1 if value > 0 else value
+
+
+def _fold(history, length, bits):
+    """Reduz os `length` bits mais recentes do histórico a `bits` bits (XOR de fatias)."""
+    history &= (1 << length) - 1
+    folded = 0
+    while history:
+        folded ^= history & ((1 << bits) - 1)
+        history >>= bits
+    return folded
+
+
+class BranchPredictor(Journaled):
+    """Interface comum dos preditores. Os que usam histórico global definem `history_bits`."""
+    name = None
+    history_bits = 0
+
+    def predict(self, pc):
+        """Retorna True se a previsão for 'Tomado'."""
+        raise NotImplementedError
+
+    def update(self, pc, taken, history=None):
+        """Treina o preditor com o resultado real do desvio (`history`: o visto na previsão)."""
+        raise NotImplementedError
+
+    def checkpoint(self):
+        """Histórico global atual (None se o preditor não usa histórico)."""
+        return self.history if self.history_bits else None
+
+    def speculate(self, taken):
+        """Acrescenta a previsão ao histórico, antes de o desvio ser resolvido."""
+        if self.history_bits:
+            self.history = self._shift(self.history, taken)
+
+    def recover(self, history, taken=None):
+        """Conserta o histórico após uma predição errada: o do desvio mais o resultado real.
+
+        Com `taken` None (saltos, que não entram no histórico), volta ao histórico visto no despacho.
+        """
+        if self.history_bits:
+            self.history = history if taken is None else self._shift(history, taken)
+
+    def _shift(self, history, taken):
+        return ((history << 1) | taken) & ((1 << self.history_bits) - 1)
+
+    def _train_history(self, history, taken):
+        """Histórico a usar no treino; em ordem (sem `history`), também avança o histórico."""
+        if history is not None:
+            return history
+        history = self.history
+        self.history = self._shift(history, taken)
+        return history
+
+    def journaled_objects(self):
+        """Objetos cujas escritas devem ser registradas no journal."""
+        return (self,)
+
+    def __str__(self):
+        return self.name
+
+
+class OneBitPredictor(BranchPredictor):
     """
     Implementa um preditor de desvio dinâmico de 1 bit.
-    Este preditor usa uma tabela (Branch History Table - BHT) para armazenar o último
-    resultado de cada instrução de desvio.
+    Guarda um único bit global com o último resultado de qualquer desvio
+    (todos os desvios compartilham a mesma entrada).
     """
+    name = "1-Bit Global Predictor"
+
     def __init__(self):
         self.last_result = False  # bit global
 
     def predict(self, pc):
-        """
-        Prevê o resultado de um desvio com base no seu endereço (PC).
-        Retorna True se a previsão for 'Tomado', False caso contrário.
-        """
         return self.last_result
 
-    def update(self, pc, taken):
-        """
-        Atualiza a BHT com o resultado real do desvio.
-        'taken' é um booleano: True se o desvio foi tomado, False caso contrário.
-        """
+    def update(self, pc, taken, history=None):
         self.last_result = taken
 
-    def __str__(self):
-        return "1-Bit Global Predictor"
+
+class TwoBitPredictor(BranchPredictor):
+    """BHT de contadores de 2 bits indexada pelo PC."""
+    name = "2-Bit BHT"
+
+    def __init__(self, table_bits=10):
+        self.mask = (1 << table_bits) - 1
+        self.counters = array('b', [1]) * (1 << table_bits)  # 1: fracamente não tomado
+
+    def predict(self, pc):
+        return self.counters[pc & self.mask] >= 2
+
+    def update(self, pc, taken, history=None):
+        index = pc & self.mask
+        value = self.counters[index]
+        new = _counter(value, taken, 3)
+        if new != value:
+            self._write(self.counters, index, new)
+
+
+class GSharePredictor(BranchPredictor):
+    """Contadores de 2 bits indexados pelo XOR do PC com o histórico global."""
+    name = "Gshare"
+
+    def __init__(self, table_bits=10, history_bits=8):
+        self.mask = (1 << table_bits) - 1
+        self.history_bits = history_bits
+        self.history = 0
+        self.counters = array('b', [1]) * (1 << table_bits)
+
+    def predict(self, pc, history=None):
+        history = self.history if history is None else history
+        return self.counters[(pc ^ history) & self.mask] >= 2
+
+    def update(self, pc, taken, history=None):
+        index = (pc ^ self._train_history(history, taken)) & self.mask
+        value = self.counters[index]
+        new = _counter(value, taken, 3)
+        if new != value:
+            self._write(self.counters, index, new)
+
+
+class TournamentPredictor(BranchPredictor):
+    """Escolhe, por PC, entre uma BHT de 2 bits (bimodal) e um gshare."""
+    name = "Tournament (bimodal/gshare)"
+
+    def __init__(self, table_bits=10, history_bits=8, chooser_bits=10):
+        self.bimodal = TwoBitPredictor(table_bits)
+        self.gshare = GSharePredictor(table_bits, history_bits)
+        self.chooser_mask = (1 << chooser_bits) - 1
+        self.chooser = array('b', [1]) * (1 << chooser_bits)  # >= 2: usa o gshare
+
+    def journaled_objects(self):
+        return (self, self.bimodal, self.gshare)
+
+    def predict(self, pc):
+        if self.chooser[pc & self.chooser_mask] >= 2:
+            return self.gshare.predict(pc)
+        return self.bimodal.predict(pc)
+
+    # O histórico global é o do gshare
+    def checkpoint(self):
+        return self.gshare.checkpoint()
+
+    def speculate(self, taken):
+        self.gshare.speculate(taken)
+
+    def recover(self, history, taken=None):
+        self.gshare.recover(history, taken)
+
+    def update(self, pc, taken, history=None):
+        bimodal_correct = self.bimodal.predict(pc) == taken
+        gshare_correct = self.gshare.predict(pc, history) == taken
+        if bimodal_correct != gshare_correct:
+            index = pc & self.chooser_mask
+            value = self.chooser[index]
+            new = _counter(value, gshare_correct, 3)
+            if new != value:
+                self._write(self.chooser, index, new)
+        self.bimodal.update(pc, taken)
+        self.gshare.update(pc, taken, history)
+
+
+class TAGEPredictor(BranchPredictor):
+    """TAGE pequeno: BHT bimodal de base e tabelas com tag indexadas por históricos de tamanho geométrico.
+
+    Cada tabela com tag guarda um contador de 3 bits com sinal (tomado se
+    >= 0), a tag e um contador de utilidade de 2 bits. A previsão vem da
+    tabela de histórico mais longo cuja tag confere; após um erro, uma
+    entrada é alocada em uma tabela de histórico mais longo.
+    """
+    name = "TAGE"
+
+    def __init__(self, base_bits=10, table_bits=8, tag_bits=8, history_lengths=(4, 8, 16, 32)):
+        if table_bits < 1 or not 2 <= tag_bits <= 16 or not history_lengths or min(history_lengths) < 1:
+            raise ValueError("TAGE: table_bits >= 1, tag_bits entre 2 e 16 e históricos positivos")
+        self.base_mask = (1 << base_bits) - 1
+        self.base = array('b', [1]) * (1 << base_bits)
+        self.table_bits = table_bits
+        self.mask = (1 << table_bits) - 1
+        self.tag_bits = tag_bits
+        self.tag_mask = (1 << tag_bits) - 1
+        self.history_lengths = tuple(history_lengths)
+        self.history_bits = max(self.history_lengths)
+        self.history = 0
+        size = 1 << table_bits
+        self.counters = [array('b', [0]) * size for _ in self.history_lengths]
+        self.tags = [array('H', [0]) * size for _ in self.history_lengths]
+        self.valid = [array('b', [0]) * size for _ in self.history_lengths]
+        self.useful = [array('b', [0]) * size for _ in self.history_lengths]
+
+    def _lookup(self, pc, history):
+        """Índice e tag de `pc` em cada tabela, com o histórico `history`."""
+        entries = []
+        for length in self.history_lengths:
+            index = (pc ^ (pc >> self.table_bits) ^ _fold(history, length, self.table_bits)) & self.mask
+            tag = (pc ^ _fold(history, length, self.tag_bits)
+                   ^ (_fold(history, length, self.tag_bits - 1) << 1)) & self.tag_mask
+            entries.append((index, tag))
+        return entries
+
+    def _providers(self, entries):
+        """Tabelas cuja tag confere, da de histórico mais longo para a mais curta."""
+        return [table for table in reversed(range(len(entries)))
+                if self.valid[table][entries[table][0]] and self.tags[table][entries[table][0]] == entries[table][1]]
+
+    def _prediction(self, pc, entries, hits):
+        if hits:
+            table = hits[0]
+            return self.counters[table][entries[table][0]] >= 0
+        return self.base[pc & self.base_mask] >= 2
+
+    def predict(self, pc):
+        entries = self._lookup(pc, self.history)
+        return self._prediction(pc, entries, self._providers(entries))
+
+    def update(self, pc, taken, history=None):
+        entries = self._lookup(pc, self._train_history(history, taken))
+        hits = self._providers(entries)
+        predicted = self._prediction(pc, entries, hits)
+        if hits:
+            provider = hits[0]
+            index = entries[provider][0]
+            alternative = self._prediction(pc, entries, hits[1:])
+            value = self.counters[provider][index]
+            new = min(value + 1, 3) if taken else max(value - 1, -4)
+            if new != value:
+                self._write(self.counters[provider], index, new)
+            provider_correct = (value >= 0) == taken
+            if (value >= 0) != alternative:
+                useful = self.useful[provider][index]
+                new = _counter(useful, provider_correct, 3)
+                if new != useful:
+                    self._write(self.useful[provider], index, new)
+        else:
+            provider = -1
+            index = pc & self.base_mask
+            value = self.base[index]
+            new = _counter(value, taken, 3)
+            if new != value:
+                self._write(self.base, index, new)
+        if predicted != taken:
+            self._allocate(entries, provider, taken)
+
+    def _allocate(self, entries, provider, taken):
+        """Aloca uma entrada em uma tabela de histórico mais longo que a que previu."""
+        longer = range(provider + 1, len(entries))
+        for table in longer:
+            index, tag = entries[table]
+            if self.useful[table][index] == 0:
+                self._write(self.valid[table], index, 1)
+                self._write(self.tags[table], index, tag)
+                self._write(self.counters[table], index, 0 if taken else -1)
+                return
+        # Nenhuma entrada livre: as candidatas perdem utilidade
+        for table in longer:
+            index = entries[table][0]
+            self._write(self.useful[table], index, self.useful[table][index] - 1)
+
+
+PREDICTORS = {
+    '1bit': OneBitPredictor,
+    '2bit': TwoBitPredictor,
+    'gshare': GSharePredictor,
+    'tournament': TournamentPredictor,
+    'tage': TAGEPredictor,
+}
+
+
+def make_predictor(name, **params):
+    """Cria o preditor `name` (chave de `PREDICTORS`) com os tamanhos de tabela em `params`."""
+    if name not in PREDICTORS:
+        raise ValueError(f"Preditor desconhecido: {name!r} (opções: {', '.join(PREDICTORS)})")
+    try:
+        return PREDICTORS[name](**params)
+    except TypeError as error:
+        raise ValueError(f"Parâmetros inválidos para o preditor {name!r}: {error}") from None
@@ -0,0 +1,64 @@
+"""
+Previsão de alvos no front-end: BTB e pilha de endereços de retorno (RAS).
+
+O BTB guarda, por PC, o alvo do último desvio/salto tomado naquele PC; no
+despacho, um desvio previsto como tomado só redireciona a busca se o BTB
+tiver o alvo. A RAS recebe o endereço de retorno de cada JAL e fornece o
+alvo previsto dos retornos (JR R31).
+"""
+from array import array
+
+from simulator.journal import Journaled, JournaledList
+
+
+class BranchTargetBuffer(Journaled):
+    """BTB de mapeamento direto com `entries` entradas (PC como tag)."""
+
+    def __init__(self, entries):
+        self.entries = entries
+        self.tags = array('q', [-1]) * entries
+        self.targets = array('q', [0]) * entries
+
+    def journaled_objects(self):
+        return (self,)
+
+    def lookup(self, pc):
+        """Alvo previsto para `pc`, ou None se não estiver no BTB."""
+        index = pc % self.entries
+        return self.targets[index] if self.tags[index] == pc else None
+
+    def update(self, pc, target):
+        index = pc % self.entries
+        if self.tags[index] != pc:
+            self._write(self.tags, index, pc)
+        if self.targets[index] != target:
+            self._write(self.targets, index, target)
+
+
+class ReturnAddressStack(Journaled):
+    """Pilha de endereços de retorno com `entries` posições (ao encher, a mais antiga é descartada)."""
+
+    def __init__(self, entries):
+        self.entries = entries
+        self.stack = JournaledList()
+
+    def journaled_objects(self):
+        return (self, self.stack)
+
+    def push(self, address):
+        if not self.entries:
+            return
+        if len(self.stack) == self.entries:
+            self.stack.pop(0)
+        self.stack.append(address)
+
+    def pop(self):
+        """Endereço de retorno previsto, ou None se a pilha estiver vazia."""
+        return self.stack.pop() if self.stack else None
+
+    def checkpoint(self):
+        return tuple(self.stack)
+
+    def restore(self, checkpoint):
+        """Volta a pilha ao estado de `checkpoint()` (no flush)."""
+        self.stack[:] = checkpoint
@@ -1,14 +1,43 @@
-class CommonDataBus:
+from simulator.journal import Journaled, JournaledDict
+
+class CommonDataBus(Journaled):
     def __init__(self):
         self.busy = False
         self.current_value = None
         self.source = None
         self.listeners = []
+        # Índice tag (ROB) -> operandos de estações de reserva esperando esse resultado
+        self.waiting = JournaledDict()
+
+    def subscribe(self, tag, station, operand):
+        """Registra que o operando 'j' ou 'k' de `station` espera o resultado de `tag`."""
+        waiters = self.waiting.get(tag)
+        if waiters is None:
+            self.waiting[tag] = [(station, operand)]
+            return
+        # Inclusão na lista já existente: registrada no journal à parte (o dicionário não vê)
+        journal = self.waiting._journal
+        if journal is not None:
+            journal.log(list.pop, waiters)
+        waiters.append((station, operand))
 
     def broadcast(self, value, tag):
+        """Difunde o resultado de `tag`. Retorna as estações que ficaram com todos os operandos prontos."""
         self.busy = True
         self.current_value = value
         self.source = tag
+        ready = []
+        # Acorda apenas os consumidores dessa tag
+        for station, operand in self.waiting.pop(tag, ()):
+            if operand == 'j':
+                station.vj = value
+                station.qj = None
+            else:
+                station.vk = value
+                station.qk = None
+            if station.qj is None and station.qk is None:
+                ready.append(station)
         for listener in self.listeners:
             listener.notify(tag, value)
         self.busy = False
+        return ready
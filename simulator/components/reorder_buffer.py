@@ -1,10 +1,15 @@
-from typing import Optional, Dict, Any, Union
+from typing import Optional
 
-class ROBEntry:
+from simulator.journal import Journaled
+
+class ROBEntry(Journaled):
     def __init__(self):
+        self.reset()
+
+    def reset(self):
         self.state: str = 'Empty'
-        self.instruction: Optional[Dict[str, Any]] = None
-        self.destination: Optional[Union[str, int]] = None # Registrador de destino (str) ou índice do ROB para desvios (int)
+        self.instruction = None  # Instruction decodificada
+        self.destination: Optional[int] = None # Índice do registrador de destino ou, para SW, o endereço de memória
         self.value: Optional[int] = None
         self.ready: bool = False
         # Campos para especulação de desvio
@@ -13,9 +18,56 @@ class ROBEntry:
         self.actual_outcome: Optional[bool] = None
         self.target_pc: int = -1
         self.old_tag: Optional[int] = None
+        # Ciclos de cada estágio (gráfico do pipeline); flush_cycle: flush causado por este desvio
+        self.issue_cycle: Optional[int] = None
+        self.execute_cycle: Optional[int] = None
+        self.write_cycle: Optional[int] = None
+        self.flush_cycle: Optional[int] = None
 
-class ReorderBuffer:
+class ReorderBuffer(Journaled):
     def __init__(self, size=32):
-        self.entries = [ROBEntry() for _ in range(size)]
+        self.entries = [self._make_entry(i) for i in range(size)]
         self.head = 0
         self.tail = 0
+        self.count = 0  # Entradas ocupadas, mantido incrementalmente
+
+    def _make_entry(self, index):
+        return ROBEntry()
+
+    def journaled_objects(self):
+        """Objetos cujo estado muda durante a simulação (para o journal de desfazer)."""
+        return [self, *self.entries]
+
+    def occupied(self):
+        """Índices das entradas não vazias."""
+        return [i for i, entry in enumerate(self.entries) if entry.state != 'Empty']
+
+    def reset_entries(self, indices):
+        """Reseta as entradas indicadas para 'Empty'."""
+        for index in indices:
+            self.entries[index].reset()
+
+    def is_full(self):
+        return self.count == len(self.entries)
+
+    def allocate(self):
+        """Reserva a entrada do tail e retorna o seu índice."""
+        index = self.tail
+        self.tail = (index + 1) % len(self.entries)
+        self.count += 1
+        return index
+
+    def retire(self):
+        """Libera a entrada do head (após o commit)."""
+        self.entries[self.head].reset() # Reseta a entrada do ROB para 'Empty'
+        self.head = (self.head + 1) % len(self.entries)
+        self.count -= 1
+
+    def age(self, index):
+        """Distância de uma entrada até o head (0 = mais antiga)."""
+        return (index - self.head) % len(self.entries)
+
+    def truncate_after(self, index):
+        """Descarta as entradas mais novas que `index`; o tail passa a ser a entrada seguinte."""
+        self.tail = (index + 1) % len(self.entries)
+        self.count = self.age(index) + 1
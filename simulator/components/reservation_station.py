@@ -1,6 +1,9 @@
 from typing import Optional
 
-class ReservationStation:
+from simulator import config
+from simulator.journal import Journaled, JournaledDict, JournaledList
+
+class ReservationStation(Journaled):
     def __init__(self, rs_type):
         self.type = rs_type
         self.busy = False
@@ -9,10 +12,12 @@ class ReservationStation:
         self.vk: Optional[int] = None
         self.qj: Optional[int] = None
         self.qk: Optional[int] = None
+        self.a: Optional[int] = None  # Deslocamento do endereço (LW/SW)
         self.dest: Optional[int] = None  # Pode ser int (índice do ROB) ou None
         self.cycles_remaining = 0
         self.ready = False
         self.result: Optional[int] = None
+        self.seq: Optional[int] = None  # Ordem de despacho (idade) da instrução
 
     def reset(self):
         self.busy = False
@@ -21,21 +26,60 @@ class ReservationStation:
         self.vk = None
         self.qj = None
         self.qk = None
+        self.a = None
         self.dest = None
         self.cycles_remaining = 0
         self.ready = False
         self.result = None
+        self.seq = None
+
+class ReservationStations(Journaled):
+    def __init__(self, counts=None):
+        counts = config.RESERVATION_STATIONS if counts is None else counts
+        self.stations = {}
+        for rs_type, count in counts.items():
+            self.stations[rs_type] = [self._make_station(rs_type, i) for i in range(count)]
+        # Ocupação mantida incrementalmente
+        self.free = {rs_type: JournaledList(group) for rs_type, group in self.stations.items()}
+        self.by_rob = JournaledDict()  # Índice do ROB -> estação que executa aquela entrada
+        self.busy_count = 0
+
+    def journaled_objects(self):
+        """Objetos cujo estado muda durante a simulação (para o journal de desfazer)."""
+        stations = [station for group in self.stations.values() for station in group]
+        return [self, self.by_rob, *self.free.values(), *stations]
+
+    def _make_station(self, rs_type, index):
+        return ReservationStation(rs_type)
+
+    def busy_stations(self, rs_type):
+        """Lista (índice, estação) das estações ocupadas de um tipo."""
+        return [(i, station) for i, station in enumerate(self.stations[rs_type]) if station.busy]
+
+    def allocate(self, rs_type, rob_index):
+        """Ocupa uma estação livre do tipo pedido para a entrada `rob_index` do ROB, ou retorna None."""
+        free = self.free[rs_type]
+        if not free:
+            return None
+        station = free.pop(0)
+        station.busy = True
+        station.dest = rob_index
+        self.by_rob[rob_index] = station
+        self.busy_count += 1
+        return station
+
+    def release(self, station):
+        """Libera uma estação ocupada."""
+        del self.by_rob[station.dest]
+        station.reset()
+        self.free[station.type].append(station)
+        self.busy_count -= 1
 
-class ReservationStations:
-    def __init__(self):
-        self.stations = {
-            'INT': [ReservationStation('INT') for _ in range(6)],  # 2 ALUs + branches
-            'FP': [ReservationStation('FP') for _ in range(4)],    # FP ALU + MUL + DIV
-            'MEM': [ReservationStation('MEM') for _ in range(3)]   # Load/Store
-        }
-    
     def reset(self):
         """Reseta todas as estações de reserva para o estado inicial."""
         for station_type in self.stations:
             for station in self.stations[station_type]:
                 station.reset()
+            self.free[station_type][:] = self.stations[station_type]
+        self.by_rob.clear()
+        self.busy_count = 0
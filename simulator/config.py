@@ -1,15 +1,33 @@
 # Configurações do simulador de Tomasulo
+import json
 
 # Configurações do ROB
 ROB_SIZE = 32
 
 # Configurações das estações de reserva
 RESERVATION_STATIONS = {
-    'INT': 4,  # 4 estações para instruções inteiras
-    'FP': 2    # 2 estações para instruções de ponto flutuante
+    'INT': 6,  # 6 estações para instruções inteiras e branches
+    'FP': 4,   # 4 estações para instruções de ponto flutuante
+    'MEM': 3,  # 3 estações para loads/stores
 }
 
-# Latências das instruções (em ciclos)
+# Unidades de execução (quantidade por tipo)
+EXECUTION_UNITS = {
+    'INT_ALU': 2,
+    'FP_ALU': 1,
+    'FP_MUL': 1,
+    'FP_DIV': 1,
+    'MEM_LOAD': 1,
+    'MEM_STORE': 1,
+    'BRANCH': 1,
+}
+
+# Largura do pipeline: instruções despachadas e commitadas por ciclo
+ISSUE_WIDTH = 2
+COMMIT_WIDTH = 4
+
+# Latências das instruções (em ciclos; toda instrução ocupa a unidade por pelo menos 1 ciclo).
+# Única fonte das latências: todo opcode de isa.ISA precisa de uma entrada aqui
 INSTRUCTION_LATENCIES = {
     'ADD': 1,
     'ADDI': 0,
@@ -21,12 +39,124 @@ INSTRUCTION_LATENCIES = {
     'BEQ': 1,
     'BNE': 1,
     'J': 1,
-    'JAL': 1
+    'JAL': 1,
+    'JR': 1,
 }
 
-# Penalidade de branch misprediction
+# Penalidade de branch misprediction: ciclos sem despacho após o flush (incluindo o ciclo do flush)
 BRANCH_PENALTY = 10
 
+# Preditor de desvio: '1bit' (bit global), '2bit' (BHT por PC), 'gshare',
+# 'tournament' (bimodal/gshare) ou 'tage'; PREDICTOR_PARAMS ajusta os tamanhos
+# das tabelas (ex.: {'table_bits': 12, 'history_bits': 10} para o gshare)
+BRANCH_PREDICTOR = '1bit'
+PREDICTOR_PARAMS = {}
+
+# Front-end: entradas do BTB (alvos de desvios e saltos consultados no despacho;
+# com 0, os alvos diretos são conhecidos no despacho e só JR precisa de previsão)
+# e da pilha de endereços de retorno (RAS; com 0, desativada)
+BTB_ENTRIES = 0
+RAS_ENTRIES = 8
+
 # Configurações da GUI
 GUI_REFRESH_RATE = 500  # ms entre atualizações da GUI
 GUI_WINDOW_SIZE = "1400x900"
+
+# Armazenamento do ROB e das estações de reserva:
+# 'objects' (um objeto por entrada) ou 'numpy' (colunas em arrays NumPy)
+STORAGE_BACKEND = 'objects'
+
+# Limite de ciclos para execuções em lote (sem GUI)
+MAX_CYCLES = 100000
+
+# Orçamento do journal de desfazer ("Voltar"): número máximo de escritas
+# registradas. Ao exceder, os ciclos mais antigos são descartados.
+# Com 0, o histórico de desfazer é desativado.
+UNDO_BUDGET = 200000
+
+# Históricos de commits e de desvios: registros mantidos em memória (os mais
+# recentes; com 0, sem limite) e registros por lote na gravação em disco
+HISTORY_CAPACITY = 2000
+HISTORY_BATCH_SIZE = 1024
+
+# Linha do tempo (checkpoints para pular para qualquer ciclo)
+CHECKPOINT_INTERVAL = 64  # ciclos entre checkpoints (dobra quando o limite é atingido)
+MAX_CHECKPOINTS = 256     # número máximo de checkpoints mantidos em memória
+
+# Interface gráfica: quadros por segundo durante o "Run" e tempo máximo (s) que a
+# simulação em segundo plano segura o núcleo a cada lote de ciclos
+GUI_FRAME_RATE = 30
+WORKER_BATCH_SECONDS = 0.01
+
+
+class MachineConfig:
+    """Modelo da máquina simulada: ROB, estações, unidades, larguras, latências e preditor de desvios.
+
+    Os valores omitidos vêm das constantes deste módulo. Pode ser carregado
+    de um arquivo JSON com as mesmas chaves de `to_dict()`.
+    """
+    FIELDS = ('rob_size', 'reservation_stations', 'execution_units', 'issue_width',
+              'commit_width', 'instruction_latencies', 'branch_penalty', 'branch_predictor', 'predictor_params',
+              'btb_entries', 'ras_entries')
+
+    def __init__(self, rob_size=None, reservation_stations=None, execution_units=None, issue_width=None,
+                 commit_width=None, instruction_latencies=None, branch_penalty=None, branch_predictor=None,
+                 predictor_params=None, btb_entries=None, ras_entries=None):
+        self.rob_size = ROB_SIZE if rob_size is None else rob_size
+        self.reservation_stations = dict(RESERVATION_STATIONS if reservation_stations is None else reservation_stations)
+        self.execution_units = dict(EXECUTION_UNITS if execution_units is None else execution_units)
+        self.issue_width = ISSUE_WIDTH if issue_width is None else issue_width
+        self.commit_width = COMMIT_WIDTH if commit_width is None else commit_width
+        # As latências informadas complementam as padrão
+        self.instruction_latencies = dict(INSTRUCTION_LATENCIES)
+        self.instruction_latencies.update(instruction_latencies or {})
+        self.branch_penalty = BRANCH_PENALTY if branch_penalty is None else branch_penalty
+        self.branch_predictor = BRANCH_PREDICTOR if branch_predictor is None else branch_predictor
+        self.predictor_params = dict(PREDICTOR_PARAMS if predictor_params is None else predictor_params)
+        self.btb_entries = BTB_ENTRIES if btb_entries is None else btb_entries
+        self.ras_entries = RAS_ENTRIES if ras_entries is None else ras_entries
+        self._validate()
+
+    def _validate(self):
+        for name in ('rob_size', 'issue_width', 'commit_width', 'branch_penalty'):
+            value = getattr(self, name)
+            if not isinstance(value, int) or value < 1:
+                raise ValueError(f"{name} deve ser um inteiro positivo (recebido {value!r})")
+        for name in ('btb_entries', 'ras_entries'):
+            value = getattr(self, name)
+            if not isinstance(value, int) or value < 0:
+                raise ValueError(f"{name} deve ser um inteiro não negativo (recebido {value!r})")
+        for name in ('reservation_stations', 'execution_units', 'instruction_latencies'):
+            for key, value in getattr(self, name).items():
+                if not isinstance(value, int) or value < 0:
+                    raise ValueError(f"{name}[{key!r}] deve ser um inteiro não negativo (recebido {value!r})")
+        self.make_predictor()  # ValueError se o preditor ou os tamanhos forem inválidos
+
+    @classmethod
+    def from_dict(cls, data):
+        unknown = set(data) - set(cls.FIELDS)
+        if unknown:
+            raise ValueError(f"Chaves desconhecidas na configuração da máquina: {', '.join(sorted(unknown))}")
+        return cls(**data)
+
+    @classmethod
+    def from_file(cls, path):
+        """Carrega a configuração de um arquivo JSON."""
+        with open(path, encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+    def make_predictor(self):
+        """Cria um preditor de desvios novo, conforme `branch_predictor` e `predictor_params`."""
+        # Importado aqui: os componentes dependem deste módulo
+        from simulator.components.branch_predictor import make_predictor
+        return make_predictor(self.branch_predictor, **self.predictor_params)
+
+    def latency(self, opcode_name):
+        """Latência de execução em ciclos (no mínimo 1)."""
+        return max(1, self.instruction_latencies[opcode_name])
+
+    def __repr__(self):
+        return f"MachineConfig({', '.join(f'{k}={v!r}' for k, v in self.to_dict().items())})"
@@ -1,9 +1,15 @@
-from simulator.components.branch_predictor import OneBitPredictor
+from simulator import config
+from simulator.components.btb import BranchTargetBuffer, ReturnAddressStack
 from simulator.components.cdb import CommonDataBus
 from simulator.components.reorder_buffer import ReorderBuffer
 from simulator.components.reservation_station import ReservationStations
-from simulator.parser import parse_instruction
+from simulator.history import HistoryLog, HistorySink
+from simulator.journal import Journaled, JournaledDict, JournaledList, UndoJournal
+from simulator.isa import IS_LOAD, ISA, SEMANTICS, UNIT_TYPES
+from simulator.parser import LINK_REGISTER, parse_program, parse_register
+from bisect import insort
 import copy
+import os
 
 class ROBState:
     EMPTY = 'Empty'
@@ -13,137 +19,317 @@ class ROBState:
     COMMIT = 'Commit'
 
 class RegisterBank:
+    """Registradores MIPS R0..R31, indexados pelo número do registrador."""
+    NUM_REGISTERS = 32
+
     def __init__(self):
-        self.registers = {}
-        self.tags = {}
-        self.values = {}
-        
-        # Inicializar registradores MIPS
-        for i in range(32):
-            reg_name = f"R{i}"
-            self.registers[reg_name] = 0
-            self.tags[reg_name] = None
-            self.values[reg_name] = 0
-
-class TomasuloCore:
-    def __init__(self):
-        self.state_stack = []
+        self.tags = JournaledList([None] * self.NUM_REGISTERS)
+        self.values = JournaledList([0] * self.NUM_REGISTERS)
+
+    @staticmethod
+    def name(index):
+        return f"R{index}"
+
+    def get_value(self, name):
+        return self.values[parse_register(name)]
+
+    def set_value(self, name, value):
+        self.values[parse_register(name)] = value
+
+    def as_dict(self):
+        """Valores dos registradores por nome ('R0': ..., 'R1': ...)."""
+        return {self.name(i): value for i, value in enumerate(self.values)}
+
+def _make_storage(backend, rob_size=32, station_counts=None):
+    """Cria o ROB e as estações de reserva com o backend de armazenamento pedido."""
+    if backend == 'objects':
+        return ReorderBuffer(size=rob_size), ReservationStations(station_counts)
+    if backend == 'numpy':
+        # Importado sob demanda: o backend padrão não depende do NumPy
+        from simulator.components.array_storage import ArrayReorderBuffer, ArrayReservationStations
+        return ArrayReorderBuffer(size=rob_size), ArrayReservationStations(station_counts)
+    raise ValueError(f"Backend de armazenamento desconhecido: {backend!r}")
+
+class TomasuloCore(Journaled):
+    # Atributos que não fazem parte do estado dinâmico (ou que são tratados à parte) nos snapshots
+    _SNAPSHOT_EXCLUDE = frozenset({
+        'instructions', 'label_map', 'journal', '_journal', 'committed_instructions', 'branch_history',
+        'unit_types', 'machine', 'latencies', 'trace',
+    })
+
+    def __init__(self, undo_budget=None, storage=None, machine=None, history_capacity=None):
+        self.machine = machine or config.MachineConfig()
+        self._check_machine()
+        # Latência de cada opcode nesta máquina, indexada pelo opcode
+        self.latencies = tuple(self.machine.latency(spec.name) for spec in ISA)
         self.cycle = 0
         self.instructions = []
         self.current_instruction = 0
-        self.reservation_stations = ReservationStations()
-        self.rob = ReorderBuffer(size=32)
+        self.rob, self.reservation_stations = _make_storage(
+            storage or config.STORAGE_BACKEND, self.machine.rob_size, self.machine.reservation_stations)
         self.cdb = CommonDataBus()
         self.registers = RegisterBank()
-        self.bp = OneBitPredictor()
-        self.committed_instructions = []  # Lista para rastrear instruções commitadas
-        self.metrics = {
+        self.bp = self.machine.make_predictor()
+        self.committed_instructions = HistoryLog(history_capacity)  # Instruções commitadas (as mais recentes)
+        self.metrics = JournaledDict({
             'ipc': 0.0,
             'stalls': 0,
             'total_instructions': 0,
             'completed_instructions': 0,
             'bubbles': 0,
             'mispredictions': 0,
-        }
-        self.execution_units = {
-            'INT_ALU1': {'busy': False, 'cycles_remaining': 0, 'current_instruction': None},
-            'INT_ALU2': {'busy': False, 'cycles_remaining': 0, 'current_instruction': None},
-            'FP_ALU': {'busy': False, 'cycles_remaining': 0, 'current_instruction': None},
-            'FP_MUL': {'busy': False, 'cycles_remaining': 0, 'current_instruction': None},
-            'FP_DIV': {'busy': False, 'cycles_remaining': 0, 'current_instruction': None},
-            'MEM_LOAD': {'busy': False, 'cycles_remaining': 0, 'current_instruction': None},
-            'MEM_STORE': {'busy': False, 'cycles_remaining': 0, 'current_instruction': None},
-            'BRANCH': {'busy': False, 'cycles_remaining': 0, 'current_instruction': None}
-        }
-        self.memory = {}
+            'target_mispredictions': 0,  # Desvios/saltos tomados cujo alvo o front-end não tinha (ou errou)
+        })
+        # Unidades de execução: 'INT_ALU1', 'INT_ALU2', ... quando há mais de uma do mesmo tipo
+        self.execution_units = {}
+        self.unit_types = {}  # Tipo de cada unidade ('INT_ALU1' -> 'INT_ALU')
+        for unit_type, count in self.machine.execution_units.items():
+            for i in range(count):
+                name = f"{unit_type}{i + 1}" if count > 1 else unit_type
+                self.execution_units[name] = JournaledDict({'busy': False, 'cycles_remaining': 0, 'current_instruction': None})
+                self.unit_types[name] = unit_type
+        # Por tipo de unidade: unidades livres e fila de estações prontas (mais antigas primeiro)
+        self.free_units = {}
+        self.ready_queues = {}
+        for name, unit_type in self.unit_types.items():
+            self.free_units.setdefault(unit_type, JournaledList()).append(name)
+            self.ready_queues.setdefault(unit_type, JournaledList())
+        self.active_units = JournaledList()  # Unidades ocupadas, na ordem de alocação
+        self.issue_seq = 0  # Contador de instruções despachadas (define a idade de cada uma)
+        self.pending_stores = JournaledList()  # Idades (seq) dos SW ainda não commitados, em ordem
+        self.memory = JournaledDict()
         self.pc = 0
         self.branch_misprediction = False
         self.flush_needed = False
-        self.state_stack = []  # Pilha para estados anteriores
+        self.fetch_stall = 0  # Ciclos restantes sem despacho após um flush (penalidade de desvio)
         self.label_map = {} # Mapeia labels para endereços de PC
         self.flush_rob_entry_index = -1 # Guarda o índice do ROB da instrução de desvio que causou o flush
         self.misprediction_target_pc = -1 # Guarda o PC de destino correto após uma predição errada
         self.last_branch_prediction = None
-        self.branch_history = []  # Histórico de branches executados
+        self.branch_history = HistoryLog(history_capacity)  # Histórico de branches executados (os mais recentes)
+        self.completed_stations = JournaledList()  # Estações que terminaram a execução e aguardam o CDB
+        # Modo dirigido por trace (load_trace): posição no trace, entradas do ROB que vieram dele
+        # (índice do ROB -> índice do registro) e se o front-end está no caminho errado
+        self.trace = None
+        self.trace_position = 0
+        self.trace_entries = JournaledDict()
+        # Histórico global visto por cada desvio/salto no ROB (preditores com histórico)
+        self.branch_histories = JournaledDict()
+        # Front-end: BTB (None: alvos diretos conhecidos no despacho) e RAS, com o estado
+        # da RAS após cada desvio/salto no ROB (para o flush)
+        self.btb = BranchTargetBuffer(self.machine.btb_entries) if self.machine.btb_entries else None
+        self.ras = ReturnAddressStack(self.machine.ras_entries)
+        self.ras_checkpoints = JournaledDict()
+        self.wrong_path = False
+        self.journal = UndoJournal(undo_budget)  # Histórico para o "Voltar"
+        self._attach_journal()
+
+    def _check_machine(self):
+        """Verifica se a máquina tem estações, unidades e latência para todas as instruções da ISA."""
+        for spec in ISA:
+            if not self.machine.reservation_stations.get(spec.rs_type):
+                raise ValueError(f"A máquina não tem estações do tipo {spec.rs_type!r} (usadas por {spec.name})")
+            if not self.machine.execution_units.get(spec.unit):
+                raise ValueError(f"A máquina não tem unidades do tipo {spec.unit!r} (usadas por {spec.name})")
+            if spec.name not in self.machine.instruction_latencies:
+                raise ValueError(f"A máquina não define a latência de {spec.name}")
+
+    def _attach_journal(self):
+        """Liga ao journal todos os objetos cujo estado muda durante um ciclo."""
+        self.journal.attach(
+            self, *self.rob.journaled_objects(), *self.reservation_stations.journaled_objects(),
+            self.cdb, self.cdb.waiting, *self.bp.journaled_objects(),
+            self.registers.values, self.registers.tags, self.memory, self.metrics,
+            *self.execution_units.values(), self.committed_instructions, self.branch_history,
+            self.completed_stations, self.active_units, self.pending_stores, self.trace_entries, self.branch_histories,
+            *(self.btb.journaled_objects() if self.btb else ()), *self.ras.journaled_objects(), self.ras_checkpoints,
+            *self.free_units.values(), *self.ready_queues.values(),
+        )
 
     def save_state(self):
-        # Salva uma cópia profunda do estado atual
-        state = {
-            'cycle': self.cycle,
-            'instructions': copy.deepcopy(self.instructions),
-            'current_instruction': self.current_instruction,
-            'reservation_stations': copy.deepcopy(self.reservation_stations),
-            'rob': copy.deepcopy(self.rob),
-            'registers': copy.deepcopy(self.registers),
-            'committed_instructions': copy.deepcopy(self.committed_instructions),
-            'pc': self.pc,
-            'flush_needed': self.flush_needed,
-            # Adicione outros componentes se necessário
-        }
-        self.state_stack.append(state)
+        """Abre no journal o registro do ciclo que vai começar."""
+        self.journal.begin()
 
     def restore_state(self):
-        if self.state_stack:
-            state = self.state_stack.pop()
-            self.cycle = state['cycle']
-            self.instructions = copy.deepcopy(state['instructions'])
-            self.current_instruction = state['current_instruction']
-            self.reservation_stations = copy.deepcopy(state['reservation_stations'])
-            self.rob = copy.deepcopy(state['rob'])
-            self.registers = copy.deepcopy(state['registers'])
-            self.committed_instructions = copy.deepcopy(state['committed_instructions'])
-            self.pc = state['pc']
-            self.flush_needed = state['flush_needed']
+        """Volta um ciclo, desfazendo as escritas registradas no journal."""
+        return self.journal.undo()
+
+    def snapshot(self):
+        """Retorna uma cópia completa do estado dinâmico do núcleo.
+
+        As instruções do programa são compartilhadas (não mudam durante a
+        simulação) e os históricos de commits e desvios, que só crescem, são
+        representados apenas pelos seus tamanhos.
+        """
+        memo = {id(instruction): instruction for instruction in self.instructions}
+        state = {key: value for key, value in self.__dict__.items() if key not in self._SNAPSHOT_EXCLUDE}
+        return {
+            'state': copy.deepcopy(state, memo),
+            'committed_len': len(self.committed_instructions),
+            'branch_len': len(self.branch_history),
+        }
+
+    def restore_snapshot(self, snapshot):
+        """Restaura um estado obtido com snapshot(). O snapshot pode ser reutilizado."""
+        memo = {id(instruction): instruction for instruction in self.instructions}
+        for key, value in copy.deepcopy(snapshot['state'], memo).items():
+            object.__setattr__(self, key, value)
+        self.committed_instructions.truncate(snapshot['committed_len'])
+        self.branch_history.truncate(snapshot['branch_len'])
+        self.journal.clear()
 
     def load_program(self, program_text):
         """Carrega um programa MIPS, mapeando labels primeiro."""
+        self.journal.clear()
+        self.trace = None
         self.instructions = []
         self.label_map = {}
-        self.committed_instructions = []  # Limpar instruções commitadas
-        lines = program_text.strip().split('\n')
-        
-        # Primeiro passo: Mapear todas as labels para seus PCs
-        current_pc = 0
-        parsed_lines = []
-        for line in lines:
-            clean_line = line.strip()
-            if not clean_line or clean_line.startswith('#'):
-                continue
-            
-            if ':' in clean_line:
-                label, rest_of_line = clean_line.split(':', 1)
-                self.label_map[label.strip()] = current_pc
-                clean_line = rest_of_line.strip()
-            
-            if clean_line:
-                parsed_lines.append(clean_line)
-                current_pc += 1
-
-        # Segundo passo: Parsear as instruções
-        for pc, line in enumerate(parsed_lines):
-            instruction = parse_instruction(line)
-            if instruction:
-                instruction['pc'] = pc
-                # Resolver o alvo do branch para um PC
-                if instruction['type'] == 'BRANCH':
-                    label = instruction['operands'][2]
-                    if label in self.label_map:
-                        instruction['target_pc'] = self.label_map[label]
-                    else:
-                        # Tratar erro de label não encontrada se necessário
-                        instruction['target_pc'] = -1 # Indicador de erro
-                self.instructions.append(instruction)
+        self.committed_instructions.clear()  # Limpar instruções commitadas
+        # Um erro de decodificação (ValueError) deixa o programa vazio
+        instructions, self.label_map = parse_program(program_text)
+        for instruction in instructions:
+            instruction.latency = self.latencies[instruction.opcode]
+        self.instructions = instructions
 
         self.metrics['total_instructions'] = len(self.instructions)
 
+    def stream_history(self, directory, batch_size=None):
+        """Passa a gravar os históricos completos em disco (commits.jsonl e branches.jsonl em `directory`).
+
+        A memória continua guardando só os registros mais recentes; o
+        histórico inteiro pode ser percorrido com `iter_all()`. As instruções
+        são gravadas pelo PC e reconstruídas a partir do programa carregado.
+        """
+        logs = ((self.committed_instructions, 'commits.jsonl'), (self.branch_history, 'branches.jsonl'))
+        if any(log.first for log, _ in logs):
+            raise ValueError("Parte do histórico já saiu da memória: ligue a gravação antes da simulação")
+        os.makedirs(directory, exist_ok=True)
+        for log, name in logs:
+            log.close()
+            log.sink = HistorySink(os.path.join(directory, name), batch_size,
+                                   self._encode_history_record, self._decode_history_record)
+            for record in log:
+                log.sink.append(record)
+
+    def close_history(self):
+        """Grava os registros pendentes e fecha os arquivos dos históricos."""
+        self.committed_instructions.close()
+        self.branch_history.close()
+
+    @staticmethod
+    def _encode_history_record(record):
+        return dict(record, instruction=record['instruction'].pc)
+
+    def _decode_history_record(self, record):
+        return dict(record, instruction=self.instructions[record['instruction']])
+
+    def load_trace(self, trace):
+        """Carrega um trace (simulator.trace) para uma simulação só de tempo.
+
+        As instruções seguem o caminho gravado: o resultado dos desvios e os
+        endereços de memória vêm do trace e nenhum valor é calculado (os
+        registradores e a memória não são atualizados). Após uma predição
+        errada, o front-end continua buscando o caminho errado no programa
+        até o flush. Sem valores, os desvios e saltos do caminho errado seguem
+        a predição: treinam o preditor e o BTB com a direção e o alvo previstos
+        e nunca causam flush. Os ciclos só diferem dos da simulação normal
+        quando algum deles seria resolvido de outro jeito lá.
+        """
+        self.load_program(trace.program)
+        self.trace = trace
+        self.trace_position = 0
+        self.wrong_path = False
+
+    def _can_fetch(self):
+        """Há instrução a buscar: no modo trace, no caminho gravado (ou no caminho errado do programa)."""
+        if self.trace is None or self.wrong_path:
+            return 0 <= self.pc < len(self.instructions)
+        return self.trace_position < len(self.trace)
+
     def cycle_step(self):
-        self.save_state() 
+        self.save_state()
+        try:
+            return self._cycle()
+        finally:
+            self.journal.end()
+
+    def event_step(self, max_cycles=None):
+        """Como cycle_step(), mas antes salta os ciclos ociosos até o próximo evento.
+
+        Um ciclo é ocioso quando nenhuma instrução muda de estágio: as
+        unidades só decrementam suas contagens, o front-end só cumpre a
+        penalidade de desvio (ou está parado por falta de ROB/estação) e não
+        há nada a commitar, selecionar ou difundir no CDB. Esses ciclos são
+        aplicados de uma vez, com os mesmos efeitos nas métricas, e o ciclo
+        seguinte (o do evento: fim de uma execução ou da penalidade) é
+        simulado normalmente. O resultado é idêntico ao de cycle_step();
+        o "Voltar" desfaz o salto e o ciclo do evento juntos. Com
+        `max_cycles`, o salto não passa desse ciclo.
+        """
+        self.save_state()
+        try:
+            idle = self._idle_cycles()
+            if max_cycles is not None:
+                idle = min(idle, max_cycles - self.cycle - 1)
+            if idle > 0:
+                self._skip_cycles(idle)
+            return self._cycle()
+        finally:
+            self.journal.end()
+
+    def _idle_cycles(self):
+        """Número de ciclos a partir do atual em que só contadores avançam (0 se algo muda já neste ciclo)."""
+        if self.flush_needed or self.completed_stations or not self._has_work_to_do():
+            return 0
+        head = self.rob.entries[self.rob.head]
+        if head.state != 'Empty' and head.ready:
+            return 0  # Há o que commitar
+        for unit_type, queue in self.ready_queues.items():
+            if queue and self.free_units[unit_type]:
+                seq, rs = queue[0]
+                if not (IS_LOAD[rs.op] and self.pending_stores and self.pending_stores[0] < seq):
+                    return 0  # Uma estação pronta começa a executar
+        # Próximo evento: o último ciclo da execução mais curta em andamento ou o fim da penalidade
+        events = []
+        for unit in self.active_units:
+            rs = self.execution_units[unit]['current_instruction']
+            if self.rob.entries[rs.dest].state != 'Executing':
+                return 0
+            events.append(rs.cycles_remaining - 1)
+        if self.fetch_stall:
+            events.append(self.fetch_stall)
+        elif self._can_fetch() and not self._issue_blocked():
+            return 0
+        return min(events, default=0)
+
+    def _issue_blocked(self):
+        """O despacho da próxima instrução está parado por falta de espaço no ROB ou de estação livre."""
+        return self.rob.is_full() or not self.reservation_stations.free[self.instructions[self.pc].rs_type]
+
+    def _skip_cycles(self, count):
+        """Aplica `count` ciclos ociosos (ver _idle_cycles) de uma vez."""
+        for unit in self.active_units:
+            self.execution_units[unit]['current_instruction'].cycles_remaining -= count
+        if self.fetch_stall:
+            self.fetch_stall -= count
+            if self._can_fetch():
+                self.metrics['bubbles'] += count
+        elif self._can_fetch():
+            self.metrics['stalls'] += count  # ROB ou estações cheios a cada ciclo
+        self.cycle += count
+        self._update_metrics()
+
+    def _cycle(self):
+        """Executa as fases de um ciclo. Retorna False se não há mais trabalho."""
         if not self._has_work_to_do():
             return False
 
         if self.flush_needed:
             self._flush_pipeline()
             self.flush_needed = False
+            # O ciclo do flush conta como o primeiro ciclo da penalidade
+            self.metrics['bubbles'] += 1
+            self.fetch_stall = self.machine.branch_penalty - 1
             self.cycle += 1
             self._update_metrics()
             return True
@@ -161,112 +347,80 @@ class TomasuloCore:
     def _has_work_to_do(self):
         """Verifica se ainda há trabalho para fazer"""
         # Se o pipeline foi limpo, pode haver instruções no ROB para cometer
-        # mas o PC pode já ter chegado ao fim.
-        if self.pc < len(self.instructions):
-            return True
-            
-        # Verificar se há instruções pendentes no ROB
-        for entry in self.rob.entries:
-            if entry.state != 'Empty':
-                return True
-                
-        # Verificar se há estações de reserva ocupadas
-        for rs_type, stations in self.reservation_stations.stations.items():
-            for rs in stations:
-                if rs.busy:
-                    return True
-                    
-        return False
+        # mas o PC pode já ter chegado ao fim. As ocupações do ROB e das
+        # estações são mantidas incrementalmente, então a verificação é O(1).
+        return (self._can_fetch() or self.rob.count > 0
+                or self.reservation_stations.busy_count > 0)
     
     def _issue(self):
-        """Fase de despacho de instruções (superescalar: até 2 por ciclo, para no branch ou falta de recursos)"""
+        """Fase de despacho de instruções (superescalar: até `machine.issue_width` por ciclo, para no branch ou falta de recursos)"""
         if self.flush_needed:
             return
+        if self.fetch_stall:
+            # Penalidade de desvio: o front-end ainda está sendo redirecionado
+            self.fetch_stall -= 1
+            if self._can_fetch():
+                self.metrics['bubbles'] += 1
+            return
         instructions_issued = 0
-        max_issue_per_cycle = 2 # Grau de superescalar
-        while self.pc < len(self.instructions) and instructions_issued < max_issue_per_cycle:
-            if self.rob.entries[self.rob.tail].state != 'Empty':
+        max_issue_per_cycle = self.machine.issue_width # Grau de superescalar
+        while self._can_fetch() and instructions_issued < max_issue_per_cycle:
+            if self.rob.is_full():
                 self.metrics['stalls'] += 1 # Stall por falta de espaço no ROB
                 break
             instruction = self.instructions[self.pc]
-            rs_type = self._get_rs_type(instruction['type'])
-            available_rs = self._find_available_rs(rs_type)
+            available_rs = self.reservation_stations.allocate(instruction.rs_type, self.rob.tail)
             if available_rs:
-                rob_entry_idx = self.rob.tail
+                rob_entry_idx = self.rob.allocate()
                 rob_entry = self.rob.entries[rob_entry_idx]
                 # Preencher a entrada do ROB
                 rob_entry.state = 'Issued'
                 rob_entry.instruction = instruction
-                rob_entry.pc = instruction['pc']
-                # Lógica de desvio
-                is_branch = instruction['type'] == 'BRANCH'
+                rob_entry.issue_cycle = self.cycle
+                rob_entry.pc = instruction.pc
+                # Lógica de desvio: direção e alvo previstos no front-end
+                is_control = instruction.is_branch or instruction.is_jump
                 predicted_taken = False
-                if is_branch:
-                    predicted_taken = self.bp.predict(instruction['pc'])
-                    rob_entry.destination = rob_entry_idx
+                if is_control:
+                    predicted_taken, predicted_target = self._predict_control(instruction, rob_entry_idx)
                     rob_entry.predicted_taken = predicted_taken
-                    rob_entry.target_pc = instruction.get('target_pc', -1)
-                else:
-                    rob_entry.destination = instruction['operands'][0]
-                # Renomeação de registradores e captura de operandos
+                    rob_entry.target_pc = predicted_target
+                if self.trace is not None and not self.wrong_path:
+                    self.trace_entries[rob_entry_idx] = self.trace_position
+                    if is_control and self._trace_next_pc(instruction) != (
+                            predicted_target if predicted_taken else instruction.pc + 1):
+                        self.wrong_path = True  # As próximas instruções são do caminho errado
+                    self.trace_position += 1
+                rob_entry.destination = instruction.rd
+                # Captura de operandos (registradores já decodificados em índices)
                 rs = available_rs
-                rs.busy = True
-                rs.op = instruction['opcode']
-                rs.dest = rob_entry_idx
-                dest_reg = None
-                if not is_branch:
-                    dest_reg = instruction['operands'][0]
-                    rob_entry.old_tag = self.registers.tags.get(dest_reg)
-                # Lógica de operandos CORRIGIDA e REFINADA
-                op = instruction['opcode']
-                ops = instruction['operands']
-                src1_reg, src2_reg, immediate = None, None, None
-                # Identificar operandos fonte com base no formato da instrução MIPS
-                if op in ['ADD', 'SUB', 'MUL', 'DIV']:
-                    src1_reg, src2_reg = ops[1], ops[2]
-                elif op in ['ADDI']:
-                    src1_reg, immediate = ops[1], int(ops[2])
-                elif op in ['LW', 'SW']:
-                    src1_reg, immediate = ops[1], int(ops[2])
-                elif op in ['BEQ', 'BNE']:
-                    src1_reg, src2_reg = ops[0], ops[1]
-                # Preencher Vj e Qj (Primeiro operando fonte)
-                if src1_reg:
-                    tag = self.registers.tags.get(src1_reg)
-                    if tag is None:
-                        rs.vj = self.registers.values.get(src1_reg, 0)
-                        rs.qj = None
-                    else:
-                        rob_dep_entry = self.rob.entries[tag]
-                        if rob_dep_entry.ready:
-                            rs.vj = rob_dep_entry.value
-                            rs.qj = None
-                        else:
-                            rs.qj = tag
-                # Preencher Vk e Qk (Segundo operando fonte ou imediato)
-                if src2_reg:
-                    tag = self.registers.tags.get(src2_reg)
-                    if tag is None:
-                        rs.vk = self.registers.values.get(src2_reg, 0)
-                        rs.qk = None
-                    else:
-                        rob_dep_entry = self.rob.entries[tag]
-                        if rob_dep_entry.ready:
-                            rs.vk = rob_dep_entry.value
-                            rs.qk = None
-                        else:
-                            rs.qk = tag
-                elif immediate is not None:
-                    rs.vk = immediate
-                    rs.qk = None
-                rs.cycles_remaining = self._get_latency(instruction['opcode'])
-                if not is_branch and dest_reg:
-                    self.registers.tags[dest_reg] = rob_entry_idx
-                self.rob.tail = (self.rob.tail + 1) % len(self.rob.entries)
+                rs.op = instruction.opcode
+                rs.seq = self.issue_seq
+                self.issue_seq += 1
+                if instruction.rs1 is not None:
+                    rs.vj, rs.qj = self._read_register(instruction.rs1)
+                    if rs.qj is not None:
+                        self.cdb.subscribe(rs.qj, rs, 'j')
+                if instruction.rs2 is not None:
+                    rs.vk, rs.qk = self._read_register(instruction.rs2)
+                    if rs.qk is not None:
+                        self.cdb.subscribe(rs.qk, rs, 'k')
+                else:
+                    rs.vk = instruction.imm
+                rs.a = instruction.offset
+                rs.cycles_remaining = instruction.latency
+                if instruction.is_store:
+                    self.pending_stores.append(rs.seq)
+                if rs.qj is None and rs.qk is None:
+                    self._push_ready(rs)
+                # Renomeação do registrador de destino
+                if instruction.rd is not None:
+                    rob_entry.old_tag = self.registers.tags[instruction.rd]
+                    self.registers.tags[instruction.rd] = rob_entry_idx
                 instructions_issued += 1
                 # Atualizar PC para a próxima instrução (especulativamente)
-                if is_branch and predicted_taken:
-                    self.pc = rob_entry.target_pc
+                if predicted_taken:
+                    self.pc = predicted_target
                     break # Para no branch
                 else:
                     self.pc += 1
@@ -274,27 +428,81 @@ class TomasuloCore:
                 self.metrics['stalls'] += 1 # Stall por falta de ER
                 break # Não há estação de reserva, parar de emitir
 
+    def _predict_control(self, instruction, rob_index):
+        """Previsão do front-end para um desvio ou salto: (tomado, alvo).
+
+        A direção dos desvios vem do preditor e a dos saltos é sempre
+        "tomado". O alvo vem da RAS (retornos, JR R31), do BTB ou, sem BTB,
+        da própria instrução (alvos diretos). Sem alvo, a busca segue em pc + 1.
+        """
+        history = self.bp.checkpoint()
+        if history is not None:
+            self.branch_histories[rob_index] = history
+        taken = self.bp.predict(instruction.pc) if instruction.is_branch else True
+        target = None
+        if instruction.is_indirect and instruction.rs1 == LINK_REGISTER:
+            target = self.ras.pop()
+        if target is None:
+            if self.btb is not None:
+                target = self.btb.lookup(instruction.pc)
+            elif not instruction.is_indirect:
+                target = instruction.target_pc
+        if instruction.is_jump and instruction.rd == LINK_REGISTER:
+            self.ras.push(instruction.pc + 1)  # JAL
+        if target is None:
+            taken = False
+        if instruction.is_branch:
+            self.bp.speculate(taken)
+        if self.ras.entries:
+            self.ras_checkpoints[rob_index] = self.ras.checkpoint()
+        return taken, -1 if target is None else target
+
+    def _trace_next_pc(self, instruction):
+        """No modo trace, o PC seguinte ao desvio/salto da posição atual no caminho gravado."""
+        position = self.trace_position
+        if instruction.is_branch and not self.trace.taken[position]:
+            return instruction.pc + 1
+        return self.trace.address[position] if instruction.is_indirect else instruction.target_pc
+
+    def _read_register(self, reg):
+        """Retorna (valor, None) se o registrador está disponível ou (None, tag) do ROB que o produzirá."""
+        tag = self.registers.tags[reg]
+        if tag is None:
+            return self.registers.values[reg], None
+        rob_dep_entry = self.rob.entries[tag]
+        if rob_dep_entry.ready:
+            return rob_dep_entry.value, None
+        return None, tag
+
+    def _push_ready(self, rs):
+        """Coloca uma estação com todos os operandos prontos na fila do seu tipo de unidade."""
+        insort(self.ready_queues[UNIT_TYPES[rs.op]], (rs.seq, rs))
+
     def _execute(self):
         """Fase de execução das instruções prontas de forma superescalar."""
-        for rs in self.reservation_stations.stations['INT'] + self.reservation_stations.stations['FP'] + self.reservation_stations.stations['MEM']:
-            # Condição para executar: pronta e não já alocada a uma unidade
-            if rs.busy and rs.qj is None and rs.qk is None:
-                is_already_processing = any(unit['current_instruction'] is rs for unit in self.execution_units.values())
+        # Seleção: cada fila entrega suas estações mais antigas às unidades livres do mesmo tipo
+        for unit_type, queue in self.ready_queues.items():
+            free_units = self.free_units[unit_type]
+            while queue and free_units:
+                seq, rs = queue[0]
+                # Loads esperam o commit de todos os stores mais antigos (a memória só muda no commit)
+                if IS_LOAD[rs.op] and self.pending_stores and self.pending_stores[0] < seq:
+                    break
+                queue.pop(0)
+                unit_name = free_units.pop(0)
+                unit_state = self.execution_units[unit_name]
+                unit_state['busy'] = True
+                unit_state['current_instruction'] = rs
+                self.active_units.append(unit_name)
+                # Assim que a instrução começa a executar, mude para 'Executing'
                 rob_entry = self.rob.entries[rs.dest]
-                if not is_already_processing:
-                    # Encontra uma unidade de execução livre do tipo correto
-                    unit_type_needed = self._get_execution_unit_type(rs.op)
-                    for unit_name, unit_state in self.execution_units.items():
-                        if unit_name.startswith(unit_type_needed) and not unit_state['busy']:
-                            unit_state['busy'] = True
-                            unit_state['current_instruction'] = rs
-                            # Assim que a instrução começa a executar, mude para 'Executing'
-                            if rob_entry.state == 'Issued':
-                                rob_entry.state = 'Executing'
-                            break # Alocou, passa para a próxima ER
-
-        # Decrementar contadores e finalizar execução para TODAS as unidades em paralelo
-        for unit, state in self.execution_units.items():
+                rob_entry.execute_cycle = self.cycle
+                if rob_entry.state == 'Issued':
+                    rob_entry.state = 'Executing'
+
+        # Decrementar contadores e finalizar execução das unidades ocupadas, em paralelo
+        for unit in list(self.active_units):
+            state = self.execution_units[unit]
             if state['busy'] and state['current_instruction'] is not None:
                 rs = state['current_instruction']
                 rob_entry = self.rob.entries[rs.dest]
@@ -302,82 +510,117 @@ class TomasuloCore:
                     # Primeiro ciclo após despacho: só muda para Executing
                     rob_entry.state = 'Executing'
                 elif rob_entry.state == 'Executing':
-                    # Segundo ciclo: executa e vai para Writeback
-                    result = self._execute_instruction(rs.op, rs.vj, rs.vk)
-                    if rob_entry.instruction and rob_entry.instruction['type'] == 'BRANCH':
-                        predicted = self.bp.predict(rob_entry.pc)
-                        actual_taken = bool(result)
-                        rob_entry.actual_outcome = actual_taken
-                        self.branch_history.append({
-                            'pc': rob_entry.pc,
-                            'predicted': predicted,
-                            'actual': actual_taken,
-                            'opcode': rob_entry.instruction['opcode'],
-                            'operands': rob_entry.instruction['operands']
-                        })
-                        self.last_branch_prediction = {
-                            'pc': rob_entry.pc,
-                            'predicted_taken': predicted,
-                            'opcode': rob_entry.instruction['opcode'],
-                            'operands': rob_entry.instruction['operands']
-                        }
-                        self.bp.update(rob_entry.pc, actual_taken)
-                        if rob_entry.predicted_taken != actual_taken:
-                            self.metrics['mispredictions'] += 1
-                            # Conta bolhas apenas quando predição foi "não desvio" mas na verdade aconteceu o desvio
-                            if not rob_entry.predicted_taken and actual_taken:
-                                self.metrics['bubbles'] += 2  # 2 bolhas por predição incorreta de "não desvio"
-                            self.flush_needed = True
-                            self.flush_rob_entry_index = rs.dest
-                            if actual_taken:
-                                self.misprediction_target_pc = rob_entry.target_pc
-                            else:
-                                self.misprediction_target_pc = rob_entry.pc + 1
+                    # A unidade fica ocupada pela latência da instrução; no último ciclo executa
+                    rs.cycles_remaining -= 1
+                    if rs.cycles_remaining > 0:
+                        continue
+                    instruction = rob_entry.instruction
+                    if self.trace is not None:
+                        result = self._trace_result(rs.dest, rob_entry)
+                    else:
+                        # Despacho direto pela tabela da ISA (loads/stores: endereço efetivo)
+                        result = SEMANTICS[rs.op](rs.vj, rs.vk, rs.a)
+                        if instruction.is_load:
+                            result = self.memory.get(result, 0)
+                        elif instruction.is_store:
+                            # O endereço efetivo fica no destino do ROB; a memória só é escrita no commit
+                            rob_entry.destination = result
+                            result = rs.vk
+                    if instruction.is_branch or instruction.is_jump:
+                        self._resolve_control(rs.dest, rob_entry, instruction, result)
                     rs.result = result
                     rs.ready = True
-                    state['busy'] = False
-                    state['current_instruction'] = None
-
-    def _execute_memory_operations(self):
-        """Executa operações de memória em paralelo"""
-        # Buscar instruções de memória prontas para execução
-        for rs_type, stations in self.reservation_stations.stations.items():
-            for rs in stations:
-                if (rs.busy and rs.qj is None and rs.qk is None and rs.op in ['LW', 'SW']):
-                    rob_entry = self.rob.entries[rs.dest]
-                    if rob_entry.state == 'Issued':
-                        rob_entry.state = 'Executing'
-                    elif rob_entry.state == 'Executing':
-                        if rs.op == 'LW':
-                            result = self.memory.get(rs.vj, 0)
-                        else:
-                            self.memory[rs.vj] = rs.vk
-                            result = rs.vk
-                        rs.result = int(result) if result is not None else 0
-                        rs.ready = True
+                    self.completed_stations.append(rs)
+                    self._release_unit(unit)
+
+    def _resolve_control(self, rob_index, rob_entry, instruction, result):
+        """Resolve um desvio ou salto: treina preditor e BTB e pede o flush se a direção ou o alvo previstos erraram."""
+        if instruction.is_branch:
+            predicted = rob_entry.predicted_taken  # Previsão feita no despacho
+            actual_taken = bool(result)
+            self.branch_history.append({
+                'pc': rob_entry.pc,
+                'predicted': predicted,
+                'actual': actual_taken,
+                'instruction': instruction,
+                'cycle': self.cycle,
+            })
+            self.last_branch_prediction = {
+                'pc': rob_entry.pc,
+                'predicted_taken': predicted,
+                'instruction': instruction
+            }
+            self.bp.update(rob_entry.pc, actual_taken, self.branch_histories.get(rob_index))
+        else:
+            actual_taken = True
+        rob_entry.actual_outcome = actual_taken
+        if self.trace is not None and rob_index not in self.trace_entries:
+            # Caminho errado do modo trace: sem valores, o desvio segue a predição (direção e alvo)
+            # e nunca causa flush; o BTB é treinado como se ela estivesse certa
+            if rob_entry.predicted_taken and self.btb is not None:
+                self.btb.update(rob_entry.pc, rob_entry.target_pc)
+            return
+        target = result if instruction.is_indirect else instruction.target_pc
+        if actual_taken and self.btb is not None:
+            self.btb.update(rob_entry.pc, target)
+        if rob_entry.predicted_taken == actual_taken and (not actual_taken or rob_entry.target_pc == target):
+            return
+        self.metrics['mispredictions'] += 1
+        if actual_taken and rob_entry.target_pc != target:
+            self.metrics['target_mispredictions'] += 1
+        if not self.flush_needed or self.rob.age(rob_index) < self.rob.age(self.flush_rob_entry_index):
+            # Se dois desvios errarem no mesmo ciclo, vale o flush do mais antigo
+            self.flush_needed = True
+            self.flush_rob_entry_index = rob_index
+            self.misprediction_target_pc = target if actual_taken else rob_entry.pc + 1
+
+    def _trace_result(self, rob_index, rob_entry):
+        """No modo trace, o "resultado" vem do registro: 1/0 para desvios e nada para as demais instruções."""
+        record = self.trace_entries.get(rob_index)
+        instruction = rob_entry.instruction
+        if record is None:
+            # Caminho errado: não há registro; o desvio segue a predição e nunca causa flush
+            return int(rob_entry.predicted_taken) if instruction.is_branch else 0
+        if instruction.is_branch:
+            return self.trace.taken[record]
+        if instruction.is_indirect:
+            return self.trace.address[record]  # Alvo do JR
+        if instruction.is_store:
+            rob_entry.destination = self.trace.address[record]
+        return 0
+
+    def _release_unit(self, unit):
+        """Libera uma unidade de execução, devolvendo-a à lista de livres do seu tipo."""
+        state = self.execution_units[unit]
+        state['busy'] = False
+        state['current_instruction'] = None
+        self.active_units.remove(unit)
+        self.free_units[self.unit_types[unit]].append(unit)
 
     def _write_result(self):
         """Fase de escrita de resultados"""
-        for rs_type, stations in self.reservation_stations.stations.items():
-            for rs in stations:
-                if rs.busy and rs.ready:
-                    # Não libere a estação aqui. Apenas marque o ROB como pronto.
-                    self.cdb.broadcast(rs.result, rs.dest)
-                    self._update_waiting_stations(rs.dest, rs.result)
-                    
-                    if rs.dest is not None:
-                        rob_entry = self.rob.entries[rs.dest]
-                        rob_entry.value = rs.result
-                        rob_entry.ready = True
-                        rob_entry.state = 'Writeback'
-                    
-                    # A estação permanece ocupada até o commit
-                    rs.ready = False # Previne re-broadcast no próximo ciclo
+        for rs in self.completed_stations:
+            if rs.busy and rs.ready:
+                # Não libere a estação aqui. Apenas marque o ROB como pronto.
+                # O CDB acorda somente as estações que esperam por esta tag.
+                for woken in self.cdb.broadcast(rs.result, rs.dest):
+                    self._push_ready(woken)
+
+                if rs.dest is not None:
+                    rob_entry = self.rob.entries[rs.dest]
+                    rob_entry.value = rs.result
+                    rob_entry.ready = True
+                    rob_entry.state = 'Writeback'
+                    rob_entry.write_cycle = self.cycle
+
+                # A estação permanece ocupada até o commit
+                rs.ready = False # Previne re-broadcast no próximo ciclo
+        self.completed_stations.clear()
 
     def _commit(self):
-        """Confirma até 4 instruções por ciclo."""
+        """Confirma até `machine.commit_width` instruções por ciclo."""
         commit_count = 0
-        max_commit_per_cycle = 4
+        max_commit_per_cycle = self.machine.commit_width
 
         while commit_count < max_commit_per_cycle:
             rob_entry = self.rob.entries[self.rob.head]
@@ -386,175 +629,116 @@ class TomasuloCore:
                 break
 
             if rob_entry.ready and rob_entry.instruction:
+                instruction = rob_entry.instruction
                 # Adicionar instrução à lista de commitadas
                 committed_inst = {
-                    'instruction': rob_entry.instruction,
+                    'instruction': instruction,
                     'cycle_committed': self.cycle,
                     'rob_index': self.rob.head,
                     'destination': rob_entry.destination,
-                    'value': rob_entry.value
+                    'value': rob_entry.value,
+                    # Ciclos dos estágios anteriores (gráfico do pipeline)
+                    'cycle_issued': rob_entry.issue_cycle,
+                    'cycle_executed': rob_entry.execute_cycle,
+                    'cycle_written': rob_entry.write_cycle,
+                    'cycle_flushed': rob_entry.flush_cycle,
                 }
                 self.committed_instructions.append(committed_inst)
-                
-                if rob_entry.instruction['type'] != 'BRANCH':
-                    dest_reg = rob_entry.destination
-                    if isinstance(dest_reg, str) and self.registers.tags.get(dest_reg) == self.rob.head:
-                        self.registers.values[dest_reg] = rob_entry.value
-                        self.registers.tags[dest_reg] = None
-                
-                # Para SW, atualiza a memória aqui
-                if rob_entry.instruction['opcode'] == 'SW':
-                    addr = rob_entry.value # Endereço calculado na fase de execução
-                    val_reg = rob_entry.instruction['operands'][0]
-                    # O valor a ser escrito vem do registrador de origem, que já deve estar pronto no ROB
-                    # Esta lógica pode precisar de refinamento, dependendo de como os valores dos operandos de SW são tratados
-                    # No momento, vamos assumir que o valor está em `vj` da RS, mas isso não é passado para o ROB.
-                    # Por simplicidade, vamos pular a atualização real da memória por enquanto.
-                    pass
+
+                if self.trace is not None:
+                    # Modo trace: só o tempo é simulado, nenhum valor é escrito
+                    self.trace_entries.pop(self.rob.head, None)
+                    if instruction.is_store:
+                        self.pending_stores.pop(0)
+                    elif instruction.rd is not None and self.registers.tags[instruction.rd] == self.rob.head:
+                        self.registers.tags[instruction.rd] = None
+                elif instruction.is_store:
+                    # Para SW, o valor (Vk) é gravado no endereço calculado na execução
+                    self.memory[rob_entry.destination] = rob_entry.value
+                    self.pending_stores.pop(0)
+                elif instruction.rd is not None:
+                    # O valor arquitetural é sempre atualizado; o tag só é limpo se
+                    # nenhuma instrução mais nova renomeou o registrador
+                    self.registers.values[instruction.rd] = rob_entry.value
+                    if self.registers.tags[instruction.rd] == self.rob.head:
+                        self.registers.tags[instruction.rd] = None
 
                 # Agora, libere a estação de reserva associada a esta entrada do ROB
-                for stations in self.reservation_stations.stations.values():
-                    for rs in stations:
-                        if rs.dest == self.rob.head:
-                            rs.reset() # Reseta a estação para o estado inicial
-                            break
-                
+                rs = self.reservation_stations.by_rob.get(self.rob.head)
+                if rs is not None:
+                    self.reservation_stations.release(rs)
+
                 self.metrics['completed_instructions'] += 1
-                rob_entry.__init__() # Reseta a entrada do ROB para 'Empty'
-                self.rob.head = (self.rob.head + 1) % len(self.rob.entries)
+                self.rob.retire()
                 commit_count += 1
             else:
                 break
 
-    def _execute_instruction(self, opcode, vj, vk):
-        """Executa uma instrução e retorna o resultado"""
-        # Verificar se os operandos são válidos
-        if vj is None or vk is None:
-            return 0
-            
-        # Instruções aritméticas básicas
-        if opcode == 'ADD':
-            return vj + vk
-        elif opcode == 'SUB':
-            return vj - vk
-        elif opcode == 'MUL':
-            return vj * vk
-        elif opcode == 'DIV':
-            return vj // vk if vk != 0 else 0
-            
-        # Instruções de imediato
-        elif opcode == 'ADDI':
-            return vj + vk  # vk é o valor imediato
-            
-        # Instruções de memória
-        elif opcode == 'LW':
-            return self.memory.get(vj, 0)
-        elif opcode == 'SW':
-            self.memory[vj] = vk
-            return vk
-            
-        # Instruções de branch
-        elif opcode == 'BEQ':
-            return 1 if vj == vk else 0
-        elif opcode == 'BNE':
-            return 1 if vj != vk else 0
-            
-        return 0
-
-    def _get_rs_type(self, instruction_type):
-        """Retorna o tipo de estação de reserva para o tipo de instrução"""
-        if instruction_type in ['INT']:
-            return 'INT'
-        elif instruction_type in ['FP']:
-            return 'FP'
-        elif instruction_type in ['MEM']:
-            return 'MEM'
-        else:
-            return 'INT'  # Default
-
-    def _find_available_rs(self, rs_type):
-        """Encontra uma estação de reserva disponível"""
-        for rs in self.reservation_stations.stations[rs_type]:
-            if not rs.busy:
-                return rs
-        return None
-
-    def _get_latency(self, opcode):
-        """Retorna a latência de uma instrução"""
-        latencies = {
-            # Instruções aritméticas básicas
-            'ADD': 2, 'SUB': 2, 'MUL': 2, 'DIV': 2,
-            # Instruções de imediato
-            'ADDI': 2,
-            # Instruções de memória
-            'LW': 2, 'SW': 2,
-            # Instruções de branch
-            'BEQ': 2, 'BNE': 2
-        }
-        return latencies.get(opcode, 2)
-
-    def _update_waiting_stations(self, tag, value):
-        """Atualiza estações de reserva que esperam por um resultado"""
-        for rs_type, stations in self.reservation_stations.stations.items():
-            for rs in stations:
-                if rs.busy:
-                    if rs.qj == tag:
-                        rs.vj = value
-                        rs.qj = None
-                    if rs.qk == tag:
-                        rs.vk = value
-                        rs.qk = None
-
     def _flush_pipeline(self):
         """Limpa o pipeline após uma predição de desvio incorreta."""
         # 1. Atualiza o PC para o caminho correto
         self.pc = self.misprediction_target_pc
+        self.wrong_path = False
+        branch = self.rob.entries[self.flush_rob_entry_index]
+        branch.flush_cycle = self.cycle
+        self.bp.recover(self.branch_histories.get(self.flush_rob_entry_index),
+                        branch.actual_outcome if branch.instruction.is_branch else None)
+        if self.ras.entries:
+            self.ras.restore(self.ras_checkpoints[self.flush_rob_entry_index])
 
         # 2. Limpa as instruções especulativas do ROB
         # O tail do ROB aponta para a próxima posição livre. As instruções
-        # especulativas estão entre o desvio e o tail.
-        
-        current_idx = (self.flush_rob_entry_index + 1) % len(self.rob.entries)
-        while current_idx != self.rob.tail:
+        # especulativas estão entre o desvio e o tail. Elas são percorridas da
+        # mais nova para a mais antiga, para que os tags dos registradores
+        # voltem ao produtor não especulativo.
+        size = len(self.rob.entries)
+        squashed = self.rob.count - (self.rob.age(self.flush_rob_entry_index) + 1)
+        squashed_indices = [(self.rob.tail - k) % size for k in range(1, squashed + 1)]
+        for current_idx in squashed_indices:
             entry_to_flush = self.rob.entries[current_idx]
-            if entry_to_flush.state != 'Empty':
-                # Restaura o tag do registrador de destino
-                if entry_to_flush.instruction and entry_to_flush.instruction['type'] != 'BRANCH':
-                    dest_reg = entry_to_flush.destination
-                    if dest_reg and self.registers.tags.get(dest_reg) == current_idx:
-                         self.registers.tags[dest_reg] = entry_to_flush.old_tag
-
-                # Limpa a entrada
-                entry_to_flush.__init__() # Reseta para o estado inicial
-
-            current_idx = (current_idx + 1) % len(self.rob.entries)
-        
-        # 3. Reposiciona o tail do ROB para depois do branch
-        self.rob.tail = (self.flush_rob_entry_index + 1) % len(self.rob.entries)
+            # Restaura o tag do registrador de destino. Se o produtor anterior já
+            # foi commitado (não é mais antigo que esta entrada no ROB), o valor
+            # já está no banco de registradores e o tag fica livre.
+            if entry_to_flush.instruction.is_store:
+                self.pending_stores.pop()  # Os squashes vão do mais novo para o mais antigo
+            dest_reg = entry_to_flush.instruction.rd
+            if dest_reg is not None and self.registers.tags[dest_reg] == current_idx:
+                old_tag = entry_to_flush.old_tag
+                if old_tag is not None and self.rob.age(old_tag) >= self.rob.age(current_idx):
+                    old_tag = None
+                self.registers.tags[dest_reg] = old_tag
+
+            # 3. Libera somente a estação de reserva da instrução descartada;
+            # instruções mais antigas que o desvio continuam executando.
+            rs = self.reservation_stations.by_rob.get(current_idx)
+            if rs is not None:
+                self._squash_station(rs)
+            self.cdb.waiting.pop(current_idx, None)
+
+        # 4. Limpa as entradas e reposiciona o tail do ROB para depois do branch
+        self.rob.reset_entries(squashed_indices)
+        self.rob.truncate_after(self.flush_rob_entry_index)
 
-        # 4. Limpa todas as estações de reserva
-        self.reservation_stations.reset()
-        
         # 5. Limpa os flags de controle
         self.flush_rob_entry_index = -1
         self.misprediction_target_pc = -1
         self.flush_needed = False
 
-    def _get_execution_unit_type(self, opcode):
-        """Mapeia um opcode para o TIPO de unidade de execução (genérico)."""
-        if opcode in ['ADD', 'SUB', 'ADDI']:
-            return 'INT_ALU'
-        elif opcode in ['MUL']:
-            return 'FP_MUL'
-        elif opcode in ['DIV']:
-            return 'FP_DIV'
-        elif opcode == 'LW':
-            return 'MEM_LOAD'
-        elif opcode == 'SW':
-            return 'MEM_STORE'
-        elif opcode in ['BNE', 'BEQ']:
-            return 'BRANCH'
-        return 'INT_ALU' # Padrão
+    def _squash_station(self, rs):
+        """Remove uma estação descartada no flush de todas as estruturas que a referenciam."""
+        queue = self.ready_queues[UNIT_TYPES[rs.op]]
+        if (rs.seq, rs) in queue:
+            queue.remove((rs.seq, rs))
+        for unit in self.active_units:
+            if self.execution_units[unit]['current_instruction'] is rs:
+                self._release_unit(unit)
+                break
+        if rs in self.completed_stations:
+            self.completed_stations.remove(rs)
+        for tag in (rs.qj, rs.qk):
+            if tag is not None and tag in self.cdb.waiting:
+                self.cdb.waiting[tag] = [w for w in self.cdb.waiting[tag] if w[0] is not rs]
+        self.reservation_stations.release(rs)
 
     def _update_metrics(self):
         """Atualiza as métricas de desempenho."""
@@ -578,51 +762,57 @@ class TomasuloCore:
     def _get_rob_state(self):
         """Retorna o estado do ROB para a GUI"""
         rob_state = []
-        for i, entry in enumerate(self.rob.entries):
-            if entry.state != 'Empty':
-                rob_state.append({
-                    'index': i,
-                    'state': entry.state,
-                    'instruction': entry.instruction,
-                    'destination': entry.destination,
-                    'value': entry.value,
-                    'ready': entry.ready
-                })
+        for i in self.rob.occupied():
+            entry = self.rob.entries[i]
+            rob_state.append({
+                'index': i,
+                'state': entry.state,
+                'instruction': entry.instruction,
+                'destination': self._destination_label(entry.instruction, entry.destination),
+                'value': entry.value,
+                'ready': entry.ready
+            })
         return rob_state
 
     def _get_rs_state(self):
         """Retorna o estado das estações de reserva"""
         rs_state = {}
-        for rs_type, stations in self.reservation_stations.stations.items():
+        for rs_type in self.reservation_stations.stations:
             rs_state[rs_type] = []
-            for i, rs in enumerate(stations):
-                if rs.busy:
-                    rs_state[rs_type].append({
-                        'index': i,
-                        'op': rs.op,
-                        'vj': rs.vj,
-                        'vk': rs.vk,
-                        'qj': rs.qj,
-                        'qk': rs.qk,
-                        'dest': rs.dest,
-                        'cycles_remaining': rs.cycles_remaining,
-                        'ready': rs.ready
-                    })
+            for i, rs in self.reservation_stations.busy_stations(rs_type):
+                rs_state[rs_type].append({
+                    'index': i,
+                    'op': rs.op.name,
+                    'vj': rs.vj,
+                    'vk': rs.vk,
+                    'qj': rs.qj,
+                    'qk': rs.qk,
+                    'dest': rs.dest,
+                    'cycles_remaining': rs.cycles_remaining,
+                    'ready': rs.ready
+                })
         return rs_state
 
     def _get_register_state(self):
         """Retorna o estado dos registradores para a GUI"""
         register_state = {}
-        for reg_name in self.registers.values.keys():
-            register_state[reg_name] = {
-                'value': self.registers.values[reg_name],
-                'tag': self.registers.tags[reg_name]
+        for i, (value, tag) in enumerate(zip(self.registers.values, self.registers.tags)):
+            register_state[self.registers.name(i)] = {
+                'value': value,
+                'tag': tag
             }
         return register_state
 
     def _get_committed_instructions_state(self):
         """Retorna o estado das instruções commitadas para a GUI"""
-        return self.committed_instructions.copy()
+        return [dict(committed, destination=self._destination_label(committed['instruction'], committed['destination']))
+                for committed in self.committed_instructions]
+
+    def _destination_label(self, instruction, destination):
+        """Destino para exibição: nome do registrador ou, para SW, o endereço de memória."""
+        if destination is None or instruction.is_store:
+            return destination
+        return self.registers.name(destination)
 
     def get_last_branch_prediction(self):
         """Retorna a última predição de desvio executada (ou None se não houver)."""
@@ -0,0 +1,151 @@
+"""
+Simulação funcional (sem modelo de tempo) e avanço rápido ("fast-forward").
+
+`FunctionalSimulator` interpreta o programa instrução por instrução, em
+ordem, usando o mesmo decodificador (`parse_program`) e a mesma semântica
+(tabela `SEMANTICS` da ISA) do núcleo de Tomasulo, mas sem ROB, estações
+ou ciclos. Serve para pular o trecho do programa que não interessa
+(inicialização, por exemplo): `fast_forward` avança o estado arquitetural
+de um `TomasuloCore` (registradores, memória e PC) por N instruções ou até
+uma label e devolve o núcleo pronto para a simulação detalhada, com o
+preditor de desvios opcionalmente já "aquecido" pelos desvios executados.
+"""
+import copy
+
+from simulator.isa import SEMANTICS
+from simulator.parser import parse_program
+
+
+class FunctionalSimulator:
+    """Interpretador do programa: executa cada instrução por completo, na ordem do programa.
+
+    `registers` (lista com os 32 valores) e `memory` (dicionário endereço ->
+    valor) são alterados no lugar. Com `predictor`, cada desvio executado
+    atualiza o preditor (`predictor.update(pc, tomado)`). Com `pc_counts`
+    (lista com uma posição por instrução), conta quantas vezes cada PC foi
+    executado; com `trace` (um `simulator.trace.Trace`), grava cada
+    instrução executada.
+    """
+
+    def __init__(self, instructions, label_map=None, registers=None, memory=None, pc=0, predictor=None,
+                 pc_counts=None, trace=None):
+        self.instructions = instructions
+        self.label_map = label_map or {}
+        self.registers = registers if registers is not None else [0] * 32
+        self.memory = memory if memory is not None else {}
+        self.pc = pc
+        self.predictor = predictor
+        self.pc_counts = pc_counts
+        self.trace = trace
+        self.executed = 0  # Instruções executadas
+
+    @classmethod
+    def from_program(cls, program_text, **kwargs):
+        instructions, label_map = parse_program(program_text)
+        return cls(instructions, label_map, **kwargs)
+
+    def finished(self):
+        return not 0 <= self.pc < len(self.instructions)
+
+    def resolve(self, target):
+        """Converte uma label ou um PC em PC."""
+        if isinstance(target, str):
+            if target not in self.label_map:
+                raise ValueError(f"Label não encontrada: {target!r}")
+            return self.label_map[target]
+        return target
+
+    def run(self, count=None, until=None):
+        """Executa até `count` instruções, até o PC chegar em `until` (label ou PC) ou até o fim do programa.
+
+        Retorna o número de instruções executadas nesta chamada.
+        """
+        stop_pc = -1 if until is None else self.resolve(until)
+        remaining = -1 if count is None else count
+        instructions = self.instructions
+        registers = self.registers
+        memory = self.memory
+        predictor = self.predictor
+        pc_counts = self.pc_counts
+        trace = self.trace
+        n = len(instructions)
+        pc = self.pc
+        executed = 0
+        while 0 <= pc < n and remaining != 0 and pc != stop_pc:
+            instruction = instructions[pc]
+            if pc_counts is not None:
+                pc_counts[pc] += 1
+            vj = registers[instruction.rs1] if instruction.rs1 is not None else 0
+            vk = registers[instruction.rs2] if instruction.rs2 is not None else instruction.imm
+            result = SEMANTICS[instruction.opcode](vj, vk, instruction.offset)
+            pc += 1
+            if instruction.is_load:
+                registers[instruction.rd] = memory.get(result, 0)
+                if trace is not None:
+                    trace.append(instruction, address=result)
+            elif instruction.is_store:
+                memory[result] = vk
+                if trace is not None:
+                    trace.append(instruction, address=result)
+            elif instruction.is_branch:
+                taken = bool(result)
+                if predictor is not None:
+                    predictor.update(instruction.pc, taken)
+                if taken:
+                    pc = instruction.target_pc
+                if trace is not None:
+                    trace.append(instruction, taken=int(taken))
+            elif instruction.is_jump:
+                if instruction.rd is not None:
+                    registers[instruction.rd] = result  # JAL: endereço de retorno
+                if instruction.is_indirect:
+                    pc = result
+                    if trace is not None:
+                        trace.append(instruction, taken=1, address=result)
+                else:
+                    pc = instruction.target_pc
+                    if trace is not None:
+                        trace.append(instruction, taken=1)
+            else:
+                registers[instruction.rd] = result
+                if trace is not None:
+                    trace.append(instruction)
+            executed += 1
+            remaining -= 1
+        self.pc = pc
+        self.executed += executed
+        return executed
+
+    def handoff(self, core):
+        """Copia o estado arquitetural (e o do preditor, se houver) para um núcleo com o pipeline vazio."""
+        if core.rob.count or core.flush_needed:
+            raise ValueError("O avanço rápido exige o pipeline vazio")
+        for index, value in enumerate(self.registers):
+            if core.registers.values[index] != value:
+                core.registers.values[index] = value
+        core.memory.update(self.memory)
+        core.pc = self.pc
+        if self.predictor is not None and self.predictor is not core.bp:
+            for name, value in vars(self.predictor).items():
+                if name != '_journal':
+                    setattr(core.bp, name, copy.deepcopy(value))
+            core.journal.attach(*core.bp.journaled_objects())  # Componentes internos copiados
+        core.journal.clear()
+
+
+def fast_forward(core, count=None, until=None, warm_predictor=True):
+    """Avança funcionalmente um núcleo com o pipeline vazio e o deixa pronto para a simulação detalhada.
+
+    O programa já deve estar carregado (`load_program`). Executa `count`
+    instruções ou até o PC chegar na label/PC `until`; com `warm_predictor`,
+    os desvios executados treinam o preditor do núcleo. As escritas não
+    entram no histórico de "Voltar": a simulação detalhada começa do estado
+    avançado. Retorna o número de instruções puladas.
+    """
+    if core.rob.count or core.flush_needed:
+        raise ValueError("O avanço rápido exige o pipeline vazio")
+    simulator = FunctionalSimulator(core.instructions, core.label_map, list(core.registers.values),
+                                    dict(core.memory), core.pc, core.bp if warm_predictor else None)
+    executed = simulator.run(count, until)
+    simulator.handoff(core)
+    return executed
@@ -1,6 +1,153 @@
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox
+from simulator import config
 from simulator.core import TomasuloCore
+from simulator.history import HistoryView, record_filter
+from simulator.isa import ISA
+from simulator.timeline import Timeline
+from simulator.worker import SimulationWorker
+
+try:
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+    from simulator.pipeline_chart import PipelineChart
+except ImportError:  # Sem matplotlib, a aba do pipeline só mostra um aviso
+    PipelineChart = None
+
+SPEED_MAX = 4  # Posição do controle de velocidade que significa "sem limite" (as demais: 10 ** posição ciclos/s)
+
+
+class TreeRows:
+    """Linhas de um Treeview identificadas por chave (índice do ROB, nome do registrador...).
+
+    `sync` recebe as linhas atuais e altera só o que mudou: insere as novas,
+    remove as que sumiram e reescreve apenas as células diferentes.
+    """
+
+    def __init__(self, tree):
+        self.tree = tree
+        self.columns = tree['columns']
+        self.values = {}  # Chave -> valores exibidos
+
+    def sync(self, rows):
+        """`rows`: pares (chave, valores) na ordem de exibição; as chaves mantêm a ordem relativa entre chamadas."""
+        current = dict(rows)
+        gone = [key for key in self.values if key not in current]
+        if gone:
+            self.tree.delete(*gone)
+            for key in gone:
+                del self.values[key]
+        for position, (key, values) in enumerate(current.items()):
+            old = self.values.get(key)
+            if old == values:
+                continue
+            if old is None:
+                self.tree.insert('', position, iid=key, values=values)
+            else:
+                for column, old_value, value in zip(self.columns, old, values):
+                    if old_value != value:
+                        self.tree.set(key, column, value)
+            self.values[key] = values
+
+    def clear(self):
+        self.tree.delete(*self.values)
+        self.values.clear()
+
+
+class VirtualTable:
+    """Tabela virtualizada sobre um histórico (HistoryView): o Treeview só tem as linhas visíveis.
+
+    A barra de rolagem representa a visão inteira; a cada rolagem ou
+    atualização, só as linhas da janela visível são lidas do histórico e
+    escritas (por diferença) no Treeview. Parada no fim, a tabela
+    acompanha os registros novos.
+    """
+    ROW_HEIGHT = 28   # Igual ao 'rowheight' do estilo Treeview
+    HEADER_HEIGHT = 32
+
+    def __init__(self, parent, columns, format_row, key, height=15, access=None):
+        self.tree = ttk.Treeview(parent, columns=columns, show='headings', height=height, style='Treeview')
+        for col in columns:
+            self.tree.heading(col, text=col)
+            self.tree.column(col, width=120, anchor=tk.CENTER)
+        self.scrollbar = ttk.Scrollbar(parent, orient=tk.VERTICAL, command=self._on_scroll)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=8, pady=8)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.rows = TreeRows(self.tree)
+        self.format_row = format_row
+        self.key = key  # Ciclo de cada registro ("Ir ao ciclo")
+        self.predicate = None
+        self.view = None
+        self.top = 0  # Posição da primeira linha visível
+        self.follow = True
+        # Eventos da própria tabela leem o histórico: `access(action)` os sincroniza com a simulação
+        self.access = access or (lambda action: action())
+        self.tree.bind('<MouseWheel>', lambda event: self.access(lambda: self.scroll(-3 if event.delta > 0 else 3)))
+        self.tree.bind('<Button-4>', lambda event: self.access(lambda: self.scroll(-3)))
+        self.tree.bind('<Button-5>', lambda event: self.access(lambda: self.scroll(3)))
+        self.tree.bind('<Configure>', lambda event: self.access(self.render))
+
+    @property
+    def visible(self):
+        """Número de linhas que cabem na tabela."""
+        height = self.tree.winfo_height()
+        if height <= 1:  # Ainda não desenhada
+            return int(self.tree.cget('height'))
+        return max((height - self.HEADER_HEIGHT) // self.ROW_HEIGHT, 1)
+
+    def show(self, log):
+        """Mostra `log` (um HistoryLog), acompanhando os registros novos desde a última vez."""
+        if self.view is None or self.view.log is not log:
+            self.view = HistoryView(log, self.predicate, self.key)
+            self.follow = True
+        self.render()
+
+    def set_filter(self, predicate):
+        self.predicate = predicate
+        self.follow = True
+        if self.view is not None:
+            self.view.set_filter(predicate)
+            self.render()
+
+    def scroll(self, rows):
+        self.scroll_to(self.top + rows)
+
+    def scroll_to(self, position):
+        if self.view is None:
+            return
+        self.view.refresh()
+        self.top = position
+        self.follow = position >= len(self.view) - self.visible
+        self.render()
+
+    def seek(self, value):
+        """Rola até o primeiro registro com ciclo >= `value`."""
+        if self.view is not None:
+            self.view.refresh()
+            self.scroll_to(self.view.position_of(value))
+
+    def _on_scroll(self, command, amount, unit=None):
+        if self.view is None:
+            return
+        if command == 'moveto':
+            self.access(lambda: self.scroll_to(int(float(amount) * len(self.view))))
+        else:
+            self.access(lambda: self.scroll(int(amount) * (self.visible if unit == 'pages' else 1)))
+
+    def render(self):
+        if self.view is None:
+            return
+        self.view.refresh()  # Só examina os registros novos
+        total, visible = len(self.view), self.visible
+        if self.follow:
+            self.top = total - visible
+        self.top = max(min(self.top, total - visible), 0)
+        self.rows.sync((str(slot), self.format_row(record))
+                       for slot, (index, record) in enumerate(self.view.rows(self.top, visible)))
+        if total:
+            self.scrollbar.set(self.top / total, min(self.top + visible, total) / total)
+        else:
+            self.scrollbar.set(0, 1)
+
 
 class TomasuloGUI(tk.Tk):
     def __init__(self):
@@ -11,7 +158,9 @@ class TomasuloGUI(tk.Tk):
         self.style = ttk.Style(self)
         self._set_modern_theme()
         self.core = TomasuloCore()
-        self.is_running = False
+        self.timeline = Timeline()
+        self.worker = None  # Execução contínua ("Run") em segundo plano
+        self._rendered_cycle = 0  # Ciclo mostrado no último quadro
         self._create_widgets()
         self._load_sample_program()  # Carregar programa de exemplo automaticamente
 
@@ -52,6 +201,12 @@ class TomasuloGUI(tk.Tk):
         self._create_register_panel()
         self._create_branch_predictor_panel()
         self._create_committed_instructions_panel()
+        self._create_pipeline_panel()
+        # Só a aba visível é atualizada a cada ciclo; as outras, quando forem selecionadas
+        self._tab_updaters = [self._update_rob_tree, self._update_rs_trees, self._update_register_tree,
+                              self._update_branch_predictor_panel, self._update_committed_instructions_panel,
+                              self._update_pipeline_panel]
+        self.notebook.bind('<<NotebookTabChanged>>', lambda event: self._on_tab_changed())
 
     def _create_control_panel(self, parent):
         control_frame = ttk.Labelframe(parent, text="Controles", padding=12)
@@ -60,6 +215,7 @@ class TomasuloGUI(tk.Tk):
         button_frame.pack(fill=tk.X, padx=8, pady=8)
         ttk.Button(button_frame, text="⏭ Step", command=self.step, style='TButton').pack(side=tk.LEFT, padx=(0, 8))
         ttk.Button(button_frame, text="▶ Run", command=self.run_simulation, style='TButton').pack(side=tk.LEFT, padx=(0, 8))
+        ttk.Button(button_frame, text="⏸ Stop", command=self.stop, style='TButton').pack(side=tk.LEFT, padx=(0, 8))
         ttk.Button(button_frame, text="🔄 Reset", command=self.reset, style='TButton').pack(side=tk.LEFT, padx=(0, 8))
         
         info_frame = ttk.Frame(control_frame)
@@ -73,8 +229,64 @@ class TomasuloGUI(tk.Tk):
         self.back_button = ttk.Button(parent, text="⏪ Voltar", command=self.step_back)
         self.back_button.pack(side="left", padx=5, pady=5)
 
+        # Linha do tempo: arraste para ir a qualquer ciclo já simulado
+        timeline_frame = ttk.Frame(control_frame)
+        timeline_frame.pack(fill=tk.X, padx=8, pady=(8, 0))
+        ttk.Label(timeline_frame, text="Linha do tempo:", background="#ede9fe").pack(side=tk.LEFT)
+        self.timeline_scale = ttk.Scale(timeline_frame, from_=0, to=1, orient=tk.HORIZONTAL,
+                                        command=self._on_timeline_drag)
+        self.timeline_scale.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=8)
+        self.timeline_scale.bind("<ButtonRelease-1>", self._on_timeline_release)
+        self.timeline_label = ttk.Label(timeline_frame, text="0", width=8, background="#ede9fe", foreground="#7c3aed")
+        self.timeline_label.pack(side=tk.LEFT)
+
+        # Velocidade do "Run" (ciclos por segundo) e modo turbo (mostra só a cada N ciclos)
+        speed_frame = ttk.Frame(control_frame)
+        speed_frame.pack(fill=tk.X, padx=8, pady=(8, 0))
+        ttk.Label(speed_frame, text="Velocidade:", background="#ede9fe").pack(side=tk.LEFT)
+        self.speed_scale = ttk.Scale(speed_frame, from_=0, to=SPEED_MAX, orient=tk.HORIZONTAL,
+                                     command=self._on_speed_change)
+        self.speed_scale.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=8)
+        self.speed_label = ttk.Label(speed_frame, text="", width=12, background="#ede9fe", foreground="#7c3aed")
+        self.speed_label.pack(side=tk.LEFT)
+        self.speed_scale.set(SPEED_MAX)
+        self._on_speed_change(SPEED_MAX)
+        ttk.Label(speed_frame, text="Mostrar a cada", background="#ede9fe").pack(side=tk.LEFT, padx=(16, 4))
+        self.render_every = tk.StringVar(value="1")
+        ttk.Spinbox(speed_frame, from_=1, to=1000000, textvariable=self.render_every, width=8).pack(side=tk.LEFT)
+        ttk.Label(speed_frame, text="ciclos", background="#ede9fe").pack(side=tk.LEFT, padx=4)
+
+    def _speed(self):
+        """Ciclos por segundo escolhidos no controle de velocidade (None: sem limite)."""
+        position = float(self.speed_scale.get())
+        return None if position >= SPEED_MAX else round(10 ** position)
+
+    def _on_speed_change(self, value):
+        speed = self._speed()
+        self.speed_label.config(text="máx" if speed is None else f"{speed} ciclos/s")
+        if self.worker is not None:
+            self.worker.cycles_per_second = speed
+
+    def _render_interval(self):
+        """Modo turbo: ciclos entre dois quadros mostrados durante o "Run"."""
+        try:
+            return max(int(self.render_every.get()), 1)
+        except ValueError:
+            return 1
+
     def step_back(self):
-        self.core.restore_state()
+        self.stop()
+        if not self.core.restore_state() and self.core.cycle > 0:
+            # Histórico de desfazer esgotado: usa a linha do tempo
+            self.timeline.seek(self.core, self.core.cycle - 1)
+        self.update_gui()
+
+    def _on_timeline_drag(self, value):
+        self.timeline_label.config(text=str(int(float(value))))
+
+    def _on_timeline_release(self, event):
+        self.stop()
+        self.timeline.seek(self.core, int(float(self.timeline_scale.get())))
         self.update_gui()
 
     def _create_program_panel(self, parent):
@@ -113,6 +325,7 @@ class TomasuloGUI(tk.Tk):
         self.rob_tree.configure(yscrollcommand=rob_scrollbar.set)
         self.rob_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=8, pady=8)
         rob_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.rob_rows = TreeRows(self.rob_tree)
 
     def _create_rs_panel(self):
         rs_frame = ttk.Frame(self.notebook)
@@ -137,6 +350,7 @@ class TomasuloGUI(tk.Tk):
         tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=4, pady=4)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         setattr(self, f'{rs_type.lower()}_rs_tree', tree)
+        setattr(self, f'{rs_type.lower()}_rs_rows', TreeRows(tree))
 
     def _create_register_panel(self):
         reg_frame = ttk.Frame(self.notebook)
@@ -150,6 +364,7 @@ class TomasuloGUI(tk.Tk):
         self.reg_tree.configure(yscrollcommand=reg_scrollbar.set)
         self.reg_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=8, pady=8)
         reg_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.reg_rows = TreeRows(self.reg_tree)
 
         # Painel de edição de registrador
         edit_frame = ttk.Labelframe(reg_frame, text="Editar Registrador", padding=8)
@@ -166,15 +381,9 @@ class TomasuloGUI(tk.Tk):
         bp_frame = ttk.Frame(self.notebook)
         self.notebook.add(bp_frame, text="Preditor de Desvio")
         # Tabela do preditor
-        columns = ("PC", "Predição", "Resultado")
-        self.bp_tree = ttk.Treeview(bp_frame, columns=columns, show='headings', height=10, style='Treeview')
-        for col in columns:
-            self.bp_tree.heading(col, text=col)
-            self.bp_tree.column(col, width=120, anchor=tk.CENTER)
-        bp_scrollbar = ttk.Scrollbar(bp_frame, orient=tk.VERTICAL, command=self.bp_tree.yview)
-        self.bp_tree.configure(yscrollcommand=bp_scrollbar.set)
-        self.bp_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=8, pady=8)
-        bp_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        columns = ("Ciclo", "PC", "Predição", "Resultado")
+        self._create_history_filters(bp_frame, lambda: self.bp_table, mispredicted=True)
+        self.bp_table = VirtualTable(bp_frame, columns, self._format_branch, key=lambda entry: entry['cycle'], height=10, access=self._with_core)
         # Métricas do preditor
         metrics_frame = ttk.Labelframe(bp_frame, text="Métricas do Preditor", padding=12)
         metrics_frame.pack(fill=tk.X, padx=8, pady=8)
@@ -186,21 +395,61 @@ class TomasuloGUI(tk.Tk):
         self.bp_flush_alert = ttk.Label(bp_frame, text="", font=("Segoe UI", 14, "bold"), background="#f7f4fa")
         self.bp_flush_alert.pack(fill=tk.X, padx=8, pady=8)
 
+    def _create_pipeline_panel(self):
+        pipeline_frame = ttk.Frame(self.notebook)
+        self.notebook.add(pipeline_frame, text="Pipeline")
+        if PipelineChart is None:
+            self.pipeline_chart = None
+            ttk.Label(pipeline_frame, text="Instale o matplotlib (requirements.txt) para ver o gráfico do pipeline.").pack(padx=8, pady=8)
+            return
+        # Gantt das instruções commitadas, desenhado incrementalmente (blitting)
+        self.pipeline_chart = PipelineChart()
+        canvas = FigureCanvasTkAgg(self.pipeline_chart.figure, master=pipeline_frame)
+        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=8, pady=8)
+
+    def _create_history_filters(self, parent, table, mispredicted=False):
+        """Filtros (PC, operação, só erros de predição) e "Ir ao ciclo" de uma tabela de histórico."""
+        frame = ttk.Frame(parent)
+        frame.pack(side=tk.TOP, fill=tk.X, padx=8, pady=(8, 0))
+        ttk.Label(frame, text="PC:").pack(side=tk.LEFT)
+        pc_entry = ttk.Entry(frame, width=6)
+        pc_entry.pack(side=tk.LEFT, padx=(4, 12))
+        ttk.Label(frame, text="Operação:").pack(side=tk.LEFT)
+        opcode_combo = ttk.Combobox(frame, values=[""] + [spec.name for spec in ISA], width=6, state="readonly")
+        opcode_combo.pack(side=tk.LEFT, padx=(4, 12))
+        only_errors = tk.BooleanVar(value=False)
+        if mispredicted:
+            ttk.Checkbutton(frame, text="Só erros", variable=only_errors).pack(side=tk.LEFT, padx=(0, 12))
+
+        def apply_filter():
+            text = pc_entry.get().strip()
+            if text and not text.isdigit():
+                messagebox.showerror("Erro", "O PC deve ser um inteiro não negativo!")
+                return
+            predicate = record_filter(int(text) if text else None, opcode_combo.get(), only_errors.get())
+            self._with_core(lambda: table().set_filter(predicate))
+
+        def go_to_cycle(event=None):
+            text = cycle_entry.get().strip()
+            if text.isdigit():
+                self._with_core(lambda: table().seek(int(text)))
+
+        ttk.Button(frame, text="Filtrar", command=apply_filter).pack(side=tk.LEFT, padx=(0, 24))
+        ttk.Label(frame, text="Ir ao ciclo:").pack(side=tk.LEFT)
+        cycle_entry = ttk.Entry(frame, width=8)
+        cycle_entry.pack(side=tk.LEFT, padx=4)
+        cycle_entry.bind("<Return>", go_to_cycle)
+        ttk.Button(frame, text="Ir", command=go_to_cycle).pack(side=tk.LEFT)
+
     def _create_committed_instructions_panel(self):
         committed_frame = ttk.Frame(self.notebook)
         self.notebook.add(committed_frame, text="Instruções Commitadas")
         
-        # Tabela das instruções commitadas
+        # Tabela das instruções commitadas (virtualizada: só as linhas visíveis)
         columns = ("Ciclo", "ROB Index", "Instrução", "Destino", "Valor", "Status")
-        self.committed_tree = ttk.Treeview(committed_frame, columns=columns, show='headings', height=15, style='Treeview')
-        for col in columns:
-            self.committed_tree.heading(col, text=col)
-            self.committed_tree.column(col, width=120, anchor=tk.CENTER)
-        
-        committed_scrollbar = ttk.Scrollbar(committed_frame, orient=tk.VERTICAL, command=self.committed_tree.yview)
-        self.committed_tree.configure(yscrollcommand=committed_scrollbar.set)
-        self.committed_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=8, pady=8)
-        committed_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self._create_history_filters(committed_frame, lambda: self.committed_table)
+        self.committed_table = VirtualTable(committed_frame, columns, self._format_committed,
+                                            key=lambda inst: inst['cycle_committed'], access=self._with_core)
         
         # Métricas das instruções commitadas
         metrics_frame = ttk.Labelframe(committed_frame, text="Métricas", padding=12)
@@ -247,29 +496,43 @@ MUL R9, R8, R3    # R9 = R8 * R3"""
 
     def step(self):
         """Executa um ciclo da simulação"""
+        self.stop()
         if self.core.cycle_step():
+            self.timeline.record(self.core)
             self.update_gui()
         else:
             messagebox.showinfo("Simulação", "Todas as instruções foram executadas!")
 
     def run_simulation(self):
-        """Executa a simulação continuamente"""
-        if not self.is_running:
-            self.is_running = True
-            self._run_continuous()
-
-    def _run_continuous(self):
-        """Execução contínua da simulação"""
-        if self.is_running:
-            if self.core.cycle_step():
+        """Executa a simulação continuamente, em segundo plano"""
+        if self.worker is not None:
+            return
+        self.worker = SimulationWorker(self.core, self.timeline, self._speed())
+        self.worker.start()
+        self.after(1000 // config.GUI_FRAME_RATE, self._frame)
+
+    def _frame(self):
+        """Quadro do "Run": mostra o estado mais recente do núcleo, a uma taxa fixa de quadros."""
+        worker = self.worker
+        if worker is None:
+            return  # Parado pelo usuário
+        running = worker.running
+        with worker.reading():
+            if not running or self.core.cycle - self._rendered_cycle >= self._render_interval():
                 self.update_gui()
-                self.after(400, self._run_continuous)  # 400ms entre ciclos
-            else:
-                self.is_running = False
-                messagebox.showinfo("Simulação", "Todas as instruções foram executadas!")
+        if running:
+            self.after(1000 // config.GUI_FRAME_RATE, self._frame)
+            return
+        self.worker = None
+        if worker.finished:
+            messagebox.showinfo("Simulação", "Todas as instruções foram executadas!")
 
     def stop(self):
-        self.is_running = False
+        """Para o "Run" (o lote de ciclos em andamento termina antes)."""
+        if self.worker is not None:
+            self.worker.stop()
+            self.worker = None
+            self.update_gui()
 
     def reset(self):
         self.stop()
@@ -281,8 +544,14 @@ MUL R9, R8, R3    # R9 = R8 * R3"""
         self.load_program_from_text()
 
     def load_program_from_text(self):
+        self.stop()
         program_text = self.program_text.get(1.0, tk.END)
-        self.core.load_program(program_text)
+        try:
+            self.core.load_program(program_text)
+        except ValueError as error:
+            messagebox.showerror("Erro no programa", str(error))
+            return
+        self.timeline.reset(self.core)
         self.update_gui()
 
     def _has_pending_instructions(self):
@@ -293,6 +562,10 @@ MUL R9, R8, R3    # R9 = R8 * R3"""
         # Atualizar informações do ciclo e instruções
         self.cycle_label.config(text=str(self.core.cycle), foreground="#7c3aed")
         self.total_inst_label.config(text=str(self.core.metrics['total_instructions']), foreground="#7c3aed")
+        self.timeline_scale.configure(to=max(self.timeline.horizon, 1))
+        self.timeline_scale.set(self.core.cycle)
+        self.timeline_label.config(text=str(self.core.cycle))
+        self._rendered_cycle = self.core.cycle
         
         # Atualizar métricas de desempenho
         for key, label in self.metrics_labels.items():
@@ -302,74 +575,89 @@ MUL R9, R8, R3    # R9 = R8 * R3"""
             else:
                 label.config(text=str(value))
         
-        # Atualizar painéis
-        self._update_rob_tree(self.core._get_rob_state())
-        self._update_rs_trees(self.core._get_rs_state())
-        self._update_register_tree(self.core._get_register_state())
-        self._update_branch_predictor_panel()
-        self._update_committed_instructions_panel()
-
-    def _update_rob_tree(self, rob_state):
-        self.rob_tree.delete(*self.rob_tree.get_children())
-        for entry in rob_state:
-            instruction_str = f"{entry['instruction']['opcode']} {' '.join(entry['instruction']['operands'])}" if entry['instruction'] else ""
-            self.rob_tree.insert('', 'end', values=(
-                entry['index'],
-                entry['state'],
-                instruction_str,
-                entry['destination'],
-                entry['value'],
-              
-            ))
-
-    def _update_rs_trees(self, rs_state):
+        self._update_visible_tab()
+
+    def _with_core(self, action):
+        """Executa `action` com acesso exclusivo ao núcleo (pausando o "Run" entre dois lotes)."""
+        if self.worker is None:
+            return action()
+        with self.worker.reading():
+            return action()
+
+    def _on_tab_changed(self):
+        self._with_core(self._update_visible_tab)
+
+    def _update_visible_tab(self):
+        """Atualiza a aba selecionada do notebook (as demais ficam para quando forem abertas)."""
+        self._tab_updaters[self.notebook.index('current')]()
+
+    def _update_rob_tree(self):
+        self.rob_rows.sync((str(entry['index']), (
+            entry['index'],
+            entry['state'],
+            str(entry['instruction']) if entry['instruction'] else "",
+            entry['destination'],
+            entry['value'],
+        )) for entry in self.core._get_rob_state())
+
+    def _update_rs_trees(self):
+        rs_state = self.core._get_rs_state()
         for rs_type in ['INT', 'FP']:
-            tree = getattr(self, f'{rs_type.lower()}_rs_tree')
-            tree.delete(*tree.get_children())
-            if rs_type in rs_state:
-                for entry in rs_state[rs_type]:
-                    tree.insert('', 'end', values=(
-                        entry['index'],
-                        entry['op'],
-                        entry['vj'],
-                        entry['vk'],
-                        entry['qj'],
-                        entry['qk'],
-                        entry['dest'],
-                 
-                    ))
-
-    def _update_register_tree(self, register_state):
-        self.reg_tree.delete(*self.reg_tree.get_children())
-        for reg_name, reg_data in register_state.items():
-            self.reg_tree.insert('', 'end', values=(
-                reg_name,
-                reg_data['value'],
-                reg_data['tag'] if reg_data['tag'] is not None else ""
-            ))
+            rows = getattr(self, f'{rs_type.lower()}_rs_rows')
+            rows.sync((str(entry['index']), (
+                entry['index'],
+                entry['op'],
+                entry['vj'],
+                entry['vk'],
+                entry['qj'],
+                entry['qk'],
+                entry['dest'],
+            )) for entry in rs_state.get(rs_type, ()))
+
+    def _update_register_tree(self):
+        self.reg_rows.sync((reg_name, (
+            reg_name,
+            reg_data['value'],
+            reg_data['tag'] if reg_data['tag'] is not None else ""
+        )) for reg_name, reg_data in self.core._get_register_state().items())
 
     def _update_register_value(self):
+        self.stop()
         reg = self.reg_edit_combo.get()
         try:
             value = int(self.reg_edit_value.get())
         except Exception:
             messagebox.showerror("Erro", "Digite um valor inteiro válido!")
             return
-        if reg in self.core.registers.values:
-            self.core.registers.values[reg] = value
-            self.update_gui()
-        else:
+        try:
+            self.core.registers.set_value(reg, value)
+        except ValueError:
             messagebox.showerror("Erro", f"Registrador {reg} não existe!")
+            return
+        self.core.journal.clear()
+        self.timeline.rebase(self.core)  # O futuro já simulado deixa de valer
+        self.update_gui()
+
+    @staticmethod
+    def _format_branch(entry):
+        pred = "Tomado" if entry['predicted'] else "Não Tomado"
+        res = "Tomado" if entry['actual'] else "Não Tomado"
+        return (entry['cycle'], str(entry['pc']), pred, res)
+
+    def _format_committed(self, inst):
+        instruction = inst['instruction']
+        return (
+            inst['cycle_committed'],
+            inst['rob_index'],
+            str(instruction) if instruction else "",
+            self.core._destination_label(instruction, inst['destination']),
+            inst['value'],
+            "Commit"
+        )
 
     def _update_branch_predictor_panel(self):
-        # Limpar tabela
-        self.bp_tree.delete(*self.bp_tree.get_children())
         branch_history = self.core.get_branch_history()
-        for entry in branch_history:
-            pred = "Tomado" if entry['predicted'] else "Não Tomado"
-            res = "Tomado" if entry['actual'] else "Não Tomado"
-            pc = str(entry['pc'])
-            self.bp_tree.insert("", tk.END, values=(pc, pred, res))
+        self.bp_table.show(branch_history)
         # Atualizar métricas
         mispred = self.core.metrics.get('mispredictions', 0)
         self.bp_mispred_label.config(text=f"Mispredictions: {mispred}")
@@ -382,31 +670,24 @@ MUL R9, R8, R3    # R9 = R8 * R3"""
             self.bp_flush_alert.config(text="", background="#f7f4fa")
 
     def _update_committed_instructions_panel(self):
-        # Atualizar tabela de instruções commitadas
-        self.committed_tree.delete(*self.committed_tree.get_children())
-        committed_instructions = self.core._get_committed_instructions_state()
-        
-        for inst in committed_instructions:
-            instruction_str = f"{inst['instruction']['opcode']} {' '.join(inst['instruction']['operands'])}" if inst['instruction'] else ""
-            self.committed_tree.insert('', 'end', values=(
-                inst['cycle_committed'],
-                inst['rob_index'],
-                instruction_str,
-                inst['destination'],
-                inst['value'],
-                "Commit"
-            ))
-        
+        # Atualizar tabela de instruções commitadas (só as linhas visíveis)
+        committed_instructions = self.core.committed_instructions
+        self.committed_table.show(committed_instructions)
+
         # Atualizar métricas de instruções commitadas
-        total_committed = len(committed_instructions)
+        total_committed = len(committed_instructions)  # Inclui os que já saíram da memória
         self.committed_count_label.config(text=f"Total de Instruções Commitadas: {total_committed}")
         
-        if total_committed > 0:
-            last_inst = committed_instructions[-1]
-            last_instruction_str = f"{last_inst['instruction']['opcode']} {' '.join(last_inst['instruction']['operands'])}" if last_inst['instruction'] else ""
+        if committed_instructions.recent:
+            last_inst = committed_instructions.recent[-1]
+            last_instruction_str = str(last_inst['instruction']) if last_inst['instruction'] else ""
             self.committed_last_label.config(text=f"Última instrução commitada: {last_instruction_str}")
         else:
             self.committed_last_label.config(text="Última instrução commitada: -")
 
+    def _update_pipeline_panel(self):
+        if self.pipeline_chart is not None:
+            self.pipeline_chart.update(self.core.committed_instructions)
+
     def run(self):
         self.mainloop()
@@ -0,0 +1,377 @@
+"""
+Históricos de commits e de desvios com memória limitada.
+
+Os históricos só crescem durante a simulação; em execuções longas,
+guardá-los inteiros em memória faria o uso de memória crescer sem limite.
+`HistoryLog` mantém em memória apenas os `capacity` registros mais recentes
+(um buffer circular) e o número total de registros. Opcionalmente, um
+`HistorySink` grava todos os registros em disco (JSON Lines), em lotes, e
+permite percorrer o histórico completo (`HistoryLog.iter_all`).
+
+Os índices são absolutos: `log[i]` é o i-ésimo registro desde o início,
+desde que ainda esteja em memória (ou no disco, com sink). As escritas são
+registradas no journal de desfazer, como nas `JournaledList`.
+"""
+import json
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict, deque
+from itertools import islice
+
+from simulator import config
+
+
+class HistorySink:
+    """Grava registros em um arquivo JSON Lines, em lotes de `batch_size`.
+
+    `encode`/`decode` convertem cada registro de/para um objeto serializável
+    em JSON. O arquivo pode ser truncado (desfazer, volta na linha do
+    tempo): para isso é guardada a posição de cada lote gravado.
+
+    A leitura não força a gravação: os registros pendentes são lidos da
+    memória, e os gravados, lote a lote pelo próprio arquivo aberto. Os
+    últimos `cached_batches` lotes lidos ficam em cache, já separados em
+    linhas, de modo que ler registros vizinhos um a um (tabelas, busca
+    binária) não relê o disco.
+    """
+    cached_batches = 8
+
+    def __init__(self, path, batch_size=None, encode=None, decode=None):
+        self.path = path
+        self.batch_size = config.HISTORY_BATCH_SIZE if batch_size is None else batch_size
+        if self.batch_size <= 0:
+            raise ValueError("O lote deve ter ao menos um registro")
+        self.encode = encode
+        self.decode = decode
+        self.flushed = 0  # Registros já gravados no arquivo
+        self._pending = []
+        # Primeiro registro e posição no arquivo de cada lote gravado
+        self._batch_first = []
+        self._batch_offset = []
+        self._end = 0  # Tamanho do arquivo
+        self._cache = OrderedDict()  # Lote -> linhas, do mais antigo ao mais recente uso
+        self._file = open(path, 'w+b')
+
+    def __len__(self):
+        return self.flushed + len(self._pending)
+
+    def append(self, record):
+        if self.encode is not None:
+            record = self.encode(record)
+        self._pending.append(json.dumps(record).encode('utf-8') + b'\n')
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Grava os registros pendentes."""
+        if not self._pending:
+            return
+        self._file.seek(0, 2)
+        self._batch_first.append(self.flushed)
+        self._batch_offset.append(self._file.tell())
+        self._file.write(b''.join(self._pending))
+        self._file.flush()
+        self._end = self._file.tell()
+        self.flushed += len(self._pending)
+        self._pending = []
+
+    def _locate(self, handle, index):
+        """Posiciona `handle` no início do registro `index` (já gravado)."""
+        batch = bisect_right(self._batch_first, index) - 1
+        handle.seek(self._batch_offset[batch])
+        for _ in range(index - self._batch_first[batch]):
+            handle.readline()
+        return batch
+
+    def truncate(self, length):
+        """Descarta os registros a partir de `length`."""
+        if length >= self.flushed:
+            del self._pending[length - self.flushed:]
+            return
+        self._pending = []
+        batch = self._locate(self._file, length)
+        self._end = self._file.tell()
+        self._file.truncate(self._end)
+        keep = batch + 1 if length > self._batch_first[batch] else batch
+        del self._batch_first[keep:]
+        del self._batch_offset[keep:]
+        for cached in [cached for cached in self._cache if cached >= batch]:
+            del self._cache[cached]  # Lotes cortados ou descartados
+        self.flushed = length
+
+    def _batch_lines(self, batch):
+        """Linhas (ainda em JSON) do lote gravado `batch`."""
+        lines = self._cache.get(batch)
+        if lines is not None:
+            self._cache.move_to_end(batch)
+            return lines
+        start = self._batch_offset[batch]
+        end = self._batch_offset[batch + 1] if batch + 1 < len(self._batch_offset) else self._end
+        self._file.seek(start)
+        lines = self._file.read(end - start).splitlines()
+        self._cache[batch] = lines
+        if len(self._cache) > self.cached_batches:
+            self._cache.popitem(last=False)
+        return lines
+
+    def _decode(self, line):
+        record = json.loads(line)
+        return self.decode(record) if self.decode is not None else record
+
+    def record(self, index):
+        """O registro `index`: dos pendentes ou do lote que o contém."""
+        if index >= self.flushed:
+            return self._decode(self._pending[index - self.flushed])
+        batch = bisect_right(self._batch_first, index) - 1
+        return self._decode(self._batch_lines(batch)[index - self._batch_first[batch]])
+
+    def iter_records(self, start=0):
+        """Percorre os registros a partir de `start`: os gravados, lote a lote, e depois os pendentes."""
+        end = len(self)
+        index = start
+        while index < min(self.flushed, end):
+            batch = bisect_right(self._batch_first, index) - 1
+            first = self._batch_first[batch]
+            for line in self._batch_lines(batch)[index - first:end - first]:
+                yield self._decode(line)
+                index += 1
+        for line in self._pending[index - self.flushed:end - self.flushed]:
+            yield self._decode(line)
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+            self._cache.clear()
+
+
+class HistoryLog:
+    """Histórico que só cresce: guarda em memória os `capacity` registros mais recentes.
+
+    `len(log)` é o número total de registros (inclusive os que já saíram da
+    memória). Com `capacity` igual a 0 não há limite. Com `sink`, todos os
+    registros também são gravados em disco.
+    """
+    _journal = None
+
+    def __init__(self, capacity=None, sink=None):
+        self.capacity = config.HISTORY_CAPACITY if capacity is None else capacity
+        self.recent = deque(maxlen=self.capacity or None)
+        self.total = 0
+        self.sink = sink
+        self._watchers = []
+
+    def __len__(self):
+        return self.total
+
+    @property
+    def first(self):
+        """Índice do registro mais antigo ainda em memória."""
+        return self.total - len(self.recent)
+
+    def __iter__(self):
+        """Percorre os registros em memória (os mais recentes)."""
+        return iter(self.recent)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self.total)
+            if step != 1:
+                raise ValueError("HistoryLog só suporta fatias contíguas")
+            # Registros que já saíram da memória não entram na fatia
+            first = self.first
+            return list(islice(self.recent, max(start - first, 0), max(stop - first, 0)))
+        if index < 0:
+            index += self.total
+        first = self.first
+        if first <= index < self.total:
+            return self.recent[index - first]
+        if 0 <= index < first and self.sink is not None:
+            return self.sink.record(index)
+        raise IndexError("Registro fora do histórico em memória")
+
+    def records(self, start, stop):
+        """Registros [start, stop): da memória ou, os que já saíram dela, do disco."""
+        first = self.first
+        older = []
+        if start < first:
+            if self.sink is None:
+                raise IndexError("Registros fora do histórico em memória")
+            older = list(islice(self.sink.iter_records(start), min(stop, first) - start))
+        return older + self[max(start, first):stop]
+
+    def watch(self, callback):
+        """Chama `callback(length)` sempre que o histórico for truncado (desfazer, volta no tempo)."""
+        self._watchers.append(callback)
+
+    def _log(self, length):
+        journal = self._journal
+        if journal is not None and journal.current is not None:
+            journal.current.append((HistoryLog.truncate, (self, length)))
+
+    def append(self, record):
+        self._log(self.total)
+        self.recent.append(record)
+        self.total += 1
+        if self.sink is not None:
+            self.sink.append(record)
+
+    def extend(self, records):
+        for record in records:
+            self.append(record)
+
+    def truncate(self, length):
+        """Descarta os registros a partir de `length` (desfazer/voltar no tempo)."""
+        if length >= self.total:
+            return
+        # Não é registrado no journal: quem trunca (restore_snapshot, undo) já controla o histórico
+        drop = self.total - length
+        for _ in range(min(drop, len(self.recent))):
+            self.recent.pop()
+        self.total = length
+        if self.sink is not None:
+            self.sink.truncate(length)
+            self._refill()
+        for callback in self._watchers:
+            callback(length)
+
+    def _refill(self):
+        """Recarrega do disco os registros mais antigos que cabem de novo em memória."""
+        missing = self.first if not self.capacity else min(self.first, self.capacity - len(self.recent))
+        if missing > 0:
+            records = list(islice(self.sink.iter_records(self.first - missing), missing))
+            self.recent.extendleft(reversed(records))
+
+    def advance(self, length, records):
+        """Leva o histórico a `length` registros, sendo `records` os últimos deles.
+
+        Usado ao restaurar um checkpoint à frente do estado atual: os
+        registros anteriores a `records` que faltarem são dados como já
+        descartados da memória (o que exige não haver sink).
+        """
+        missing = length - self.total - len(records)
+        if missing > 0:
+            if self.sink is not None:
+                raise ValueError("Registros faltando em um histórico gravado em disco")
+            self.recent.clear()
+            self.total += missing
+        self.extend(records[max(-missing, 0):])
+
+    def clear(self):
+        self.truncate(0)
+
+    def iter_all(self):
+        """Percorre o histórico completo: do disco, com sink, ou só os registros em memória."""
+        if self.sink is None:
+            return iter(self.recent)
+        return self.sink.iter_records()
+
+    def close(self):
+        if self.sink is not None:
+            self.sink.close()
+
+
+def record_filter(pc=None, opcode=None, mispredicted=False):
+    """Filtro de registros dos históricos (None se não houver critério).
+
+    `pc`: PC da instrução; `opcode`: nome da operação ('BEQ'...);
+    `mispredicted`: só desvios com previsão diferente do resultado.
+    """
+    if pc is None and not opcode and not mispredicted:
+        return None
+
+    def accept(record):
+        instruction = record['instruction']
+        if instruction is None:
+            return False
+        return ((pc is None or instruction.pc == pc)
+                and (not opcode or instruction.opcode.name == opcode)
+                and (not mispredicted or ('predicted' in record and record['predicted'] != record['actual'])))
+    return accept
+
+
+class HistoryView:
+    """Visão filtrada de um HistoryLog para tabelas virtualizadas.
+
+    A visão é uma sequência de posições 0..len-1 sobre os registros
+    acessíveis (os em memória ou, com sink, todos). Sem filtro, a posição
+    é só um deslocamento; com filtro, são guardados os índices absolutos
+    dos registros aceitos, atualizados em `refresh()` só com os registros
+    novos (e cortados quando o histórico é truncado). `key` extrai de cada
+    registro um valor crescente (o ciclo), usado em `position_of`.
+    """
+
+    def __init__(self, log, predicate=None, key=None):
+        self.log = log
+        self.predicate = predicate
+        self.key = key
+        self.matches = array('q')  # Índices absolutos aceitos pelo filtro, em ordem
+        self.scanned = 0           # Registros já examinados pelo filtro
+        self._truncated = None     # Menor tamanho do histórico desde o último refresh
+        log.watch(self._on_truncate)
+        self.refresh()
+
+    def set_filter(self, predicate):
+        """Troca o filtro (examina de novo todos os registros acessíveis)."""
+        self.predicate = predicate
+        self.matches = array('q')
+        self.scanned = 0
+        self.refresh()
+
+    def _on_truncate(self, length):
+        if self._truncated is None or length < self._truncated:
+            self._truncated = length
+
+    @property
+    def start(self):
+        """Primeiro registro acessível."""
+        return 0 if self.log.sink is not None else self.log.first
+
+    def refresh(self):
+        """Acompanha o histórico: examina os registros novos e descarta os desfeitos ou perdidos."""
+        log = self.log
+        if self._truncated is not None and self._truncated < self.scanned:
+            del self.matches[bisect_left(self.matches, self._truncated):]
+            self.scanned = self._truncated
+        self._truncated = None
+        start = self.start
+        del self.matches[:bisect_left(self.matches, start)]
+        self.scanned = max(self.scanned, start)
+        if self.predicate is not None and self.scanned < len(log):
+            for index, record in enumerate(log.records(self.scanned, len(log)), self.scanned):
+                if self.predicate(record):
+                    self.matches.append(index)
+        self.scanned = len(log)
+
+    def __len__(self):
+        if self.predicate is None:
+            return len(self.log) - self.start
+        return len(self.matches)
+
+    def index(self, position):
+        """Índice absoluto do registro na posição `position` da visão."""
+        if self.predicate is None:
+            return self.start + position
+        return self.matches[position]
+
+    def rows(self, position, count):
+        """Até `count` pares (índice absoluto, registro) a partir de `position`."""
+        stop = min(position + count, len(self))
+        if position >= stop:
+            return []
+        if self.predicate is None:
+            first = self.index(position)
+            return list(enumerate(self.log.records(first, first + stop - position), first))
+        return [(index, self.log[index]) for index in self.matches[position:stop]]
+
+    def position_of(self, value):
+        """Primeira posição cujo registro tem `key` >= `value` (busca binária)."""
+        low, high = 0, len(self)
+        while low < high:
+            middle = (low + high) // 2
+            index = self.index(middle)
+            if self.key(self.log[index]) < value:
+                low = middle + 1
+            else:
+                high = middle
+        return low
@@ -0,0 +1,82 @@
+"""
+Tabela declarativa do conjunto de instruções (ISA) do simulador.
+
+Cada opcode é descrito por uma única entrada: formato dos operandos, tipo de
+estação de reserva, tipo de unidade de execução, classe ('alu', 'load',
+'store', 'branch' ou 'jump') e a função semântica
+`fn(vj, vk, a)`. Para loads e stores a função calcula o endereço efetivo;
+para branches, se o desvio é tomado (1) ou não (0); para saltos, o valor
+escrito no registrador de ligação (JAL) ou o alvo do salto indireto (JR). As funções usam apenas operadores
+aritméticos e de comparação, de modo que valem tanto para inteiros quanto,
+elemento a elemento, para arrays NumPy (usados pelo motor em lotes).
+Os registradores têm `WORD_BITS` bits com sinal: resultados aritméticos
+dão a volta (complemento de 2), como nos arrays int64 do motor em lotes,
+de modo que o resultado não depende do backend de armazenamento.
+
+A partir da tabela são gerados o enum `Opcode` e tuplas indexadas pelo
+opcode, usadas pelo núcleo para o despacho direto. Adicionar uma instrução
+é acrescentar uma entrada em `ISA` e a sua latência em
+`config.INSTRUCTION_LATENCIES` (a latência é da máquina, não da ISA).
+"""
+from enum import IntEnum
+
+
+class OpSpec:
+    __slots__ = ('name', 'format', 'rs_type', 'unit', 'kind', 'semantics')
+
+    def __init__(self, name, format, rs_type, unit, kind, semantics):
+        self.name = name
+        self.format = format
+        self.rs_type = rs_type
+        self.unit = unit
+        self.kind = kind
+        self.semantics = semantics
+
+
+WORD_BITS = 64
+_SIGN = 1 << (WORD_BITS - 1)
+_MASK = (1 << WORD_BITS) - 1
+
+
+def _wrap(value):
+    """Reduz um resultado a WORD_BITS bits com sinal (arrays NumPy int64 já dão a volta sozinhos)."""
+    if isinstance(value, int):
+        return ((value + _SIGN) & _MASK) - _SIGN
+    return value
+
+
+def _div(vj, vk, a):
+    # Divisão por zero resulta em 0 (sem desvio condicional, para valer também em arrays)
+    return _wrap((vj // (vk + (vk == 0))) * (vk != 0))
+
+
+def _address(vj, vk, a):
+    return _wrap(vj + a)  # Base + deslocamento
+
+
+ISA = (
+    # Instruções aritméticas
+    OpSpec('ADD', 'R', 'INT', 'INT_ALU', 'alu', lambda vj, vk, a: _wrap(vj + vk)),
+    OpSpec('SUB', 'R', 'INT', 'INT_ALU', 'alu', lambda vj, vk, a: _wrap(vj - vk)),
+    OpSpec('MUL', 'R', 'INT', 'FP_MUL', 'alu', lambda vj, vk, a: _wrap(vj * vk)),
+    OpSpec('DIV', 'R', 'INT', 'FP_DIV', 'alu', _div),
+    # Instruções de imediato (vk é o valor imediato)
+    OpSpec('ADDI', 'I', 'INT', 'INT_ALU', 'alu', lambda vj, vk, a: _wrap(vj + vk)),
+    # Instruções de memória
+    OpSpec('LW', 'LOAD', 'MEM', 'MEM_LOAD', 'load', _address),
+    OpSpec('SW', 'STORE', 'MEM', 'MEM_STORE', 'store', _address),
+    # Instruções de branch
+    OpSpec('BEQ', 'BRANCH', 'INT', 'BRANCH', 'branch', lambda vj, vk, a: (vj == vk) * 1),
+    OpSpec('BNE', 'BRANCH', 'INT', 'BRANCH', 'branch', lambda vj, vk, a: (vj != vk) * 1),
+    # Saltos incondicionais (JAL grava o endereço de retorno, o imediato, em R31)
+    OpSpec('J', 'JUMP', 'INT', 'BRANCH', 'jump', lambda vj, vk, a: 0),
+    OpSpec('JAL', 'JUMP', 'INT', 'BRANCH', 'jump', lambda vj, vk, a: vk),
+    OpSpec('JR', 'JR', 'INT', 'BRANCH', 'jump', lambda vj, vk, a: vj),
+)
+
+Opcode = IntEnum('Opcode', [(spec.name, value) for value, spec in enumerate(ISA)])
+
+# Tabelas de despacho, indexadas pelo valor do opcode
+SEMANTICS = tuple(spec.semantics for spec in ISA)
+UNIT_TYPES = tuple(spec.unit for spec in ISA)
+IS_LOAD = tuple(spec.kind == 'load' for spec in ISA)
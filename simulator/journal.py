@@ -0,0 +1,205 @@
+"""
+Journal de desfazer (undo) do simulador.
+
+Em vez de copiar todo o estado do núcleo a cada ciclo, cada escrita em um
+objeto "journaled" registra apenas o valor antigo do campo alterado. Voltar
+um ciclo reaplica esses valores antigos em ordem inversa, com custo
+proporcional ao número de alterações feitas no ciclo.
+"""
+import operator
+from collections import deque
+
+from simulator import config
+
+_MISSING = object()
+
+
+def _restore_attr(obj, name, old):
+    if old is _MISSING:
+        object.__delattr__(obj, name)
+    else:
+        object.__setattr__(obj, name, old)
+
+
+def _restore_item(container, key, old):
+    if old is _MISSING:
+        del container[key]
+    else:
+        container[key] = old
+
+
+class UndoJournal:
+    """Guarda, por ciclo, a lista de operações que desfazem as escritas do ciclo.
+
+    `budget` limita o número total de operações guardadas; quando é
+    excedido, os ciclos mais antigos são descartados. Com `budget` igual a 0
+    nada é registrado.
+    """
+
+    def __init__(self, budget=None):
+        self.budget = config.UNDO_BUDGET if budget is None else budget
+        self.records = deque()
+        self.current = None  # Lista de operações do ciclo em andamento
+        self.size = 0
+
+    def attach(self, *objects):
+        """Faz com que as escritas nos objetos passem a ser registradas neste journal."""
+        for obj in objects:
+            object.__setattr__(obj, '_journal', self)
+
+    def begin(self):
+        """Abre o registro de um novo ciclo."""
+        if self.budget > 0:
+            self.current = []
+
+    def end(self):
+        """Fecha o registro do ciclo atual, descartando o histórico mais antigo se necessário."""
+        record = self.current
+        self.current = None
+        if not record:
+            return
+        self.records.append(record)
+        self.size += len(record)
+        while self.size > self.budget and self.records:
+            self.size -= len(self.records.popleft())
+
+    def log(self, undo, *args):
+        """Registra uma operação arbitrária de desfazer para o ciclo atual."""
+        if self.current is not None:
+            self.current.append((undo, args))
+
+    def undo(self):
+        """Desfaz o último ciclo registrado. Retorna False se não houver histórico."""
+        if not self.records:
+            return False
+        record = self.records.pop()
+        self.size -= len(record)
+        for undo, args in reversed(record):
+            undo(*args)
+        return True
+
+    def clear(self):
+        self.records.clear()
+        self.current = None
+        self.size = 0
+
+    def __len__(self):
+        return len(self.records)
+
+    def __deepcopy__(self, memo):
+        # O journal pertence ao núcleo, não ao estado copiado
+        return self
+
+
+class Journaled:
+    """Mixin que registra no journal o valor antigo de cada atributo escrito."""
+    __slots__ = ()
+    _journal = None
+
+    def __setattr__(self, name, value):
+        journal = self._journal
+        if journal is not None and journal.current is not None:
+            journal.current.append((_restore_attr, (self, name, getattr(self, name, _MISSING))))
+        object.__setattr__(self, name, value)
+
+    def _write(self, table, index, value):
+        """Escreve `table[index]` (ex.: em um `array`) registrando o valor antigo no journal do objeto."""
+        journal = self._journal
+        if journal is not None and journal.current is not None:
+            journal.current.append((operator.setitem, (table, index, table[index])))
+        table[index] = value
+
+
+class JournaledDict(dict):
+    """Dicionário cujas escritas são registradas no journal."""
+    _journal = None
+
+    def _log(self, key):
+        journal = self._journal
+        if journal is not None and journal.current is not None:
+            journal.current.append((_restore_item, (self, key, dict.get(self, key, _MISSING))))
+
+    def __setitem__(self, key, value):
+        self._log(key)
+        dict.__setitem__(self, key, value)
+
+    def __delitem__(self, key):
+        self._log(key)
+        dict.__delitem__(self, key)
+
+    def pop(self, key, *default):
+        if key in self:
+            self._log(key)
+        return dict.pop(self, key, *default)
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return dict.__getitem__(self, key)
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def clear(self):
+        for key in list(self):
+            del self[key]
+
+
+class JournaledList(list):
+    """Lista cujas alterações são registradas no journal."""
+    _journal = None
+
+    def _log(self, undo, *args):
+        journal = self._journal
+        if journal is not None and journal.current is not None:
+            journal.current.append((undo, (self,) + args))
+
+    def append(self, item):
+        self._log(list.pop)
+        list.append(self, item)
+
+    def extend(self, items):
+        for item in items:
+            self.append(item)
+
+    def insert(self, index, item):
+        index = min(max(index + len(self) if index < 0 else index, 0), len(self))
+        self._log(list.pop, index)
+        list.insert(self, index, item)
+
+    def pop(self, index=-1):
+        if index < 0:
+            index += len(self)
+        item = list.pop(self, index)
+        self._log(list.insert, index, item)
+        return item
+
+    def remove(self, item):
+        self.pop(self.index(item))
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                raise ValueError("JournaledList só suporta atribuição a fatias contíguas")
+            value = list(value)
+            self._log(list.__setitem__, slice(start, start + len(value)), list.__getitem__(self, index))
+        else:
+            self._log(list.__setitem__, index, list.__getitem__(self, index))
+        list.__setitem__(self, index, value)
+
+    def __delitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                raise ValueError("JournaledList só suporta remoção de fatias contíguas")
+            self._log(list.__setitem__, slice(start, start), list.__getitem__(self, index))
+        else:
+            if index < 0:
+                index += len(self)
+            self._log(list.insert, index, list.__getitem__(self, index))
+        list.__delitem__(self, index)
+
+    def clear(self):
+        del self[:]
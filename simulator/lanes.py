@@ -0,0 +1,427 @@
+"""
+Simulação em lotes: N núcleos independentes avançando em lockstep.
+
+Para estudos de Monte-Carlo o mesmo programa é executado com muitos valores
+iniciais de registradores e imagens de memória. Em vez de N objetos
+`TomasuloCore`, `LaneBatch` guarda o estado de todos os núcleos em arrays
+NumPy com uma dimensão inicial de "lanes" (um núcleo por lane) e executa
+cada fase do ciclo (commit, execução, despacho, escrita de resultados e
+flush) de forma vetorizada. Lanes que divergem nos desvios seguem caminhos
+diferentes por meio de máscaras; uma lane que terminou para de contar
+ciclos.
+
+O modelo é o mesmo do `TomasuloCore` (mesma ordem de fases, seleção dos
+mais antigos, latências, penalidade de desvio, preditor de 1 bit global,
+loads esperando stores mais antigos), de modo que cada lane termina com os
+mesmos ciclos, métricas, registradores e memória (os valores são inteiros
+de 64 bits, a largura dos registradores da ISA). Diferença: a memória de
+cada lane é um array de tamanho fixo
+(um load ou store commitado com endereço fora dele gera IndexError; no
+caminho errado, o load lê 0, como um endereço não escrito no núcleo).
+
+Como cada entrada do ROB ocupa exatamente uma estação de reserva do
+despacho ao commit, os campos da estação (Vj, Vk, Qj, Qk, ...) ficam na
+própria entrada do ROB; das estações basta contar as ocupadas por tipo.
+"""
+import numpy as np
+
+from simulator import config
+from simulator.isa import ISA, SEMANTICS
+from simulator.parser import parse_program, parse_register
+
+NUM_REGISTERS = 32
+METRICS = ('stalls', 'bubbles', 'mispredictions', 'completed_instructions')
+
+
+class LaneBatch:
+    """`lanes` cópias de um núcleo de Tomasulo executando `program` em lockstep.
+
+    `registers` é um array (lanes, 32) ou (32,) com os valores iniciais e
+    `memory` um array (lanes, M) ou (M,) com a imagem inicial da memória
+    (por padrão, zeros com `memory_size` posições).
+    """
+
+    def __init__(self, program, lanes, machine=None, registers=None, memory=None, memory_size=1024):
+        self.machine = machine or config.MachineConfig()
+        if self.machine.branch_predictor != '1bit' or self.machine.btb_entries:
+            raise ValueError("O LaneBatch só implementa o preditor '1bit', sem BTB")
+        instructions, _ = parse_program(program)
+        self._load_program(instructions)
+        self.lanes = lanes
+        size = self.rob_size = self.machine.rob_size
+        self.rs_types = list(self.machine.reservation_stations)
+        self.unit_types = list(self.machine.execution_units)
+        self.rs_capacity = np.array([self.machine.reservation_stations[t] for t in self.rs_types])
+        self.unit_capacity = np.array([self.machine.execution_units[t] for t in self.unit_types])
+        for spec in ISA:
+            if (not self.machine.reservation_stations.get(spec.rs_type) or not self.machine.execution_units.get(spec.unit)
+                    or spec.name not in self.machine.instruction_latencies):
+                raise ValueError(f"A máquina não tem estações/unidades/latência para {spec.name}")
+        self._rs_of = np.array([self.rs_types.index(spec.rs_type) for spec in ISA])[self.opcode]
+        self._unit_of = np.array([self.unit_types.index(spec.unit) for spec in ISA])[self.opcode]
+
+        # Estado por lane
+        self.cycle = np.zeros(lanes, dtype=np.int64)
+        self.pc = np.zeros(lanes, dtype=np.int64)
+        self.head = np.zeros(lanes, dtype=np.int64)
+        self.tail = np.zeros(lanes, dtype=np.int64)
+        self.count = np.zeros(lanes, dtype=np.int64)
+        self.fetch_stall = np.zeros(lanes, dtype=np.int64)
+        self.flush_needed = np.zeros(lanes, dtype=bool)
+        self.flush_slot = np.zeros(lanes, dtype=np.int64)
+        self.flush_target = np.zeros(lanes, dtype=np.int64)
+        self.bp_last = np.zeros(lanes, dtype=bool)  # Bit global do preditor de 1 bit
+        self.rs_busy = np.zeros((lanes, len(self.rs_types)), dtype=np.int64)
+        self.metrics = {name: np.zeros(lanes, dtype=np.int64) for name in METRICS}
+
+        self.registers = np.zeros((lanes, NUM_REGISTERS), dtype=np.int64)
+        if registers is not None:
+            self.registers[:] = registers
+        self.tags = np.full((lanes, NUM_REGISTERS), -1, dtype=np.int64)
+        if memory is None:
+            self.memory = np.zeros((lanes, memory_size), dtype=np.int64)
+        else:
+            memory = np.asarray(memory, dtype=np.int64)
+            self.memory = np.array(np.broadcast_to(memory, (lanes, memory.shape[-1])))
+
+        # Entradas do ROB (com os campos da estação de reserva correspondente)
+        shape = (lanes, size)
+        self.occupied = np.zeros(shape, dtype=bool)
+        self.ip = np.zeros(shape, dtype=np.int64)  # Índice da instrução
+        self.ready = np.zeros(shape, dtype=bool)   # Resultado já escrito (Writeback)
+        self.value = np.zeros(shape, dtype=np.int64)
+        self.store_address = np.zeros(shape, dtype=np.int64)
+        self.bad_address = np.zeros(shape, dtype=bool)  # Load executado com endereço fora da memória
+        self.predicted_taken = np.zeros(shape, dtype=bool)
+        self.old_tag = np.full(shape, -1, dtype=np.int64)
+        self.vj = np.zeros(shape, dtype=np.int64)
+        self.vk = np.zeros(shape, dtype=np.int64)
+        self.qj = np.full(shape, -1, dtype=np.int64)
+        self.qk = np.full(shape, -1, dtype=np.int64)
+        self.dispatched = np.zeros(shape, dtype=bool)  # Já entregue a uma unidade de execução
+        self.cycles_remaining = np.zeros(shape, dtype=np.int64)
+        self.dispatch_cycle = np.zeros(shape, dtype=np.int64)
+        self.slot_unit = np.zeros(shape, dtype=np.int64)  # Tipo de unidade, load e store de cada entrada
+        self.slot_load = np.zeros(shape, dtype=bool)
+        self.slot_store = np.zeros(shape, dtype=bool)
+        self._slots = np.arange(size)
+        self._lane_index = np.arange(lanes)
+
+    def _load_program(self, instructions):
+        """Converte as instruções decodificadas em arrays indexados pelo PC."""
+        if any(instruction.is_jump for instruction in instructions):
+            raise ValueError("O LaneBatch não suporta saltos (J, JAL, JR)")
+        self.num_instructions = len(instructions)
+        # Uma posição extra (nunca executada) permite indexar com PCs fora do programa
+        rows = instructions + instructions[-1:] if instructions else []
+
+        def column(get, default=0):
+            return np.array([get(i) for i in rows] or [default], dtype=np.int64)
+
+        self.opcode = column(lambda i: int(i.opcode))
+        self.rd = column(lambda i: -1 if i.rd is None else i.rd, -1)
+        self.rs1 = column(lambda i: -1 if i.rs1 is None else i.rs1, -1)
+        self.rs2 = column(lambda i: -1 if i.rs2 is None else i.rs2, -1)
+        self.imm = column(lambda i: i.imm or 0)
+        self.offset = column(lambda i: i.offset or 0)
+        self.target_pc = column(lambda i: i.target_pc)
+        self.latency = np.array([self.machine.latency(ISA[i.opcode].name) for i in rows] or [1])
+        self.is_branch = column(lambda i: i.is_branch).astype(bool)
+        self.is_load = column(lambda i: i.is_load).astype(bool)
+        self.is_store = column(lambda i: i.is_store).astype(bool)
+
+    # ------------------------------------------------------------------
+    # Execução
+
+    def active(self):
+        """Lanes que ainda têm trabalho (mesma condição de TomasuloCore._has_work_to_do)."""
+        return (self.pc < self.num_instructions) | (self.count > 0)
+
+    def run(self, max_cycles=None):
+        """Executa até todas as lanes terminarem ou até `max_cycles`. Retorna a máscara das lanes que terminaram."""
+        max_cycles = config.MAX_CYCLES if max_cycles is None else max_cycles
+        for _ in range(max_cycles):
+            if not self.step():
+                break
+        return ~self.active()
+
+    def step(self):
+        """Avança todas as lanes ativas um ciclo. Retorna False se nenhuma lane tem trabalho."""
+        active = self.active()
+        if not active.any():
+            return False
+        flushing = active & self.flush_needed
+        normal = active & ~self.flush_needed
+        if flushing.any():
+            self._flush(flushing)
+        if normal.any():
+            self._commit(normal)
+            lanes, slots, results = self._execute(normal)
+            self._issue(normal & ~self.flush_needed)
+            self._write_result(lanes, slots, results)
+        self.cycle[active] += 1
+        return True
+
+    def _ages(self):
+        return (self._slots[None, :] - self.head[:, None]) % self.rob_size
+
+    def _commit(self, mask):
+        go = mask.copy()
+        for _ in range(self.machine.commit_width):
+            head = self.head
+            go &= self.occupied[self._lane_index, head] & self.ready[self._lane_index, head]
+            lanes = np.flatnonzero(go)
+            if not len(lanes):
+                break
+            slots = head[lanes]
+            ip = self.ip[lanes, slots]
+            values = self.value[lanes, slots]
+            store = self.is_store[ip]
+            if (self.bad_address[lanes, slots] & self.is_load[ip]).any():
+                self._address_error()
+            self._store(lanes[store], self.store_address[lanes[store], slots[store]], values[store])
+            rd = self.rd[ip]
+            writes = (rd >= 0) & ~store
+            w_lanes, w_rd, w_slots = lanes[writes], rd[writes], slots[writes]
+            self.registers[w_lanes, w_rd] = values[writes]
+            clear = self.tags[w_lanes, w_rd] == w_slots
+            self.tags[w_lanes[clear], w_rd[clear]] = -1
+            np.subtract.at(self.rs_busy, (lanes, self._rs_of[ip]), 1)
+            self.occupied[lanes, slots] = False
+            self.head[lanes] = (slots + 1) % self.rob_size
+            self.count[lanes] -= 1
+            self.metrics['completed_instructions'][lanes] += 1
+
+    def _execute(self, mask):
+        size = self.rob_size
+        occupied = self.occupied & mask[:, None]
+        queued = occupied & ~self.dispatched & (self.qj < 0) & (self.qk < 0)
+        if (queued & self.slot_load).any():
+            # Loads esperam o commit de todos os stores mais antigos
+            ages = self._ages()
+            oldest_store = np.where(occupied & self.slot_store, ages, size).min(axis=1)
+            queued &= ~self.slot_load | (ages < oldest_store[:, None])
+
+        # Seleção: em cada lane e tipo de unidade, as estações prontas mais antigas ocupam as unidades livres
+        lanes, slots = np.nonzero(occupied & self.dispatched & (self.cycles_remaining > 0))
+        q_lanes, q_slots = np.nonzero(queued)
+        if len(q_lanes):
+            units = len(self.unit_types)
+            group = q_lanes * units + self.slot_unit[q_lanes, q_slots]
+            busy = np.bincount(lanes * units + self.slot_unit[lanes, slots], minlength=self.lanes * units)
+            free = self.unit_capacity[group % units] - busy[group]
+            order = np.lexsort(((q_slots - self.head[q_lanes]) % size, group))
+            sorted_group = group[order]
+            starts = np.r_[True, sorted_group[1:] != sorted_group[:-1]]
+            position = np.arange(len(order))
+            rank = np.empty_like(position)
+            rank[order] = position - np.maximum.accumulate(np.where(starts, position, 0))
+            chosen = rank < free
+            c_lanes, c_slots = q_lanes[chosen], q_slots[chosen]
+            self.dispatched[c_lanes, c_slots] = True
+            self.dispatch_cycle[c_lanes, c_slots] = self.cycle[c_lanes]
+            lanes, slots = np.concatenate((lanes, c_lanes)), np.concatenate((slots, c_slots))
+
+        self.cycles_remaining[lanes, slots] -= 1
+        done = self.cycles_remaining[lanes, slots] == 0
+        lanes, slots = lanes[done], slots[done]
+        if not len(lanes):
+            return lanes, slots, np.zeros(0, dtype=np.int64)
+
+        ip = self.ip[lanes, slots]
+        opcode = self.opcode[ip]
+        vj, vk, a = self.vj[lanes, slots], self.vk[lanes, slots], self.offset[ip]
+        results = np.zeros(len(lanes), dtype=np.int64)
+        for op in np.unique(opcode):
+            m = opcode == op
+            results[m] = SEMANTICS[op](vj[m], vk[m], a[m])
+
+        load = self.is_load[ip]
+        if load.any():
+            results[load] = self._load(lanes[load], slots[load], results[load])
+        store = self.is_store[ip]
+        if store.any():
+            # O endereço efetivo é guardado; a memória só é escrita no commit
+            self.store_address[lanes[store], slots[store]] = results[store]
+            results[store] = vk[store]
+        branch = self.is_branch[ip]
+        if branch.any():
+            self._resolve_branches(lanes[branch], slots[branch], ip[branch], results[branch] != 0)
+        return lanes, slots, results
+
+    def _resolve_branches(self, lanes, slots, ip, taken):
+        mispredicted = self.predicted_taken[lanes, slots] != taken
+        np.add.at(self.metrics['mispredictions'], lanes[mispredicted], 1)
+
+        # O preditor fica com o resultado do último desvio na ordem de alocação das unidades
+        # (ciclo de despacho, tipo de unidade, idade), como no núcleo
+        age = (slots - self.head[lanes]) % self.rob_size
+        key = (self.dispatch_cycle[lanes, slots] * len(self.unit_types) + self._unit_of[ip]) * self.rob_size + age
+        order = np.lexsort((key, lanes))
+        last = order[np.r_[lanes[order][1:] != lanes[order][:-1], True]]
+        self.bp_last[lanes[last]] = taken[last]
+
+        # Flush: vale o desvio errado mais antigo de cada lane
+        if mispredicted.any():
+            m_lanes, m_slots, m_ip, m_taken = lanes[mispredicted], slots[mispredicted], ip[mispredicted], taken[mispredicted]
+            order = np.lexsort((age[mispredicted], m_lanes))
+            first = order[np.r_[True, m_lanes[order][1:] != m_lanes[order][:-1]]]
+            f_lanes = m_lanes[first]
+            self.flush_needed[f_lanes] = True
+            self.flush_slot[f_lanes] = m_slots[first]
+            self.flush_target[f_lanes] = np.where(m_taken[first], self.target_pc[m_ip[first]], m_ip[first] + 1)
+
+    def _issue(self, mask):
+        stalled = mask & (self.fetch_stall > 0)
+        if stalled.any():
+            # Penalidade de desvio: o front-end ainda está sendo redirecionado
+            self.fetch_stall[stalled] -= 1
+            self.metrics['bubbles'][stalled & (self.pc < self.num_instructions)] += 1
+        go = mask & ~stalled
+        size = self.rob_size
+        for _ in range(self.machine.issue_width):
+            go &= self.pc < self.num_instructions
+            full = go & (self.count >= size)
+            self.metrics['stalls'][full] += 1
+            go &= ~full
+            pc = np.minimum(self.pc, self.num_instructions)
+            rs_type = self._rs_of[pc]
+            no_station = go & (self.rs_busy[self._lane_index, rs_type] >= self.rs_capacity[rs_type])
+            self.metrics['stalls'][no_station] += 1
+            go &= ~no_station
+            lanes = np.flatnonzero(go)
+            if not len(lanes):
+                break
+            slots = self.tail[lanes]
+            ip = self.pc[lanes]
+            self.occupied[lanes, slots] = True
+            self.ip[lanes, slots] = ip
+            self.slot_unit[lanes, slots] = self._unit_of[ip]
+            self.slot_load[lanes, slots] = self.is_load[ip]
+            self.slot_store[lanes, slots] = self.is_store[ip]
+            self.ready[lanes, slots] = False
+            self.dispatched[lanes, slots] = False
+            self.cycles_remaining[lanes, slots] = self.latency[ip]
+            self.vj[lanes, slots], self.qj[lanes, slots] = self._read_operand(lanes, self.rs1[ip])
+            vk, qk = self._read_operand(lanes, self.rs2[ip])
+            has_rs2 = self.rs2[ip] >= 0
+            self.vk[lanes, slots] = np.where(has_rs2, vk, self.imm[ip])
+            self.qk[lanes, slots] = np.where(has_rs2, qk, -1)
+            # Renomeação do registrador de destino (depois da leitura dos operandos)
+            rd = self.rd[ip]
+            writes = rd >= 0
+            w_lanes, w_rd = lanes[writes], rd[writes]
+            self.old_tag[w_lanes, slots[writes]] = self.tags[w_lanes, w_rd]
+            self.tags[w_lanes, w_rd] = slots[writes]
+            # Predição e PC especulativo
+            branch = self.is_branch[ip]
+            predicted = branch & self.bp_last[lanes]
+            self.predicted_taken[lanes, slots] = predicted
+            self.pc[lanes] = np.where(predicted, self.target_pc[ip], ip + 1)
+            go[lanes[predicted]] = False  # Para no branch previsto como tomado
+            self.tail[lanes] = (slots + 1) % size
+            self.count[lanes] += 1
+            np.add.at(self.rs_busy, (lanes, rs_type[lanes]), 1)
+
+    def _read_operand(self, lanes, reg):
+        """Valor e tag (-1 se pronto) do registrador fonte `reg` em cada lane."""
+        has_reg = reg >= 0
+        reg = np.maximum(reg, 0)
+        tag = self.tags[lanes, reg]
+        renamed = has_reg & (tag >= 0)
+        slot = np.maximum(tag, 0)
+        producer_ready = self.ready[lanes, slot]
+        value = np.where(renamed, np.where(producer_ready, self.value[lanes, slot], 0), self.registers[lanes, reg])
+        value = np.where(has_reg, value, 0)
+        return value, np.where(renamed & ~producer_ready, tag, -1)
+
+    def _write_result(self, lanes, slots, results):
+        if not len(lanes):
+            return
+        self.value[lanes, slots] = results
+        self.ready[lanes, slots] = True
+        # CDB: acorda as estações que esperam pelas tags escritas neste ciclo (só nas lanes com resultados)
+        rows = np.unique(lanes)
+        written = np.zeros((len(rows), self.rob_size), dtype=bool)
+        written[np.searchsorted(rows, lanes), slots] = True
+        values = self.value[rows]
+        occupied = self.occupied[rows]
+        for q, v in ((self.qj, self.vj), (self.qk, self.vk)):
+            q_rows = q[rows]
+            tag = np.maximum(q_rows, 0)
+            wake_rows, wake_slots = np.nonzero(occupied & (q_rows >= 0) & np.take_along_axis(written, tag, axis=1))
+            if len(wake_rows):
+                wake_lanes = rows[wake_rows]
+                v[wake_lanes, wake_slots] = values[wake_rows, tag[wake_rows, wake_slots]]
+                q[wake_lanes, wake_slots] = -1
+
+    def _flush(self, mask):
+        size = self.rob_size
+        rows = np.flatnonzero(mask)
+        head = self.head[rows]
+        ages = (self._slots[None, :] - head[:, None]) % size
+        branch_age = (self.flush_slot[rows] - head) % size
+        squashed = self.occupied[rows] & (ages > branch_age[:, None])
+        ip = self.ip[rows]
+
+        # Os tags voltam ao valor anterior ao escritor descartado mais antigo de cada registrador
+        # (equivale a percorrer os descartados do mais novo para o mais antigo)
+        rd = self.rd[ip]
+        s_rows, s_slots = np.nonzero(squashed & (rd >= 0))
+        if len(s_rows):
+            oldest = np.full((len(rows), NUM_REGISTERS), size, dtype=np.int64)
+            np.minimum.at(oldest, (s_rows, rd[s_rows, s_slots]), ages[s_rows, s_slots])
+            r_rows, r_regs = np.nonzero(oldest < size)
+            age = oldest[r_rows, r_regs]
+            lanes = rows[r_rows]
+            old = self.old_tag[lanes, (head[r_rows] + age) % size]
+            # Produtor anterior já commitado: o valor está no banco de registradores
+            valid = (old >= 0) & ((old - head[r_rows]) % size < age)
+            self.tags[lanes, r_regs] = np.where(valid, old, -1)
+
+        rs_type = self._rs_of[ip]
+        for t in range(len(self.rs_types)):
+            self.rs_busy[rows, t] -= (squashed & (rs_type == t)).sum(axis=1)
+        self.occupied[rows] &= ~squashed
+        self.tail[rows] = (self.flush_slot[rows] + 1) % size
+        self.count[rows] = branch_age + 1
+        self.pc[rows] = self.flush_target[rows]
+        self.metrics['bubbles'][rows] += 1  # O ciclo do flush conta como o primeiro ciclo da penalidade
+        self.fetch_stall[rows] = self.machine.branch_penalty - 1
+        self.flush_needed[rows] = False
+
+    def _load(self, lanes, slots, addresses):
+        """Lê a memória; endereços fora dela leem 0 e só geram erro se o load for commitado."""
+        size = self.memory.shape[1]
+        valid = (addresses >= 0) & (addresses < size)
+        self.bad_address[lanes, slots] = ~valid
+        return np.where(valid, self.memory[lanes, np.clip(addresses, 0, size - 1)], 0)
+
+    def _store(self, lanes, addresses, values):
+        if len(lanes):
+            if addresses.min() < 0 or addresses.max() >= self.memory.shape[1]:
+                self._address_error()
+            self.memory[lanes, addresses] = values
+
+    def _address_error(self):
+        raise IndexError(f"Endereço de memória fora da imagem de {self.memory.shape[1]} posições")
+
+    # ------------------------------------------------------------------
+    # Resultados
+
+    def ipc(self):
+        return np.where(self.cycle > 0, self.metrics['completed_instructions'] / np.maximum(self.cycle, 1), 0.0)
+
+    def register_values(self, name):
+        """Valores do registrador `name` ('R1', ...) em todas as lanes."""
+        return self.registers[:, parse_register(name)]
+
+
+def simulate_lanes(program, registers=None, memory=None, lanes=None, machine=None, max_cycles=None, memory_size=1024):
+    """Simula `program` em várias lanes (uma por linha de `registers`/`memory`) e retorna o LaneBatch final."""
+    if lanes is None:
+        shapes = [np.shape(x)[0] for x in (registers, memory) if x is not None and np.ndim(x) == 2]
+        lanes = shapes[0] if shapes else 1
+    batch = LaneBatch(program, lanes, machine, registers, memory, memory_size)
+    batch.run(max_cycles)
+    return batch
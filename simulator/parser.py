@@ -1,44 +1,161 @@
-def parse_instruction(line):
-    """Parse uma instrução MIPS, ignorando comentários."""
+from simulator.isa import ISA, Opcode
+
+
+# Número de operandos aceitos por formato (LW/SW: 'off(base)', 'off' ou 'base, off')
+_OPERAND_COUNTS = {'R': (3,), 'I': (3,), 'LOAD': (2, 3), 'STORE': (2, 3), 'BRANCH': (3,), 'JUMP': (1,), 'JR': (1,)}
+LINK_REGISTER = 31  # Registrador de ligação do JAL (endereço de retorno)
+
+
+class Instruction:
+    """Instrução já decodificada: nada precisa ser reinterpretado a partir de strings na simulação.
+
+    `rd` é o registrador de destino (None para branches e stores), `rs1` e
+    `rs2` os registradores fonte, `imm` o imediato usado como operando (ADDI)
+    e `offset` o deslocamento do endereço de memória (LW/SW). `is_jump`
+    marca os saltos incondicionais (J, JAL, JR) e `is_indirect` os de alvo
+    vindo de registrador (JR, cujo `target_pc` é -1).
+    """
+    __slots__ = ('opcode', 'operands', 'pc', 'rd', 'rs1', 'rs2', 'imm', 'offset', 'rs_type', 'unit', 'latency',
+                 'is_branch', 'is_jump', 'is_indirect', 'is_load', 'is_store', 'label', 'target_pc')
+
+    def __init__(self, opcode, operands, pc=0):
+        self.opcode = opcode
+        self.operands = operands  # Texto original dos operandos, para exibição
+        self.pc = pc
+        self.rd = None
+        self.rs1 = None
+        self.rs2 = None
+        self.imm = None
+        self.offset = None
+        spec = ISA[opcode]
+        self.rs_type = spec.rs_type
+        self.unit = spec.unit
+        self.latency = None  # Depende da máquina: definida pelo núcleo ao carregar o programa
+        self.is_branch = spec.kind == 'branch'
+        self.is_jump = spec.kind == 'jump'
+        self.is_indirect = spec.format == 'JR'
+        self.is_load = spec.kind == 'load'
+        self.is_store = spec.kind == 'store'
+        self.label = None
+        self.target_pc = -1
+
+    def __str__(self):
+        return f"{self.opcode.name} {' '.join(self.operands)}"
+
+    def __repr__(self):
+        return f"Instruction(pc={self.pc}, {str(self)!r})"
+
+
+def parse_register(name):
+    """Converte o nome de um registrador ('R0'..'R31') no seu índice."""
+    if name[:1] in ('R', 'r') and name[1:].isdigit() and int(name[1:]) < 32:
+        return int(name[1:])
+    raise ValueError(f"Registrador inválido: {name!r}")
+
+
+def _parse_immediate(text):
+    try:
+        return int(text)
+    except ValueError:
+        raise ValueError(f"Imediato inválido: {text!r}") from None
+
+
+def _parse_address(operands):
+    """Decodifica o endereço de LW/SW: 'off(base)', 'off' (base R0) ou 'base, off'."""
+    if len(operands) == 1:
+        text = operands[0]
+        if text.endswith(')') and '(' in text:
+            offset, base = text[:-1].split('(', 1)
+            return parse_register(base.strip()), _parse_immediate(offset or '0')
+        return 0, _parse_immediate(text)
+    if len(operands) == 2:
+        return parse_register(operands[0]), _parse_immediate(operands[1])
+    raise ValueError(f"Endereço de memória inválido: {' '.join(operands)!r}")
+
+
+def parse_instruction(line, pc=0, labels=None):
+    """Parse uma instrução MIPS, ignorando comentários.
+
+    Retorna um `Instruction` já decodificado. Com `labels`, o alvo dos
+    branches e de J/JAL é resolvido para um PC (`target_pc`); o alvo também
+    pode ser dado diretamente como um número.
+    """
     # Remove comentários da linha
     line_without_comments = line.split('#')[0].strip()
-    
+
     parts = line_without_comments.replace(',', ' ').split()
     if not parts or not parts[0]:
         return None
-    
-    opcode = parts[0]
-    
+
+    mnemonic = parts[0].upper()
+
     # Ignorar 'FIM' (case insensitive)
-    if opcode.upper() == 'FIM':
+    if mnemonic == 'FIM':
         return None
-    
+
+    if mnemonic not in Opcode.__members__:
+        raise ValueError(f"Instrução desconhecida: {parts[0]!r}")
+
     operands = parts[1:] if len(parts) > 1 else []
-    
-    return {
-        'opcode': opcode,
-        'operands': operands,
-        'type': _get_instruction_type(opcode)
-    }
-
-def _get_instruction_type(opcode):
-    """Retorna o tipo da instrução baseado no opcode"""
-    instruction_types = {
-        # Instruções aritméticas
-        'ADD': 'INT',
-        'SUB': 'INT', 
-        'MUL': 'INT',
-        'DIV': 'INT',
-        
-        # Instruções de imediato
-        'ADDI': 'INT',
-        
-        # Instruções de memória
-        'LW': 'MEM',
-        'SW': 'MEM',
-        
-        # Instruções de branch
-        'BEQ': 'BRANCH',
-        'BNE': 'BRANCH'
-    }
-    return instruction_types.get(opcode, 'INT')
+    instruction = Instruction(Opcode[mnemonic], operands, pc)
+    instruction_format = ISA[instruction.opcode].format
+    if len(operands) not in _OPERAND_COUNTS[instruction_format]:
+        raise ValueError(f"{line_without_comments}: número de operandos inválido")
+    if instruction_format == 'R':
+        rd, rs1, rs2 = operands
+        instruction.rd, instruction.rs1, instruction.rs2 = parse_register(rd), parse_register(rs1), parse_register(rs2)
+    elif instruction_format == 'I':
+        rd, rs1, imm = operands
+        instruction.rd, instruction.rs1, instruction.imm = parse_register(rd), parse_register(rs1), _parse_immediate(imm)
+    elif instruction_format == 'LOAD':
+        instruction.rd = parse_register(operands[0])
+        instruction.rs1, instruction.offset = _parse_address(operands[1:])
+    elif instruction_format == 'STORE':
+        # SW não tem destino: rs2 é o valor a ser gravado e rs1 a base do endereço
+        instruction.rs2 = parse_register(operands[0])
+        instruction.rs1, instruction.offset = _parse_address(operands[1:])
+    elif instruction_format == 'JR':
+        instruction.rs1 = parse_register(operands[0])
+    else:
+        if instruction_format == 'BRANCH':
+            rs1, rs2, label = operands
+            instruction.rs1, instruction.rs2 = parse_register(rs1), parse_register(rs2)
+        else:
+            label, = operands
+            if instruction.opcode == Opcode.JAL:
+                instruction.rd, instruction.imm = LINK_REGISTER, pc + 1
+        instruction.label = label
+        if label.isdigit():
+            instruction.target_pc = int(label)  # Alvo dado diretamente como PC
+        elif labels is not None:
+            if label not in labels:
+                raise ValueError(f"Label não encontrada: {label!r}")
+            instruction.target_pc = labels[label]
+
+    return instruction
+
+
+def parse_program(program_text):
+    """Decodifica um programa MIPS inteiro. Retorna (instruções, mapa label -> PC)."""
+    # Primeiro passo: Mapear todas as labels para seus PCs
+    label_map = {}
+    current_pc = 0
+    parsed_lines = []
+    for line in program_text.strip().split('\n'):
+        # Comentários são removidos antes, para que 'label: # ...' não conte como instrução
+        clean_line = line.split('#')[0].strip()
+        if not clean_line:
+            continue
+
+        if ':' in clean_line:
+            label, rest_of_line = clean_line.split(':', 1)
+            label_map[label.strip()] = current_pc
+            clean_line = rest_of_line.strip()
+
+        if clean_line and clean_line.split()[0].upper() != 'FIM':
+            parsed_lines.append(clean_line)
+            current_pc += 1
+
+    # Segundo passo: Decodificar as instruções (uma única vez, já com o alvo dos branches resolvido)
+    instructions = [parse_instruction(line, pc, label_map) for pc, line in enumerate(parsed_lines)]
+    return instructions, label_map
@@ -0,0 +1,131 @@
+"""
+Gráfico de Gantt do pipeline (aba "Pipeline" da GUI).
+
+Cada instrução commitada é uma linha, na ordem de commit, com barras nos
+ciclos de despacho, execução, escrita no CDB e commit (campos `cycle_*` dos
+registros de `core.committed_instructions`). Os flushes aparecem como
+linhas verticais no ciclo em que aconteceram, quando o desvio que os causou
+é commitado.
+
+O desenho é incremental (blitting): a cada atualização, só as instruções
+commitadas desde a anterior são desenhadas sobre a imagem já pronta do
+gráfico, e só ela é copiada para a tela. A janela mostra `rows` instruções
+e `cycles` ciclos; quando as novas não cabem mais, a janela avança e o
+gráfico é redesenhado inteiro, só com as instruções da nova janela. Assim o
+custo por ciclo não cresce com o tamanho da execução.
+"""
+from matplotlib.figure import Figure
+from matplotlib.patches import Patch, Rectangle
+
+# Estágios: (nome, cor)
+ISSUE = ("Despacho", "#60a5fa")
+EXECUTE = ("Execução", "#f59e0b")
+WRITE = ("Escrita (CDB)", "#10b981")
+COMMIT = ("Commit", "#7c3aed")
+FLUSH = ("Flush", "#dc2626")
+BAR_HEIGHT = 0.7
+
+
+def stage_spans(record):
+    """Barras de uma instrução commitada: (início, largura, cor) em ciclos.
+
+    A execução vai do ciclo em que a instrução ganhou a unidade até o ciclo
+    em que terminou; a escrita no CDB acontece no fim desse mesmo ciclo e
+    aparece como uma faixa estreita sobre ele.
+    """
+    spans = [(record['cycle_issued'], 1, ISSUE[1])]
+    executed, written = record['cycle_executed'], record['cycle_written']
+    if executed is not None and written is not None:
+        spans.append((executed, written - executed + 1, EXECUTE[1]))
+        spans.append((written + 0.6, 0.4, WRITE[1]))
+    spans.append((record['cycle_committed'], 1, COMMIT[1]))
+    return spans
+
+
+class PipelineChart:
+    """Gantt do pipeline desenhado incrementalmente sobre `core.committed_instructions`."""
+
+    def __init__(self, figure=None, rows=30, cycles=60):
+        self.figure = figure or Figure(figsize=(10, 6))
+        self.axes = self.figure.add_subplot()
+        self.figure.subplots_adjust(left=0.22, right=0.98, top=0.9, bottom=0.08)
+        self.rows = rows
+        self.cycles = cycles
+        self.log = None
+        self.shown = 0        # Registros do histórico já desenhados
+        self.first_row = 0    # Janela: linhas [first_row, first_row + rows)
+        self.first_cycle = 0  # e ciclos [first_cycle, first_cycle + cycles)
+        self.redraws = 0
+        self._stale = True
+        self.figure.legend(handles=[Patch(color=color, label=name)
+                                    for name, color in (ISSUE, EXECUTE, WRITE, COMMIT, FLUSH)],
+                           loc='upper center', ncol=5, frameon=False)
+
+    def _on_truncate(self, length):
+        if length < self.shown:
+            self._stale = True  # Desfazer/voltar no tempo: as linhas desenhadas não valem mais
+
+    def update(self, log):
+        """Acompanha `log` (core.committed_instructions): desenha só as instruções commitadas desde a última vez."""
+        if log is not self.log:
+            self.log = log
+            log.watch(self._on_truncate)
+            self._stale = True
+        total = len(log)
+        if self._stale or total > self.first_row + self.rows:
+            self._redraw(total)
+            return
+        if total == self.shown:
+            return
+        records = log.records(self.shown, total)
+        if records[-1]['cycle_committed'] >= self.first_cycle + self.cycles:
+            self._redraw(total)
+            return
+        canvas = self.figure.canvas
+        for row, record in enumerate(records, self.shown):
+            for artist in self._add_instruction(row, record):
+                self.axes.draw_artist(artist)
+        self.shown = total
+        canvas.blit(self.figure.bbox)
+
+    def _add_instruction(self, row, record):
+        """Cria (no eixo) as barras, o rótulo e o marcador de flush de uma instrução; retorna os artistas."""
+        axes = self.axes
+        y = row + (1 - BAR_HEIGHT) / 2
+        artists = [axes.add_patch(Rectangle((start, y), width, BAR_HEIGHT, color=color, linewidth=0))
+                   for start, width, color in stage_spans(record)]
+        instruction = record['instruction']
+        # Rótulo à esquerda do eixo (fora da área de dados, mas dentro da região copiada para a tela)
+        artists.append(axes.text(-0.01, row + 0.5, f"{row}: {instruction}" if instruction else str(row),
+                                 transform=axes.get_yaxis_transform(), ha='right', va='center',
+                                 fontsize=8, family='monospace', clip_on=False))
+        if record.get('cycle_flushed') is not None:
+            artists.append(axes.axvline(record['cycle_flushed'] + 0.5, color=FLUSH[1], linestyle='--', linewidth=1))
+        return artists
+
+    def _redraw(self, total):
+        """Move a janela para as instruções mais recentes e redesenha o gráfico inteiro."""
+        log = self.log
+        # Metade da janela com as instruções mais recentes e metade livre para as próximas
+        start = max(total - self.rows // 2, 0 if log.sink is not None else log.first)
+        records = log.records(start, total)
+        self.first_row = start
+        if records:
+            last = records[-1]['cycle_committed']
+            self.first_cycle = max(min(record['cycle_issued'] for record in records), last - self.cycles // 2)
+        else:
+            self.first_cycle = 0
+        axes = self.axes
+        axes.clear()
+        axes.set_xlim(self.first_cycle, self.first_cycle + self.cycles)
+        axes.set_ylim(self.first_row + self.rows, self.first_row)  # Instruções mais antigas em cima
+        axes.set_yticks([])
+        axes.set_xlabel("Ciclo")
+        axes.grid(axis='x', color='#e5e7eb', linewidth=0.5)
+        axes.set_axisbelow(True)
+        for row, record in enumerate(records, start):
+            self._add_instruction(row, record)
+        self.shown = total
+        self._stale = False
+        self.redraws += 1
+        self.figure.canvas.draw()
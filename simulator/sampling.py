@@ -0,0 +1,284 @@
+"""
+Simulação amostrada com vetores de blocos básicos (no estilo SimPoint).
+
+1. Uma passada no simulador funcional divide a execução em intervalos de
+   `interval` instruções e, para cada um, conta quantas instruções foram
+   executadas em cada bloco básico (o BBV do intervalo).
+2. Os BBVs normalizados são agrupados com k-means; k é o menor número de
+   grupos que obtém 90% da redução de erro possível até `max_clusters`.
+3. De cada grupo são escolhidos os intervalos mais próximos do centro
+   (`samples_per_cluster`, o primeiro é o representativo e os demais são
+   sorteados entre os membros do grupo).
+4. Só esses intervalos passam pela simulação detalhada (`TomasuloCore`),
+   partindo do estado arquitetural da passada funcional, com o preditor
+   aquecido e `warmup` instruções de aquecimento do pipeline antes da
+   medição.
+5. O CPI de cada grupo, ponderado pelo número de instruções do grupo, dá a
+   estimativa de ciclos do programa inteiro. Cada grupo é tratado como um
+   estrato de uma amostragem estratificada, o que dá o intervalo de
+   confiança da estimativa (é preciso ao menos 2 amostras nos grupos com
+   mais de um intervalo).
+
+Uso: python -m simulator.sampling programa.asm --interval 1000 --compare
+"""
+import argparse
+import math
+import sys
+import time
+
+import numpy as np
+
+from simulator import config
+from simulator.batch import simulate
+from simulator.config import MachineConfig
+from simulator.core import TomasuloCore
+from simulator.functional import FunctionalSimulator
+from simulator.parser import parse_program
+
+PROJECTED_DIMENSIONS = 15  # Dimensão dos BBVs depois da projeção aleatória
+SSE_REDUCTION = 0.9  # Fração da redução de erro do k-means exigida na escolha de k
+
+
+def basic_blocks(instructions):
+    """Índice do bloco básico de cada PC: blocos começam no PC 0, nos alvos de desvios e saltos e depois de cada um."""
+    leaders = {0}
+    for instruction in instructions:
+        if instruction.is_branch or instruction.is_jump:
+            leaders.add(instruction.pc + 1)
+            leaders.add(instruction.target_pc)  # JR: -1 (os alvos são retornos, já marcados após cada JAL)
+    block_of = []
+    block = -1
+    for pc in range(len(instructions)):
+        if pc in leaders:
+            block += 1
+        block_of.append(block)
+    return block_of
+
+
+class Profile:
+    """BBVs da passada funcional: `vectors[i, b]` é o número de instruções do bloco b executadas no intervalo i."""
+
+    def __init__(self, interval, vectors, lengths):
+        self.interval = interval
+        self.vectors = vectors
+        self.lengths = lengths  # Instruções de cada intervalo (o último pode ser menor)
+
+    @property
+    def total_instructions(self):
+        return int(self.lengths.sum())
+
+    def __len__(self):
+        return len(self.lengths)
+
+
+def profile(instructions, interval, max_instructions=None):
+    """Executa o programa decodificado no simulador funcional e coleta um BBV a cada `interval` instruções."""
+    if interval <= 0:
+        raise ValueError("O intervalo deve ter ao menos uma instrução")
+    block_of = np.array(basic_blocks(instructions), dtype=np.int64)
+    num_blocks = int(block_of.max()) + 1 if len(block_of) else 0
+    counts = [0] * len(instructions)
+    simulator = FunctionalSimulator(instructions, pc_counts=counts)
+    previous = np.zeros(len(instructions), dtype=np.int64)
+    vectors, lengths = [], []
+    while not simulator.finished():
+        budget = interval if max_instructions is None else min(interval, max_instructions - simulator.executed)
+        if budget <= 0:
+            break
+        lengths.append(simulator.run(count=budget))
+        current = np.array(counts, dtype=np.int64)
+        vectors.append(np.bincount(block_of, weights=current - previous, minlength=num_blocks))
+        previous = current
+    return Profile(interval, np.array(vectors, dtype=float).reshape(len(lengths), num_blocks),
+                   np.array(lengths, dtype=np.int64))
+
+
+def _kmeans(points, k, rng, iterations=100):
+    """k-means (inicialização k-means++). Retorna (grupo de cada ponto, centros, soma dos erros quadráticos)."""
+    centers = points[[rng.integers(len(points))]]
+    while len(centers) < k:
+        distances = ((points[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2).min(axis=1)
+        if distances.sum() == 0:
+            break  # Menos pontos distintos que grupos
+        centers = np.vstack([centers, points[rng.choice(len(points), p=distances / distances.sum())]])
+    for _ in range(iterations):
+        labels = ((points[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2).argmin(axis=1)
+        updated = np.array([points[labels == c].mean(axis=0) if (labels == c).any() else centers[c]
+                            for c in range(len(centers))])
+        if np.allclose(updated, centers):
+            break
+        centers = updated
+    distances = ((points[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+    labels = distances.argmin(axis=1)
+    return labels, centers, float(distances[np.arange(len(points)), labels].sum())
+
+
+class SimulationPoint:
+    """Intervalo escolhido para a simulação detalhada."""
+
+    def __init__(self, interval, cluster, representative):
+        self.interval = interval
+        self.cluster = cluster
+        self.representative = representative  # Mais próximo do centro do grupo
+        self.cpi = None  # Preenchido pela simulação detalhada
+
+    def __repr__(self):
+        return f"SimulationPoint(interval={self.interval}, cluster={self.cluster}, cpi={self.cpi})"
+
+
+def choose_points(profile, max_clusters=10, samples_per_cluster=2, seed=0):
+    """Agrupa os intervalos pelos BBVs. Retorna (grupo de cada intervalo, pontos de simulação)."""
+    if not len(profile):
+        return np.zeros(0, dtype=np.int64), []
+    rng = np.random.default_rng(seed)
+    points = profile.vectors / np.maximum(profile.lengths, 1)[:, None]
+    if points.shape[1] > PROJECTED_DIMENSIONS:
+        points = points @ rng.uniform(-1, 1, size=(points.shape[1], PROJECTED_DIMENSIONS))
+
+    runs = [_kmeans(points, k, rng) for k in range(1, min(max_clusters, len(points)) + 1)]
+    worst, best = runs[0][2], runs[-1][2]
+    labels, centers, _ = next(run for run in runs if run[2] <= best + (1 - SSE_REDUCTION) * (worst - best))
+
+    chosen = []
+    for cluster in np.unique(labels):
+        members = np.flatnonzero(labels == cluster)
+        distances = ((points[members] - centers[cluster]) ** 2).sum(axis=1)
+        representative = members[distances.argmin()]
+        others = members[members != representative]
+        extra = rng.choice(others, size=min(samples_per_cluster - 1, len(others)), replace=False)
+        chosen.append(SimulationPoint(int(representative), int(cluster), True))
+        chosen.extend(SimulationPoint(int(interval), int(cluster), False) for interval in sorted(extra))
+    labels = np.unique(labels, return_inverse=True)[1]  # Grupos numerados de 0 a k-1
+    for point in chosen:
+        point.cluster = int(labels[point.interval])
+    return labels, chosen
+
+
+class SampledResult:
+    """Estimativa do desempenho do programa inteiro a partir dos intervalos simulados em detalhe."""
+
+    def __init__(self, total_instructions, cycles, cycles_error, clusters, points, detailed_instructions, wall_time):
+        self.total_instructions = total_instructions
+        self.cycles = cycles  # Estimativa de ciclos do programa inteiro
+        self.cycles_error = cycles_error  # Meia largura do intervalo de confiança (None se não houver amostras suficientes)
+        self.clusters = clusters
+        self.points = points
+        self.detailed_instructions = detailed_instructions  # Simuladas em detalhe, incluindo o aquecimento
+        self.wall_time = wall_time
+
+    @property
+    def ipc(self):
+        return self.total_instructions / self.cycles if self.cycles else 0.0
+
+    @property
+    def ipc_bounds(self):
+        """Intervalo de confiança do IPC (None se não houver estimativa de erro)."""
+        if self.cycles_error is None or not self.cycles:
+            return None
+        low_cycles = max(self.cycles - self.cycles_error, 1e-9)
+        return self.total_instructions / (self.cycles + self.cycles_error), self.total_instructions / low_cycles
+
+    def __repr__(self):
+        error = "?" if self.cycles_error is None else f"{self.cycles_error:.0f}"
+        return (f"SampledResult(cycles={self.cycles:.0f} ± {error}, ipc={self.ipc:.3f}, "
+                f"clusters={self.clusters}, points={len(self.points)})")
+
+
+def _measure(core, warmup, length, max_cycles):
+    """Simula em detalhe `warmup` instruções de aquecimento e mede o CPI das `length` seguintes."""
+    metrics = core.metrics
+    start_cycle = start_count = None
+    while core.cycle < max_cycles:
+        if start_cycle is None and metrics['completed_instructions'] >= warmup:
+            start_cycle, start_count = core.cycle, metrics['completed_instructions']
+        if metrics['completed_instructions'] >= warmup + length or not core.cycle_step():
+            break
+    if start_cycle is None:
+        raise RuntimeError("Limite de ciclos atingido durante o aquecimento")
+    measured = metrics['completed_instructions'] - start_count
+    return (core.cycle - start_cycle) / measured if measured else 0.0
+
+
+def simulate_sampled(program, interval=1000, warmup=None, max_clusters=10, samples_per_cluster=2, seed=0,
+                     machine=None, max_instructions=None, confidence=1.96):
+    """Estima os ciclos de `program` simulando em detalhe apenas os intervalos representativos.
+
+    `warmup` (padrão: `interval`) é o número de instruções simuladas em
+    detalhe antes de cada intervalo medido. `confidence` é o quantil da
+    normal usado no intervalo de confiança (1.96: 95%).
+    """
+    start = time.perf_counter()
+    warmup = interval if warmup is None else warmup
+    instructions, label_map = parse_program(program)
+    run_profile = profile(instructions, interval, max_instructions)
+    labels, points = choose_points(run_profile, max_clusters, samples_per_cluster, seed)
+
+    # Uma única passada funcional leva cada ponto até o início do seu aquecimento
+    walker = FunctionalSimulator(instructions, label_map, predictor=(machine or MachineConfig()).make_predictor())
+    detailed = 0
+    for point in sorted(points, key=lambda p: p.interval):
+        begin = point.interval * interval
+        walker.run(count=max(0, begin - warmup) - walker.executed)
+        core = TomasuloCore(undo_budget=0, machine=machine)
+        core.load_program(program)
+        walker.handoff(core)
+        point_warmup = begin - walker.executed
+        length = int(run_profile.lengths[point.interval])
+        point.cpi = _measure(core, point_warmup, length, config.MAX_CYCLES)
+        detailed += core.metrics['completed_instructions']
+
+    # Cada grupo é um estrato: ciclos = instruções do grupo x CPI médio das amostras
+    cycles = 0.0
+    variance = 0.0
+    for cluster in range(len(set(labels.tolist()))):
+        members = labels == cluster
+        size, instructions_in_cluster = int(members.sum()), float(run_profile.lengths[members].sum())
+        samples = np.array([point.cpi for point in points if point.cluster == cluster])
+        cycles += instructions_in_cluster * samples.mean()
+        if len(samples) < size:
+            if len(samples) < 2:
+                variance = None
+            elif variance is not None:
+                variance += instructions_in_cluster ** 2 * (1 - len(samples) / size) * samples.var(ddof=1) / len(samples)
+    error = None if variance is None else confidence * math.sqrt(variance)
+    return SampledResult(run_profile.total_instructions, cycles, error, len(set(labels.tolist())), points,
+                         detailed, time.perf_counter() - start)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m simulator.sampling",
+                                     description="Estima o desempenho de um programa simulando em detalhe só os intervalos representativos.")
+    parser.add_argument('program', help="arquivo de programa")
+    parser.add_argument('--interval', type=int, default=1000, help="instruções por intervalo")
+    parser.add_argument('--warmup', type=int, default=None, help="instruções de aquecimento antes de cada intervalo")
+    parser.add_argument('--max-clusters', type=int, default=10, help="número máximo de grupos")
+    parser.add_argument('--samples-per-cluster', type=int, default=2, help="intervalos simulados por grupo")
+    parser.add_argument('--seed', type=int, default=0, help="semente do k-means e do sorteio")
+    parser.add_argument('--machine', metavar='ARQUIVO', help="arquivo JSON com a configuração da máquina")
+    parser.add_argument('--compare', action='store_true', help="também simula o programa inteiro em detalhe")
+    args = parser.parse_args(argv)
+    try:
+        machine = MachineConfig.from_file(args.machine) if args.machine else None
+    except (OSError, ValueError) as error:
+        parser.error(f"configuração da máquina inválida: {error}")
+    try:
+        with open(args.program, encoding='utf-8') as f:
+            program = f.read()
+        result = simulate_sampled(program, args.interval, args.warmup, args.max_clusters,
+                                  args.samples_per_cluster, args.seed, machine)
+    except (OSError, ValueError) as error:
+        parser.error(f"{args.program}: {error}")
+    error = "?" if result.cycles_error is None else f"{result.cycles_error:.0f}"
+    print(f"Instruções: {result.total_instructions} em {len(result.points)} pontos de {result.clusters} grupos "
+          f"({result.detailed_instructions} simuladas em detalhe)")
+    print(f"Ciclos estimados: {result.cycles:.0f} ± {error}  IPC: {result.ipc:.3f}  ({result.wall_time:.2f} s)")
+    if args.compare:
+        full = simulate(program, machine=machine)
+        deviation = (result.cycles - full.cycles) / full.cycles * 100 if full.cycles else 0.0
+        print(f"Simulação completa: {full.cycles} ciclos  IPC: {full.metrics['ipc']:.3f}  ({full.wall_time:.2f} s)  "
+              f"erro da estimativa: {deviation:+.2f}%")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,165 @@
+"""
+Exploração do espaço de projeto: simula um conjunto de programas em várias
+configurações de máquina, em paralelo.
+
+Os parâmetros são os campos de `MachineConfig`; campos que são dicionários
+são acessados com ponto (ex.: `reservation_stations.INT`). Os pontos podem
+vir de uma grade completa (`grid`) ou de uma amostra aleatória dela
+(`random_sample`). Cada (programa, ponto) é simulado em um processo de um
+`ProcessPoolExecutor` e o resultado é gravado no CSV assim que termina, de
+modo que uma varredura interrompida pode ser retomada com o mesmo arquivo.
+
+Uso: python -m simulator.sweep prog1.asm prog2.asm --grid rob_size=48,64 \\
+         --grid issue_width=2,4 --grid reservation_stations.INT=3,6 -o resultados.csv
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from simulator.batch import simulate
+from simulator.config import MachineConfig
+
+RESULT_COLUMNS = ('cycles', 'ipc', 'stalls', 'mispredictions', 'bubbles', 'completed_instructions', 'finished')
+
+
+def grid(axes):
+    """Todos os pontos da grade: `axes` mapeia cada parâmetro para a lista de valores."""
+    names = list(axes)
+    return [dict(zip(names, values)) for values in itertools.product(*(axes[name] for name in names))]
+
+
+def random_sample(axes, count, seed=None):
+    """`count` pontos distintos sorteados da grade (todos, se a grade for menor)."""
+    points = grid(axes)
+    if count >= len(points):
+        return points
+    return random.Random(seed).sample(points, count)
+
+
+def machine_from_params(params):
+    """Cria a MachineConfig de um ponto, partindo da configuração padrão."""
+    data = MachineConfig().to_dict()
+    for name, value in params.items():
+        field, _, key = name.partition('.')
+        if field not in data:
+            raise ValueError(f"Parâmetro desconhecido: {name!r}")
+        if key:
+            data[field] = dict(data[field], **{key: value})
+        else:
+            data[field] = value
+    return MachineConfig.from_dict(data)
+
+
+def _run_job(program_name, program, params, max_cycles):
+    """Executado nos processos do pool: simula um programa em um ponto."""
+    result = simulate(program, max_cycles=max_cycles, machine=machine_from_params(params))
+    row = {'program': program_name, **params, 'finished': result.finished, 'cycles': result.cycles}
+    for column in RESULT_COLUMNS:
+        if column in result.metrics:
+            row[column] = result.metrics[column]
+    return row
+
+
+def _job_key(program_name, params, names):
+    return (program_name,) + tuple(str(params[name]) for name in names)
+
+
+def _completed_jobs(path, columns):
+    """Chaves dos jobs já gravados em um CSV existente (para retomar a varredura)."""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return set()
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        if reader.fieldnames != columns:
+            raise ValueError(f"{path} tem colunas diferentes desta varredura; use outro arquivo de saída")
+        return {_job_key(row['program'], row, columns[1:-len(RESULT_COLUMNS)]) for row in reader}
+
+
+def run_sweep(programs, points, output, workers=None, max_cycles=None, progress=None):
+    """Simula cada programa em cada ponto e grava uma linha por simulação em `output` (CSV).
+
+    `programs` mapeia nome -> texto do programa. Jobs já presentes em
+    `output` são pulados. `progress(done, total, row)` é chamado a cada
+    resultado. Retorna o número de simulações executadas.
+    """
+    if not points:
+        return 0
+    names = list(points[0])
+    columns = ['program', *names, *RESULT_COLUMNS]
+    done_keys = _completed_jobs(output, columns)
+    jobs = [(name, params) for params in points for name in programs
+            if _job_key(name, params, names) not in done_keys]
+    total = len(jobs) + len(done_keys)
+    done = len(done_keys)
+
+    write_header = not done_keys and (not os.path.exists(output) or os.path.getsize(output) == 0)
+    with open(output, 'a', newline='', encoding='utf-8') as f, \
+            ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        if write_header:
+            writer.writeheader()
+        futures = [pool.submit(_run_job, name, programs[name], params, max_cycles) for name, params in jobs]
+        for future in as_completed(futures):
+            row = future.result()
+            writer.writerow(row)
+            f.flush()  # Cada resultado fica salvo mesmo que a varredura seja interrompida
+            done += 1
+            if progress:
+                progress(done, total, row)
+    return len(jobs)
+
+
+def _parse_axis(text):
+    """'nome=v1,v2,...' -> (nome, [v1, v2, ...]), com os valores lidos como JSON quando possível."""
+    name, sep, values = text.partition('=')
+    if not sep or not values:
+        raise argparse.ArgumentTypeError(f"eixo inválido: {text!r} (use nome=v1,v2,...)")
+    parsed = []
+    for value in values.split(','):
+        try:
+            parsed.append(json.loads(value))
+        except ValueError:
+            parsed.append(value)
+    return name.strip(), parsed
+
+
+def _print_progress(done, total, row):
+    print(f"[{done}/{total}] {row['program']} ciclos={row['cycles']} ipc={row['ipc']:.3f}", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m simulator.sweep",
+                                     description="Varredura de configurações da máquina em paralelo.")
+    parser.add_argument('programs', nargs='+', help="arquivos de programa")
+    parser.add_argument('--grid', action='append', type=_parse_axis, default=[], metavar='NOME=V1,V2',
+                        help="eixo da varredura (pode ser repetido)")
+    parser.add_argument('--samples', type=int, default=None, help="sorteia N pontos da grade em vez de usar todos")
+    parser.add_argument('--seed', type=int, default=None, help="semente do sorteio")
+    parser.add_argument('-o', '--output', default='sweep.csv', help="arquivo CSV de saída (retomado se existir)")
+    parser.add_argument('--workers', type=int, default=None, help="número de processos (padrão: todos os núcleos)")
+    parser.add_argument('--max-cycles', type=int, default=None, help="limite de ciclos por simulação")
+    args = parser.parse_args(argv)
+
+    axes = dict(args.grid)
+    points = grid(axes) if args.samples is None else random_sample(axes, args.samples, args.seed)
+    try:
+        for params in points:
+            machine_from_params(params)
+    except ValueError as error:
+        parser.error(str(error))
+    programs = {}
+    for path in args.programs:
+        with open(path, encoding='utf-8') as f:
+            programs[path] = f.read()
+    executed = run_sweep(programs, points, args.output, args.workers, args.max_cycles, _print_progress)
+    print(f"{executed} simulações executadas; resultados em {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
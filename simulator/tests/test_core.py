@@ -1,8 +1,29 @@
 import sys
 import os
+import csv
+import tempfile
+import time
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from simulator.core import TomasuloCore
+from simulator.batch import simulate
+from simulator.timeline import Timeline
+from simulator.config import INSTRUCTION_LATENCIES, MachineConfig
+from simulator.sweep import grid, run_sweep
+from simulator.isa import ISA, SEMANTICS, UNIT_TYPES, Opcode
+from simulator.parser import parse_instruction
+from simulator.lanes import LaneBatch
+from simulator.functional import fast_forward
+from simulator.sampling import simulate_sampled
+from simulator.trace import record_trace
+from simulator.batch import simulate_trace
+from simulator.tracefile import TraceFile, record_trace_file, write_trace
+from simulator.bpeval import BranchStream, evaluate_many, predictions
+from simulator.worker import SimulationWorker
+from simulator.components.cdb import CommonDataBus
+from simulator.components.reservation_station import ReservationStation
+from simulator.journal import UndoJournal
+from simulator.history import HistoryView, record_filter
 
 def test_basic_instruction():
     """Testa uma instrução básica"""
@@ -36,6 +57,28 @@ ADD R6, R4, R7"""
     
     print("✓ Teste de múltiplas instruções passou")
 
+def test_out_of_order_completion():
+    """Testa instruções independentes terminando antes da cabeça do ROB"""
+    core = TomasuloCore()
+    core.load_program("""ADDI R1, R0, 1
+ADD R2, R1, R1
+ADD R3, R2, R2
+ADD R4, R3, R3
+ADDI R5, R0, 7
+ADDI R6, R0, 8
+ADD R7, R5, R6
+ADDI R8, R0, 9""")
+
+    for _ in range(50):
+        if not core.cycle_step():
+            break
+
+    assert core.registers.get_value('R4') == 8
+    assert core.registers.get_value('R7') == 15
+    assert core.metrics['completed_instructions'] == 8
+    assert not any(unit['busy'] for unit in core.execution_units.values())
+    print("✓ Teste de conclusão fora de ordem passou")
+
 def test_branch_instruction():
     """Testa instrução de branch"""
     core = TomasuloCore()
@@ -49,27 +92,872 @@ def test_branch_instruction():
     
     print("✓ Teste de branch passou")
 
+def test_flush_keeps_older_instructions():
+    """Testa se o flush descarta apenas as instruções mais novas que o desvio"""
+    core = TomasuloCore()
+    core.load_program("""ADDI R1, R0, 1
+ADD R2, R1, R1
+ADD R3, R2, R2
+ADD R4, R3, R3
+BEQ R0, R0, fim
+ADDI R5, R0, 9
+ADDI R4, R0, 7
+ADDI R4, R0, 8
+fim:
+ADD R6, R4, R1""")
+
+    for _ in range(100):
+        if not core.cycle_step():
+            break
+
+    assert not core._has_work_to_do()
+    assert core.registers.get_value('R4') == 8   # Produzido antes do desvio
+    assert core.registers.get_value('R5') == 0   # Caminho errado descartado
+    assert core.registers.get_value('R6') == 9
+    assert core.rob.count == 0
+    assert core.reservation_stations.busy_count == 0
+    print("✓ Teste de flush seletivo passou")
+
+def test_loop_renaming():
+    """Testa um laço que renomeia os mesmos registradores a cada iteração"""
+    core = TomasuloCore()
+    core.load_program("""ADDI R1, R0, 10
+ADDI R10, R0, 1
+loop:
+ADDI R2, R2, 1
+ADD R3, R3, R2
+SUB R1, R1, R10
+BNE R1, R0, loop""")
+
+    for _ in range(500):
+        if not core.cycle_step():
+            break
+
+    assert not core._has_work_to_do()
+    assert core.registers.get_value('R3') == 55   # 1 + 2 + ... + 10
+    assert all(tag is None for tag in core.registers.tags)
+    print("✓ Teste de laço com renomeação passou")
+
 def test_memory_instructions():
     """Testa instruções de memória"""
     core = TomasuloCore()
     
     program = """LW R1, 100
-SW R2, 200"""
+SW R2, 200
+ADDI R3, R0, 40
+ADDI R4, R0, 7
+SW R4, 8(R3)
+LW R5, R3, 8"""
     
     core.load_program(program)
     
     # Executar alguns ciclos
-    for _ in range(8):
+    for _ in range(30):
         core.cycle_step()
     
+    assert core.memory[200] == 0
+    assert core.memory[48] == 7   # SW grava em base + deslocamento no commit
+    assert core.registers.get_value('R5') == 7
+    assert core.registers.tags[2] is None   # SW não renomeia registrador
     print("✓ Teste de memória passou")
 
+def test_isa_table():
+    """Testa as tabelas de despacho geradas a partir da ISA declarativa"""
+    assert [opcode.name for opcode in Opcode] == [spec.name for spec in ISA]
+    assert set(INSTRUCTION_LATENCIES) == {spec.name for spec in ISA}  # Latências só na configuração
+    assert TomasuloCore().latencies[Opcode.ADDI] == 1 and INSTRUCTION_LATENCIES['ADDI'] == 0  # No mínimo 1 ciclo
+    assert SEMANTICS[Opcode.DIV](7, 0, None) == 0
+    assert SEMANTICS[Opcode.BNE](1, 2, None) == 1
+    assert SEMANTICS[Opcode.LW](40, None, 8) == 48   # Endereço efetivo
+
+    instruction = parse_instruction("SW R4, 8(R3)")
+    assert instruction.opcode == Opcode.SW and instruction.is_store
+    assert (instruction.rd, instruction.rs1, instruction.rs2, instruction.offset) == (None, 3, 4, 8)
+    assert UNIT_TYPES[instruction.opcode] == instruction.unit == 'MEM_STORE'
+    print("✓ Teste da tabela da ISA passou")
+
+def test_machine_config():
+    """Testa se o núcleo segue o modelo de máquina configurado"""
+    program = """ADDI R1, R0, 84
+ADDI R2, R0, 2
+DIV R3, R1, R2
+ADD R4, R3, R2"""
+    fast = MachineConfig.from_dict({'instruction_latencies': {'DIV': 1}})
+    slow = MachineConfig.from_dict({'instruction_latencies': {'DIV': 20}, 'execution_units': {
+        'INT_ALU': 3, 'FP_ALU': 1, 'FP_MUL': 1, 'FP_DIV': 1, 'MEM_LOAD': 1, 'MEM_STORE': 1, 'BRANCH': 1}})
+    fast_result = simulate(program, machine=fast)
+    slow_result = simulate(program, machine=slow)
+    assert fast_result.registers['R4'] == slow_result.registers['R4'] == 44
+    assert slow_result.cycles == fast_result.cycles + 19
+
+    core = TomasuloCore(machine=slow)
+    assert [name for name in core.execution_units if name.startswith('INT_ALU')] == ['INT_ALU1', 'INT_ALU2', 'INT_ALU3']
+    core = TomasuloCore(machine=MachineConfig(rob_size=4, issue_width=1))
+    assert len(core.rob.entries) == 4
+
+    for bad in ({'rob_size': 0}, {'rob': 8}, {'reservation_stations': {'INT': 2, 'FP': 1}}):
+        try:
+            TomasuloCore(machine=MachineConfig.from_dict(bad))
+        except ValueError:
+            pass
+        else:
+            assert False, bad
+    print("✓ Teste de configuração da máquina passou")
+
+def test_sweep_resume():
+    """Testa a varredura paralela e a retomada a partir do CSV"""
+    programs = {'soma': "ADDI R1, R0, 5\nADDI R2, R0, 3\nADD R3, R1, R2"}
+    points = grid({'rob_size': [4, 16], 'reservation_stations.INT': [1, 6]})
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, 'sweep.csv')
+        assert run_sweep(programs, points[:3], output, workers=2) == 3
+        # Só o ponto que faltava é simulado na segunda execução
+        assert run_sweep(programs, points, output, workers=2) == 1
+        with open(output, newline='') as f:
+            rows = list(csv.DictReader(f))
+    assert len(rows) == 4
+    assert {(row['rob_size'], row['reservation_stations.INT']) for row in rows} == {('4', '1'), ('4', '6'), ('16', '1'), ('16', '6')}
+    assert all(row['finished'] == 'True' for row in rows)
+    print("✓ Teste de varredura passou")
+
+def test_batch_simulate():
+    """Testa a API headless de simulação em lote"""
+    program = """ADDI R1, R0, 5
+ADDI R2, R0, 3
+ADD R3, R1, R2"""
+
+    result = simulate(program)
+
+    assert result.finished
+    assert result.registers['R3'] == 8
+    assert result.metrics['completed_instructions'] == 3
+    assert result.cycles_per_second > 0
+
+    capped = simulate(program, max_cycles=1)
+    assert not capped.finished
+    assert capped.cycles == 1
+    print("✓ Teste de simulação em lote passou")
+
+def _snapshot(core):
+    """Resumo comparável de todo o estado mutável do núcleo"""
+    units = {name: (u['busy'], u['current_instruction'] is not None) for name, u in core.execution_units.items()}
+    return (core.cycle, core.pc, core.flush_needed, repr(core.get_state()), dict(core.memory),
+            core.bp.last_result, units, len(core.committed_instructions), len(core.branch_history))
+
+def test_cdb_wakeup():
+    """Testa o despertar pelo índice de tags do CDB: só os que esperam a tag, dois operandos e desfazer"""
+    cdb = CommonDataBus()
+    journal = UndoJournal(budget=100)
+    journal.attach(cdb.waiting)
+    first, second, both = (ReservationStation('INT') for _ in range(3))
+    first.qj, second.qk = 4, 4
+    both.qj, both.qk = 4, 7
+    journal.begin()
+    cdb.subscribe(4, first, 'j')
+    cdb.subscribe(4, second, 'k')
+    cdb.subscribe(4, both, 'j')
+    cdb.subscribe(7, both, 'k')
+    journal.end()
+    assert len(cdb.waiting[4]) == 3 and len(cdb.waiting[7]) == 1
+
+    assert cdb.broadcast(10, 5) == []  # Ninguém espera a tag 5
+    ready = cdb.broadcast(40, 4)
+    assert ready == [first, second]  # `both` ainda espera a tag 7
+    assert (first.vj, first.qj, second.vk, second.qk) == (40, None, 40, None)
+    assert (both.vj, both.qj, both.qk) == (40, None, 7)
+    assert 4 not in cdb.waiting
+    assert cdb.broadcast(70, 7) == [both] and (both.vk, both.qk) == (70, None)
+    assert not cdb.waiting
+
+    # Desfazer as inscrições remove também as que entraram em uma lista já existente
+    journal.clear()
+    journal.begin()
+    cdb.subscribe(4, first, 'j')
+    journal.end()
+    journal.begin()
+    cdb.subscribe(4, second, 'k')
+    cdb.subscribe(4, both, 'j')
+    journal.end()
+    journal.undo()
+    assert cdb.waiting == {4: [(first, 'j')]}
+    journal.undo()
+    assert not cdb.waiting
+    print("✓ Teste do despertar pelo CDB passou")
+
+def test_undo_journal():
+    """Testa se o "Voltar" restaura exatamente cada ciclo anterior"""
+    core = TomasuloCore()
+    core.load_program("""ADDI R1, R0, 5
+ADDI R2, R0, 3
+BNE R1, R2, fim
+ADDI R4, R0, 100
+fim:
+SUB R3, R1, R2""")
+
+    snapshots = [_snapshot(core)]
+    while core.cycle_step():
+        snapshots.append(_snapshot(core))
+
+    for expected in reversed(snapshots[:-1]):
+        assert core.restore_state()
+        assert _snapshot(core) == expected
+    assert not core.restore_state()
+
+    # Com orçamento limitado, só os ciclos mais recentes ficam disponíveis
+    core = TomasuloCore(undo_budget=60)
+    core.load_program("ADDI R1, R0, 5\nADDI R2, R0, 3\nADD R3, R1, R2")
+    while core.cycle_step():
+        pass
+    assert core.journal.size <= 60
+    assert 0 < len(core.journal) < core.cycle
+    print("✓ Teste do journal de desfazer passou")
+
+def test_timeline_seek():
+    """Testa o seek para qualquer ciclo com checkpoints + replay"""
+    program = """ADDI R1, R0, 6
+ADDI R2, R0, 0
+loop:
+ADDI R2, R2, 3
+ADDI R1, R1, -1
+BNE R1, R0, loop
+ADD R3, R2, R1"""
+
+    reference = TomasuloCore()
+    reference.load_program(program)
+    snapshots = [_snapshot(reference)]
+    while reference.cycle_step():
+        snapshots.append(_snapshot(reference))
+
+    core = TomasuloCore()
+    core.load_program(program)
+    timeline = Timeline(interval=2, max_checkpoints=4)
+    timeline.reset(core)
+    while core.cycle_step():
+        timeline.record(core)
+    assert len(timeline.checkpoints) <= 4
+    assert timeline.horizon == len(snapshots) - 1
+
+    for target in [0, 7, 3, len(snapshots) - 1, 1, 5, 5]:
+        assert timeline.seek(core, target) == target
+        assert _snapshot(core) == snapshots[target]
+    print("✓ Teste da linha do tempo passou")
+
+def test_numpy_storage():
+    """Testa se o backend NumPy do ROB/estações se comporta como o de objetos"""
+    program = """ADDI R1, R0, 5
+ADDI R2, R0, 3
+BNE R1, R2, fim
+ADDI R4, R0, 100
+fim:
+MUL R5, R1, R2"""
+    runs = []
+    for storage in ('objects', 'numpy'):
+        core = TomasuloCore(storage=storage)
+        core.load_program(program)
+        states = [repr(core.get_state())]
+        while core.cycle_step():
+            states.append(repr(core.get_state()))
+        runs.append(states)
+        # Desfazer tudo deve voltar ao estado inicial também nas colunas
+        while core.restore_state():
+            pass
+        assert repr(core.get_state()) == states[0]
+    assert runs[0] == runs[1]
+
+    # Snapshots e linha do tempo: o estado restaurado continua simulando igual ao de objetos
+    program = """ADDI R1, R0, 6
+loop: ADDI R2, R2, 3
+MUL R3, R2, R2
+SW R3, 0(R1)
+ADDI R1, R1, -1
+BNE R1, R0, loop"""
+    reference = TomasuloCore()
+    reference.load_program(program)
+    snapshots = [_snapshot(reference)]
+    while reference.cycle_step():
+        snapshots.append(_snapshot(reference))
+    core = TomasuloCore(storage='numpy')
+    core.load_program(program)
+    for _ in range(4):
+        core.cycle_step()
+    saved = core.snapshot()
+    for _ in range(3):
+        core.cycle_step()
+    core.restore_snapshot(saved)
+    while core.cycle_step():
+        pass
+    assert _snapshot(core) == snapshots[-1]
+    core = TomasuloCore(storage='numpy')
+    core.load_program(program)
+    timeline = Timeline(interval=3)
+    timeline.reset(core)
+    while core.cycle_step():
+        timeline.record(core)
+    for target in (0, 11, 4, len(snapshots) - 1, 7):
+        timeline.seek(core, target)
+        assert _snapshot(core) == snapshots[target]
+        for cycle in range(target + 1, min(target + 6, len(snapshots))):
+            core.cycle_step()
+            assert _snapshot(core) == snapshots[cycle]
+
+    # Resultados além de 64 bits dão a volta igualmente nos dois backends e no motor em lotes
+    program = """ADDI R1, R0, 3
+ADDI R2, R0, 40
+loop: MUL R1, R1, R3
+ADD R1, R1, R2
+ADDI R2, R2, -1
+BNE R2, R0, loop"""
+    expected = 3
+    for counter in range(40, 0, -1):
+        expected = expected * 1000003 + counter
+    expected = (expected + 2 ** 63) % 2 ** 64 - 2 ** 63
+    for storage in ('objects', 'numpy'):
+        core = TomasuloCore(storage=storage)
+        core.load_program(program)
+        core.registers.values[3] = 1000003
+        while core.cycle_step():
+            pass
+        assert core.registers.values[1] == expected, storage
+    registers = [0] * 32
+    registers[3] = 1000003
+    batch = LaneBatch(program, 1, registers=registers)
+    assert batch.run().all() and batch.register_values('R1').tolist() == [expected]
+    print("✓ Teste do backend NumPy passou")
+
+def test_lanes_match_core():
+    """Testa se cada lane do motor em lotes termina igual a um TomasuloCore com os mesmos dados"""
+    program = """ADDI R4, R0, 0
+loop: LW R5, 0(R4)
+BEQ R5, R0, skip
+ADD R3, R3, R5
+MUL R6, R5, R5
+SW R6, 32(R4)
+skip: ADDI R4, R4, 1
+BNE R4, R1, loop
+DIV R7, R3, R2"""
+    lanes = 6
+    registers = [[0] * 32 for _ in range(lanes)]
+    memory = [[(lane * 7 + i) % 3 for i in range(64)] for lane in range(lanes)]
+    for lane in range(lanes):
+        registers[lane][1] = 3 + 2 * lane  # Número de iterações diferente em cada lane
+        registers[lane][2] = lane - 2      # Inclui divisão por zero
+    machine = MachineConfig(rob_size=8, branch_penalty=3)
+    batch = LaneBatch(program, lanes, machine=machine, registers=registers, memory=memory)
+    assert batch.run().all()
+
+    for lane in range(lanes):
+        core = TomasuloCore(undo_budget=0, machine=machine)
+        core.load_program(program)
+        for i, value in enumerate(registers[lane]):
+            core.registers.values[i] = value
+        core.memory.update(enumerate(memory[lane]))
+        while core.cycle_step():
+            pass
+        assert batch.cycle[lane] == core.cycle
+        assert list(batch.registers[lane]) == list(core.registers.values)
+        assert all(batch.memory[lane, address] == value for address, value in core.memory.items())
+        for name, values in batch.metrics.items():
+            assert values[lane] == core.metrics[name], name
+    assert len(set(batch.cycle.tolist())) > 1
+
+    # Load fora da memória no caminho errado: lê 0 e não interrompe o lote; commitado, gera erro
+    wrong_path = """ADDI R2, R0, 3
+MUL R3, R2, R2
+MUL R3, R3, R2
+BEQ R3, R3, skip
+LW R1, 5000(R0)
+skip: ADDI R4, R0, 1"""
+    expected = simulate(wrong_path)
+    batch = LaneBatch(wrong_path, 2)
+    assert batch.run().all()
+    assert batch.register_values('R4').tolist() == [expected.registers['R4']] * 2 == [1, 1]
+    assert batch.cycle.tolist() == [expected.cycles] * 2
+    try:
+        LaneBatch("LW R1, 5000(R0)", 2).run()
+        assert False, "Load commitado fora da memória deveria gerar IndexError"
+    except IndexError:
+        pass
+    print("✓ Teste do motor em lotes passou")
+
+def test_fast_forward():
+    """Testa o avanço funcional seguido da simulação detalhada"""
+    program = """ADDI R1, R0, 30
+ADDI R10, R0, 1
+init: SW R1, 0(R1)
+SUB R1, R1, R10
+BNE R1, R0, init
+ADDI R1, R0, 5
+main: LW R2, 0(R1)
+ADD R3, R3, R2
+SUB R1, R1, R10
+BNE R1, R0, main"""
+    full = simulate(program)
+    for skip in (1, 4, 50, 'main'):
+        result = simulate(program, fast_forward=skip)
+        assert result.registers == full.registers and result.memory == full.memory
+        assert result.cycles <= full.cycles
+    skipped = simulate(program, fast_forward='main')
+    assert skipped.skipped_instructions == 2 + 3 * 30 + 1 and skipped.cycles < full.cycles / 4
+
+    # O preditor chega aquecido: o último desvio da inicialização não foi tomado
+    core = TomasuloCore()
+    core.load_program(program)
+    core.bp.last_result = True
+    assert fast_forward(core, until='main') == 93
+    assert core.pc == core.label_map['main'] and core.bp.last_result is False
+    assert core.registers.get_value('R1') == 5 and core.memory[30] == 30
+    assert not core.restore_state()  # O avanço não entra no histórico de "Voltar"
+    print("✓ Teste do avanço rápido passou")
+
+def test_sampled_simulation():
+    """Testa a estimativa por amostragem (BBVs) contra a simulação completa"""
+    program = """ADDI R12, R0, 6
+outer: ADDI R1, R0, 300
+alu: ADDI R2, R2, 1
+ADD R3, R3, R2
+ADDI R1, R1, -1
+BNE R1, R0, alu
+ADDI R1, R0, 100
+ADDI R5, R0, 3
+mul: MUL R6, R5, R1
+DIV R7, R6, R5
+ADDI R1, R1, -1
+BNE R1, R0, mul
+ADDI R12, R12, -1
+BNE R12, R0, outer"""
+    full = simulate(program)
+    result = simulate_sampled(program, interval=200, warmup=100)
+    assert result.total_instructions == full.metrics['completed_instructions']
+    assert result.clusters == 2  # Fase de ALU e fase de MUL/DIV
+    assert result.detailed_instructions < result.total_instructions / 5
+    assert abs(result.cycles - full.cycles) <= result.cycles_error
+    low, high = result.ipc_bounds
+    assert low <= full.metrics['ipc'] <= high
+    print("✓ Teste da simulação amostrada passou")
+
+def test_trace_driven():
+    """Testa a gravação do trace e a simulação de tempo dirigida por ele"""
+    program = """ADDI R1, R0, 12
+ADDI R10, R0, 1
+loop: SW R1, 100(R1)
+LW R2, 100(R1)
+MUL R3, R2, R2
+BEQ R3, R10, skip
+ADD R4, R4, R3
+skip: SUB R1, R1, R10
+BNE R1, R0, loop"""
+    trace = record_trace(program)
+    assert len(trace) == 2 + 12 * 7 - 1  # No último passo o ADD é pulado
+    store, load, branch = trace[2], trace[3], trace[5]
+    assert (store.pc, store.address, store.rs2) == (2, 112, 1)
+    assert (load.rd, load.address) == (2, 112)
+    assert branch.taken == 0 and trace[-1].taken == 0
+    for machine in (None, MachineConfig(rob_size=8, issue_width=4, branch_penalty=3)):
+        timed = simulate_trace(trace, machine=machine)
+        full = simulate(program, machine=machine)
+        assert timed.cycles == full.cycles
+        assert timed.metrics == full.metrics
+        assert timed.registers['R4'] == 0 and not timed.memory  # Nenhum valor é calculado
+    # O BNE R1 do caminho errado (após o BNE R2, previsto não tomado) executa antes dele e seria
+    # tomado: a simulação normal faz um flush a mais; no modo trace ele segue a predição
+    program = """ADDI R1, R0, 1
+DIV R2, R1, R1
+BNE R2, R0, far
+BNE R1, R0, other
+ADDI R4, R0, 1
+other: ADDI R6, R0, 3
+far: ADDI R5, R0, 2"""
+    trace = record_trace(program)
+    for machine in (None, MachineConfig(issue_width=4), MachineConfig(branch_predictor='tage', btb_entries=16)):
+        timed = simulate_trace(trace, machine=machine)
+        full = simulate(program, machine=machine)
+        assert (full.metrics['mispredictions'], timed.metrics['mispredictions']) == (2, 1)
+        assert full.cycles == timed.cycles + 1
+    print("✓ Teste do modo dirigido por trace passou")
+
+def test_trace_file():
+    """Testa o formato binário de traces (blocos, índice, compressão e leitura com mmap)"""
+    program = """ADDI R1, R0, 20
+ADDI R10, R0, 1
+loop: SW R1, 100(R1)
+LW R2, 100(R1)
+SUB R1, R1, R10
+BNE R1, R0, loop"""
+    trace = record_trace(program)
+    with tempfile.TemporaryDirectory() as directory:
+        for compress in (False, True):
+            path = os.path.join(directory, f"trace{int(compress)}.bin")
+            assert record_trace_file(program, path, chunk_records=16, compress=compress) == len(trace)
+            with TraceFile(path) as trace_file:
+                assert len(trace_file) == len(trace) and trace_file.num_chunks == (len(trace) + 15) // 16
+                assert trace_file.program == program and trace_file.compressed == compress
+                records = trace_file.records
+                for name in ('pc', 'opcode', 'rd', 'rs1', 'rs2', 'taken', 'address'):
+                    assert records[name].tolist() == list(trace.columns[name])
+                assert records.flags.owndata == compress  # Sem compressão: view direta do arquivo
+                assert trace_file[-1]['pc'] == 5 and trace_file[40]['address'] == trace[40].address
+                assert sum(len(chunk) for chunk in trace_file.iter_chunks()) == len(trace)
+                assert simulate_trace(trace_file).cycles == simulate(program).cycles
+                del records
+        copy_path = os.path.join(directory, "copy.bin")
+        write_trace(trace, copy_path)
+        with TraceFile(copy_path) as trace_file:
+            assert trace_file.records['taken'].tolist() == list(trace.taken)
+    print("✓ Teste do formato binário de traces passou")
+
+def test_bounded_history():
+    """Testa os históricos limitados em memória, com gravação em disco, desfazer e seek"""
+    program = """ADDI R1, R0, 12
+loop: ADDI R2, R2, 3
+ADDI R1, R1, -1
+BNE R1, R0, loop"""
+    def rows(records):
+        return [dict(record, instruction=record['instruction'].pc) for record in records]
+
+    reference = TomasuloCore(history_capacity=0)
+    reference.load_program(program)
+    while reference.cycle_step():
+        pass
+    commits, branches = rows(reference.committed_instructions), rows(reference.branch_history)
+
+    with tempfile.TemporaryDirectory() as directory:
+        core = TomasuloCore(history_capacity=5)
+        core.load_program(program)
+        core.stream_history(directory, batch_size=4)
+        cycles = 0
+        while core.cycle_step():
+            cycles += 1
+        assert len(core.committed_instructions) == len(commits) and len(core.branch_history) == len(branches)
+        assert rows(core.committed_instructions) == commits[-5:]
+        assert rows(core.committed_instructions.iter_all()) == commits
+        assert rows(core.branch_history.iter_all()) == branches
+        assert rows([core.committed_instructions[3]]) == commits[3:4]
+        # Leitura um a um: gravados (lotes em cache) e pendentes, sem forçar a gravação
+        sink = core.committed_instructions.sink
+        flushed = sink.flushed
+        assert 0 < flushed < len(sink)
+        assert rows([sink.record(index) for index in range(len(sink))]) == commits
+        assert rows(sink.iter_records(flushed - 2)) == commits[flushed - 2:]
+        assert sink.flushed == flushed
+        # Voltar remove os registros do disco e traz de volta à memória os mais antigos
+        for _ in range(cycles // 2):
+            core.restore_state()
+        length = len(core.committed_instructions)
+        assert rows(core.committed_instructions) == commits[max(length - 5, 0):length]
+        assert rows(core.committed_instructions.iter_all()) == commits[:length]
+        # Seguir de novo regrava os lotes cortados (o cache não guarda os lotes antigos)
+        while core.cycle_step():
+            pass
+        assert rows([sink.record(index) for index in range(len(sink))]) == commits
+        core.close_history()
+
+    core = TomasuloCore(history_capacity=3)
+    core.load_program(program)
+    timeline = Timeline(interval=4, max_checkpoints=4)
+    timeline.reset(core)
+    while core.cycle_step():
+        timeline.record(core)
+    for target in (5, 30, 12, cycles):
+        timeline.seek(core, 0)
+        timeline.seek(core, target)
+        length = len(core.committed_instructions)
+        assert rows(core.committed_instructions) == commits[max(length - 3, 0):length]
+        assert all(len(checkpoint.committed_tail) <= 3 for checkpoint in timeline.checkpoints)
+    print("✓ Teste dos históricos limitados passou")
+
+def test_branch_predictors():
+    """Testa os preditores por PC/histórico: menos flushes que o bit global e "Voltar" exato"""
+    program = """ADDI R1, R0, 30
+outer: ADDI R2, R0, 4
+inner: ADDI R3, R3, 1
+BEQ R0, R0, skip
+ADDI R6, R6, 1
+skip: ADDI R2, R2, -1
+BNE R2, R0, inner
+ADDI R1, R1, -1
+BNE R1, R0, outer"""
+    mispredictions = {}
+    for name in ('1bit', '2bit', 'gshare', 'tournament', 'tage'):
+        result = simulate(program, machine=MachineConfig(branch_predictor=name))
+        assert result.finished and result.registers['R3'] == 120 and result.registers['R6'] == 0
+        mispredictions[name] = result.metrics['mispredictions']
+    assert mispredictions['2bit'] < mispredictions['1bit']
+    assert max(mispredictions['gshare'], mispredictions['tournament'], mispredictions['tage']) < mispredictions['2bit']
+
+    core = TomasuloCore(machine=MachineConfig(branch_predictor='tage', predictor_params={'table_bits': 6}))
+    core.load_program(program)
+    start = [list(counters) for counters in core.bp.counters]
+    while core.cycle_step():
+        pass
+    assert [list(counters) for counters in core.bp.counters] != start
+    while core.restore_state():
+        pass
+    assert [list(counters) for counters in core.bp.counters] == start and core.bp.history == 0
+
+    try:
+        MachineConfig(branch_predictor='perceptron')
+        assert False, "Preditor desconhecido deveria falhar"
+    except ValueError:
+        pass
+    print("✓ Teste dos preditores de desvio passou")
+
+def test_jumps_btb_ras():
+    """Testa J/JAL/JR com e sem BTB e RAS, inclusive no modo trace"""
+    program = """ADDI R10, R0, 20
+loop: JAL double
+JAL inc
+ADDI R10, R10, -1
+BNE R10, R0, loop
+J end
+double: ADD R1, R1, R1
+ADDI R1, R1, 1
+JR R31
+inc: ADDI R2, R2, 1
+JR R31
+end: ADDI R3, R0, 7"""
+    jal = parse_instruction("JAL 9", pc=4)
+    assert jal.rd == 31 and jal.imm == 5 and jal.target_pc == 9 and jal.is_jump and not jal.is_indirect
+
+    results = {}
+    for btb, ras in ((0, 0), (0, 8), (16, 8)):
+        machine = MachineConfig(btb_entries=btb, ras_entries=ras)
+        result = simulate(program, machine=machine)
+        assert result.finished
+        assert (result.registers['R1'], result.registers['R2'], result.registers['R3']) == (2 ** 20 - 1, 20, 7)
+        assert result.registers['R31'] == 3  # Retorno do último JAL
+        assert simulate_trace(record_trace(program), machine=machine).cycles == result.cycles
+        results[btb, ras] = result.metrics
+    # Sem RAS, cada retorno é um alvo desconhecido; com RAS, nenhum
+    assert results[0, 0]['target_mispredictions'] == 40 and results[0, 8]['target_mispredictions'] == 0
+    assert results[0, 8]['mispredictions'] < results[0, 0]['mispredictions']
+    # Com BTB, os alvos só são conhecidos depois da primeira execução de cada desvio/salto
+    assert 0 < results[16, 8]['target_mispredictions'] < results[0, 0]['target_mispredictions']
+    print("✓ Teste de saltos, BTB e RAS passou")
+
+def test_offline_predictor_evaluation():
+    """Testa a avaliação offline: a versão vetorizada prevê igual às classes dos preditores"""
+    program = """ADDI R1, R0, 60
+outer: ADDI R2, R0, 5
+inner: ADDI R3, R3, 1
+BEQ R2, R1, skip
+SUB R4, R1, R2
+BNE R4, R3, skip
+ADDI R6, R6, 1
+skip: ADDI R2, R2, -1
+BNE R2, R0, inner
+ADDI R1, R1, -1
+BNE R1, R0, outer"""
+    trace = record_trace(program)
+    stream = BranchStream.from_trace(trace)
+    assert len(stream) == sum(ISA[opcode].kind == 'branch' for opcode in trace.opcode)
+    assert stream.instructions == len(trace)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'programa.trace')
+        write_trace(trace, path, chunk_records=100)
+        with TraceFile(path) as trace_file:
+            from_file = BranchStream.from_trace(trace_file)
+    assert list(from_file.pcs) == list(stream.pcs) and list(from_file.taken) == list(stream.taken)
+
+    configs = [('1bit', {}), ('2bit', {'table_bits': 1}), ('2bit', {}), ('gshare', {'table_bits': 3, 'history_bits': 6}),
+               ('gshare', {}), ('tournament', {'chooser_bits': 1}), ('tournament', {})]
+    for name, params in configs:
+        assert list(predictions(stream, name, **params)) == list(predictions(stream, name, vectorized=False, **params))
+
+    rows = evaluate_many(stream, configs + [('tage', {})], workers=2)
+    assert rows == evaluate_many(stream, configs + [('tage', {})], workers=1)
+    for row in rows:
+        assert row['branches'] == len(stream)
+        assert abs(row['mpki'] - 1000 * row['mispredictions'] / len(trace)) < 1e-9
+    assert rows[-1]['mispredictions'] < rows[0]['mispredictions']  # TAGE contra o bit global
+    print("✓ Teste de avaliação offline de preditores passou")
+
+def test_event_driven():
+    """Testa o kernel dirigido por eventos: mesmos ciclos e métricas do ciclo a ciclo, com menos passos"""
+    program = """ADDI R1, R0, 12
+ADDI R7, R0, 3
+loop: DIV R2, R1, R7
+MUL R3, R2, R2
+SW R3, 0(R1)
+LW R4, 0(R1)
+ADD R6, R6, R4
+ADDI R1, R1, -1
+BNE R1, R0, loop"""
+    machines = [MachineConfig(), MachineConfig(instruction_latencies={'DIV': 40, 'MUL': 12, 'LW': 20}),
+                MachineConfig(rob_size=4, reservation_stations={'INT': 1, 'FP': 1, 'MEM': 1},
+                              instruction_latencies={'DIV': 30}, branch_penalty=3)]
+    for machine in machines:
+        stepwise = simulate(program, machine=machine)
+        events = simulate(program, machine=machine, event_driven=True)
+        assert stepwise.finished and events.finished
+        assert (events.cycles, events.metrics, events.registers, events.memory) == \
+            (stepwise.cycles, stepwise.metrics, stepwise.registers, stepwise.memory)
+        trace = record_trace(program)
+        assert simulate_trace(trace, machine=machine, event_driven=True).cycles == simulate_trace(trace, machine=machine).cycles
+        # O limite de ciclos é respeitado também nos saltos
+        limited = simulate(program, machine=machine, max_cycles=50, event_driven=True)
+        assert limited.cycles == 50 and limited.metrics == simulate(program, machine=machine, max_cycles=50).metrics
+
+    core = TomasuloCore(machine=machines[1])
+    core.load_program(program)
+    steps = 0
+    states = []
+    while True:
+        states.append((core.cycle, dict(core.metrics), core.registers.as_dict()))
+        steps += 1
+        if not core.event_step():
+            break
+    assert steps < core.cycle / 4
+    # "Voltar" desfaz o salto e o ciclo do evento juntos
+    for cycle, metrics, registers in reversed(states[:-1]):
+        assert core.restore_state()
+        assert (core.cycle, dict(core.metrics), core.registers.as_dict()) == (cycle, metrics, registers)
+    print("✓ Teste do kernel dirigido por eventos passou")
+
+def test_simulation_worker():
+    """Testa a simulação em segundo plano: mesmo resultado, ritmo limitado e parada imediata"""
+    program = """ADDI R1, R0, 300
+loop: ADDI R2, R2, 1
+ADDI R1, R1, -1
+BNE R1, R0, loop"""
+    expected = simulate(program)
+    core = TomasuloCore()
+    core.load_program(program)
+    timeline = Timeline()
+    timeline.reset(core)
+    worker = SimulationWorker(core, timeline)
+    worker.start()
+    while worker.running:
+        with worker.reading() as shared:
+            assert shared.cycle <= expected.cycles  # Estado lido entre dois lotes
+        time.sleep(0.001)
+    assert worker.finished and core.cycle == expected.cycles and core.registers.as_dict() == expected.registers
+    assert timeline.horizon == expected.cycles
+
+    # Ritmo limitado: ~200 ciclos/s; stop() volta sem esperar o fim do programa
+    core = TomasuloCore()
+    core.load_program(program)
+    worker = SimulationWorker(core, cycles_per_second=200)
+    start = time.perf_counter()
+    worker.start()
+    time.sleep(0.2)
+    worker.stop()
+    elapsed = time.perf_counter() - start
+    assert not worker.running and not worker.finished
+    assert 0 < core.cycle <= 200 * elapsed + 1
+    # Depois de parado, o passo a passo continua do mesmo ponto
+    cycle = core.cycle
+    assert worker.step() and core.cycle == cycle + 1
+    print("✓ Teste da simulação em segundo plano passou")
+
+def test_history_view():
+    """Testa a visão filtrada dos históricos (tabelas virtualizadas): filtros, acompanhamento, desfazer e ciclo"""
+    program = """ADDI R1, R0, 40
+loop: ADDI R2, R2, 3
+ADDI R1, R1, -1
+BNE R1, R0, loop"""
+    def brute(log, predicate):
+        return [index for index, record in enumerate(log.iter_all()) if predicate is None or predicate(record)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        core = TomasuloCore(history_capacity=8)
+        core.load_program(program)
+        core.stream_history(directory, batch_size=4)
+        branch_filter = record_filter(mispredicted=True)
+        commits = HistoryView(core.committed_instructions, record_filter(opcode='BNE'),
+                              key=lambda record: record['cycle_committed'])
+        branches = HistoryView(core.branch_history, branch_filter, key=lambda record: record['cycle'])
+        everything = HistoryView(core.committed_instructions, key=lambda record: record['cycle_committed'])
+        cycles = 0
+        while core.cycle_step():
+            cycles += 1
+            if cycles % 7 == 0:  # Acompanha os registros novos aos poucos
+                commits.refresh(), branches.refresh(), everything.refresh()
+        for view in (commits, branches, everything):
+            view.refresh()
+        assert len(core.committed_instructions) > core.committed_instructions.capacity  # Parte só no disco
+        assert list(commits.matches) == brute(core.committed_instructions, commits.predicate)
+        assert list(branches.matches) == brute(core.branch_history, branch_filter) and len(branches)
+        assert len(everything) == len(core.committed_instructions)
+        assert [index for index, _ in everything.rows(3, 5)] == [3, 4, 5, 6, 7]
+        assert all(record['instruction'].opcode.name == 'BNE' for _, record in commits.rows(0, len(commits)))
+        # Ir ao ciclo: primeiro registro commitado no ciclo >= alvo
+        target = core.committed_instructions[10]['cycle_committed']
+        position = everything.position_of(target)
+        assert everything.rows(position, 1)[0][1]['cycle_committed'] == target
+        assert everything.position_of(cycles + 100) == len(everything)
+        # Desfazer descarta os registros removidos do histórico
+        for _ in range(cycles // 2):
+            core.restore_state()
+        commits.refresh(), branches.refresh()
+        assert list(commits.matches) == brute(core.committed_instructions, commits.predicate)
+        assert list(branches.matches) == brute(core.branch_history, branch_filter)
+        commits.set_filter(record_filter(pc=1))
+        assert list(commits.matches) == brute(core.committed_instructions, commits.predicate)
+        core.close_history()
+
+    # Sem disco, só os registros em memória são acessíveis
+    core = TomasuloCore(history_capacity=8)
+    core.load_program(program)
+    view = HistoryView(core.committed_instructions, record_filter(pc=1))
+    while core.cycle_step():
+        pass
+    view.refresh()
+    log = core.committed_instructions
+    assert view.start == log.first and len(everything) > len(view)
+    assert list(view.matches) == [index for index in range(log.first, len(log)) if log[index]['instruction'].pc == 1]
+    print("✓ Teste da visão filtrada dos históricos passou")
+
+def test_pipeline_stage_cycles():
+    """Testa os ciclos dos estágios (despacho, execução, escrita, commit, flush) gravados nos commits"""
+    program = """ADDI R1, R0, 60
+loop: ADDI R2, R2, 3
+MUL R3, R2, R2
+ADDI R1, R1, -1
+BNE R1, R0, loop"""
+    for storage in ('objects', 'numpy'):
+        core = TomasuloCore(storage=storage, history_capacity=0)
+        core.load_program(program)
+        while core.cycle_step():
+            pass
+        records = list(core.committed_instructions)
+        for record in records:
+            assert (record['cycle_issued'] < record['cycle_executed'] <= record['cycle_written']
+                    < record['cycle_committed'])
+        flushes = [record['cycle_flushed'] for record in records if record['cycle_flushed'] is not None]
+        assert len(flushes) == core.metrics['mispredictions'] > 0
+        assert all(record['instruction'].is_branch for record in records if record['cycle_flushed'] is not None)
+    print("✓ Teste dos ciclos dos estágios passou")
+
 if __name__ == "__main__":
     print("Executando testes do simulador de Tomasulo...")
     
     test_basic_instruction()
     test_multiple_instructions()
+    test_out_of_order_completion()
     test_branch_instruction()
+    test_flush_keeps_older_instructions()
+    test_loop_renaming()
     test_memory_instructions()
+    test_isa_table()
+    test_machine_config()
+    test_batch_simulate()
+    test_sweep_resume()
+    test_cdb_wakeup()
+    test_undo_journal()
+    test_timeline_seek()
+    test_numpy_storage()
+    test_lanes_match_core()
+    test_fast_forward()
+    test_sampled_simulation()
+    test_trace_driven()
+    test_trace_file()
+    test_bounded_history()
+    test_branch_predictors()
+    test_jumps_btb_ras()
+    test_offline_predictor_evaluation()
+    test_event_driven()
+    test_simulation_worker()
+    test_history_view()
+    test_pipeline_stage_cycles()
     
     print("Todos os testes passaram!")
@@ -0,0 +1,154 @@
+"""
+Testes da lógica da interface gráfica que não precisam de uma tela.
+
+As tabelas são testadas com Treeviews falsos e o gráfico do pipeline em um
+canvas Agg; os testes são pulados se o Tk (ou o matplotlib) não estiver
+instalado, de modo que os testes do núcleo (test_core.py) não dependem
+deles.
+"""
+import sys
+import os
+import random
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from simulator.core import TomasuloCore
+from simulator.config import MachineConfig
+from simulator.timeline import Timeline
+
+
+def test_gui_tree_sync():
+    """Testa a atualização das tabelas da GUI por diferença (só a aba visível) contra a reconstrução completa"""
+    pytest.importorskip("tkinter")  # Sem Tk, a GUI não é importável
+    from simulator.gui import TomasuloGUI, TreeRows
+
+    class FakeTree:
+        """Treeview mínimo: ordem dos filhos e valores de cada linha."""
+        def __init__(self, columns):
+            self.columns, self.children, self.values = columns, [], {}
+
+        def __getitem__(self, key):
+            return self.columns
+
+        def insert(self, parent, index, iid, values):
+            assert iid not in self.values
+            self.children.insert(index, iid)
+            self.values[iid] = list(values)
+
+        def delete(self, *iids):
+            for iid in iids:
+                self.children.remove(iid)
+                del self.values[iid]
+
+        def set(self, iid, column, value):
+            self.values[iid][self.columns.index(column)] = value
+
+        def rows(self):
+            return [(iid, tuple(self.values[iid])) for iid in self.children]
+
+    class FakeNotebook:
+        current = 0
+
+        def index(self, tab):
+            return self.current
+
+    def rebuild(gui):
+        """Linhas esperadas: as de uma reconstrução completa de cada tabela."""
+        names = ('rob_rows', 'int_rs_rows', 'fp_rs_rows', 'reg_rows')
+        fresh = TomasuloGUI.__new__(TomasuloGUI)
+        fresh.core = gui.core
+        for name in names:
+            setattr(fresh, name, TreeRows(FakeTree(getattr(gui, name).columns)))
+        fresh._update_rob_tree(), fresh._update_rs_trees(), fresh._update_register_tree()
+        return {name: getattr(fresh, name).tree.rows() for name in names}
+
+    program = """ADDI R1, R0, 25
+loop: ADDI R2, R2, 3
+MUL R3, R2, R2
+SW R3, 0(R2)
+ADDI R1, R1, -1
+BNE R1, R0, loop"""
+    gui = TomasuloGUI.__new__(TomasuloGUI)
+    gui.core = TomasuloCore(machine=MachineConfig(rob_size=6))
+    gui.core.load_program(program)
+    gui.worker = None
+    gui.notebook = FakeNotebook()
+    gui.rob_rows = TreeRows(FakeTree(('Index', 'State', 'Instruction', 'Destination', 'Value')))
+    gui.int_rs_rows = TreeRows(FakeTree(('Index', 'Op', 'Vj', 'Vk', 'Qj', 'Qk', 'Dest')))
+    gui.fp_rs_rows = TreeRows(FakeTree(('Index', 'Op', 'Vj', 'Vk', 'Qj', 'Qk', 'Dest')))
+    gui.reg_rows = TreeRows(FakeTree(('Register', 'Value', 'Tag')))
+    gui._tab_updaters = [gui._update_rob_tree, gui._update_rs_trees, gui._update_register_tree]
+    tabs = [('rob_rows',), ('int_rs_rows', 'fp_rs_rows'), ('reg_rows',)]
+    timeline = Timeline(interval=8)
+    timeline.reset(gui.core)
+    random.seed(7)
+    wrapped = False
+    for step in range(1500):
+        choice = random.random()
+        if choice < 0.75:
+            if gui.core.cycle_step():
+                timeline.record(gui.core)
+        elif choice < 0.9:
+            gui.core.restore_state()
+        else:
+            timeline.seek(gui.core, random.randint(0, timeline.horizon))
+        wrapped = wrapped or gui.core.rob.head > gui.core.rob.tail
+        if random.random() < 0.2:
+            gui.notebook.current = random.randrange(len(tabs))
+            gui._on_tab_changed()
+        before = {name: getattr(gui, name).tree.rows() for names in tabs for name in names}
+        gui._update_visible_tab()
+        expected = rebuild(gui)
+        for index, names in enumerate(tabs):
+            for name in names:
+                if index == gui.notebook.current:
+                    assert getattr(gui, name).tree.rows() == expected[name], (step, name)
+                else:
+                    # Abas escondidas não são tocadas
+                    assert getattr(gui, name).tree.rows() == before[name], (step, name)
+    assert wrapped
+    print("✓ Teste da atualização por diferença das tabelas da GUI passou")
+
+def test_pipeline_chart():
+    """Testa o gráfico do pipeline incremental (janela deslizante, blitting) em um canvas sem tela"""
+    pytest.importorskip("matplotlib")
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from simulator.pipeline_chart import PipelineChart
+
+    program = """ADDI R1, R0, 60
+loop: ADDI R2, R2, 3
+MUL R3, R2, R2
+ADDI R1, R1, -1
+BNE R1, R0, loop"""
+    core = TomasuloCore()
+    core.load_program(program)
+    chart = PipelineChart(rows=20, cycles=40)
+    FigureCanvasAgg(chart.figure)
+    cycles = 0
+    while core.cycle_step():
+        cycles += 1
+        chart.update(core.committed_instructions)
+        total = len(core.committed_instructions)
+        assert chart.shown == total and chart.first_row <= max(total - 1, 0) < chart.first_row + chart.rows
+        # Só as instruções da janela ficam no gráfico
+        assert len(chart.axes.texts) <= chart.rows
+    # A janela avança de meia em meia: poucos redesenhos completos
+    assert chart.redraws <= 2 * (total // (chart.rows // 2) + cycles // (chart.cycles // 2)) + 1
+    redraws = chart.redraws
+    chart.update(core.committed_instructions)
+    assert chart.redraws == redraws  # Nada novo: nada a desenhar
+    for _ in range(30):
+        core.restore_state()
+    chart.update(core.committed_instructions)
+    assert chart.redraws == redraws + 1 and chart.shown == len(core.committed_instructions)
+    print("✓ Teste do gráfico do pipeline passou")
+
+if __name__ == "__main__":
+    print("Executando testes da interface gráfica...")
+
+    test_gui_tree_sync()
+    test_pipeline_chart()
+
+    print("Todos os testes passaram!")
@@ -0,0 +1,137 @@
+"""
+Linha do tempo da simulação: checkpoints esparsos + replay determinístico.
+
+A cada `interval` ciclos é guardado um snapshot completo do núcleo. Para
+chegar a um ciclo qualquer, restaura-se o checkpoint mais próximo anterior
+ao alvo e a simulação é reexecutada (de forma determinística) até ele.
+
+A memória é limitada: quando o número de checkpoints passa de
+`max_checkpoints`, um checkpoint a cada dois é descartado e o intervalo
+dobra. O custo de um seek fica limitado a `interval` ciclos de replay.
+Cada checkpoint guarda também os registros de commits/desvios feitos desde
+o anterior, limitados à capacidade dos históricos do núcleo.
+"""
+from bisect import bisect_right
+
+from simulator import config
+
+
+class Checkpoint:
+    def __init__(self, cycle, snapshot, committed_tail, branch_tail):
+        self.cycle = cycle
+        self.snapshot = snapshot
+        # Registros de commits/desvios adicionados desde o checkpoint anterior
+        self.committed_tail = committed_tail
+        self.branch_tail = branch_tail
+
+
+class Timeline:
+    def __init__(self, interval=None, max_checkpoints=None):
+        self.base_interval = config.CHECKPOINT_INTERVAL if interval is None else interval
+        self.max_checkpoints = config.MAX_CHECKPOINTS if max_checkpoints is None else max_checkpoints
+        self.interval = self.base_interval
+        self.checkpoints = []
+        self.cycles = []  # Ciclos dos checkpoints, para busca binária
+        self.horizon = 0  # Maior ciclo já alcançado
+        self.history_capacity = 0  # Registros guardados por checkpoint (0: sem limite)
+
+    def reset(self, core):
+        """Descarta a linha do tempo e começa uma nova no estado atual do núcleo."""
+        self.interval = self.base_interval
+        self.checkpoints = []
+        self.cycles = []
+        self.horizon = core.cycle
+        self.history_capacity = core.committed_instructions.capacity
+        self._add_checkpoint(core)
+
+    def rebase(self, core):
+        """Descarta o futuro a partir do ciclo atual (ex.: após editar um registrador)."""
+        keep = bisect_right(self.cycles, core.cycle - 1)
+        del self.checkpoints[keep:]
+        del self.cycles[keep:]
+        self.horizon = core.cycle
+        self._add_checkpoint(core)
+
+    def record(self, core):
+        """Deve ser chamado após cada ciclo; cria um checkpoint quando o intervalo é atingido."""
+        if core.cycle > self.horizon:
+            self.horizon = core.cycle
+        if not self.cycles or core.cycle >= self.cycles[-1] + self.interval:
+            self._add_checkpoint(core)
+
+    def seek(self, core, target):
+        """Leva o núcleo ao ciclo `target` (ou ao fim do programa, se vier antes)."""
+        target = max(0, target)
+        index = bisect_right(self.cycles, target) - 1
+        checkpoint = self.checkpoints[index]
+        # Com os históricos gravados em disco, o núcleo não salta para frente (o disco ficaria
+        # com um buraco): o replay parte do estado atual
+        streaming = core.committed_instructions.sink is not None or core.branch_history.sink is not None
+        if core.cycle > target or (core.cycle < checkpoint.cycle and not streaming):
+            self._restore(core, index)
+
+        # Durante o replay o histórico de desfazer não é necessário
+        budget = core.journal.budget
+        core.journal.budget = 0
+        try:
+            while core.cycle < target:
+                if not core.cycle_step():
+                    break
+                self.record(core)
+        finally:
+            core.journal.budget = budget
+        core.journal.clear()
+        return core.cycle
+
+    def _add_checkpoint(self, core):
+        previous = self.checkpoints[-1].snapshot if self.checkpoints else None
+        committed_start = previous['committed_len'] if previous else 0
+        branch_start = previous['branch_len'] if previous else 0
+        self.checkpoints.append(Checkpoint(
+            core.cycle,
+            core.snapshot(),
+            core.committed_instructions[committed_start:],
+            core.branch_history[branch_start:],
+        ))
+        self.cycles.append(core.cycle)
+        if len(self.checkpoints) > self.max_checkpoints:
+            self._thin()
+
+    def _thin(self):
+        """Descarta um checkpoint a cada dois (mantendo o primeiro) e dobra o intervalo."""
+        kept = [self.checkpoints[0]]
+        for i in range(1, len(self.checkpoints)):
+            checkpoint = self.checkpoints[i]
+            if i % 2 == 1 and i + 1 < len(self.checkpoints):
+                following = self.checkpoints[i + 1]
+                following.committed_tail = self._bound(checkpoint.committed_tail + following.committed_tail)
+                following.branch_tail = self._bound(checkpoint.branch_tail + following.branch_tail)
+            else:
+                kept.append(checkpoint)
+        self.checkpoints = kept
+        self.cycles = [checkpoint.cycle for checkpoint in kept]
+        self.interval *= 2
+
+    def _restore(self, core, index):
+        checkpoint = self.checkpoints[index]
+        core.restore_snapshot(checkpoint.snapshot)
+        # Reconstrói os históricos caso o checkpoint esteja à frente do estado atual
+        self._extend(core.committed_instructions, index, 'committed_tail', checkpoint.snapshot['committed_len'])
+        self._extend(core.branch_history, index, 'branch_tail', checkpoint.snapshot['branch_len'])
+
+    def _bound(self, records):
+        return records[-self.history_capacity:] if self.history_capacity else records
+
+    def _extend(self, log, index, tail_name, length):
+        if len(log) >= length:
+            return
+        # Só os registros mais recentes (até a capacidade do histórico) precisam voltar à memória
+        needed = length - len(log)
+        if self.history_capacity:
+            needed = min(needed, self.history_capacity)
+        records = []
+        for checkpoint in reversed(self.checkpoints[:index + 1]):
+            if len(records) >= needed:
+                break
+            records[:0] = getattr(checkpoint, tail_name)
+        log.advance(length, records[-needed:])
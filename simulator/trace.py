@@ -0,0 +1,65 @@
+"""
+Traces do caminho executado (commitado) de um programa.
+
+Uma execução funcional grava, para cada instrução dinâmica, o PC, o opcode,
+os registradores de destino e fonte, se o desvio foi tomado e o endereço de
+memória acessado. O `TomasuloCore` pode então ser alimentado pelo trace
+(`load_trace`): o modelo de tempo é o mesmo, mas nenhum valor é calculado,
+de modo que uma execução funcional serve para muitas simulações de tempo em
+máquinas diferentes.
+
+As colunas são guardadas em `array('q')` (inteiros de 64 bits, -1 para
+"nenhum"), uma por campo.
+"""
+from array import array
+
+from simulator.functional import FunctionalSimulator
+from simulator.parser import parse_program
+
+FIELDS = ('pc', 'opcode', 'rd', 'rs1', 'rs2', 'taken', 'address')
+
+
+class TraceRecord:
+    """Uma instrução do trace (usado só para inspeção; a simulação lê as colunas)."""
+    __slots__ = FIELDS
+
+    def __init__(self, *values):
+        for name, value in zip(FIELDS, values):
+            setattr(self, name, value)
+
+    def __repr__(self):
+        return f"TraceRecord({', '.join(f'{name}={getattr(self, name)}' for name in FIELDS)})"
+
+
+class Trace:
+    """Caminho commitado de `program`: uma coluna por campo, indexada pela ordem de execução."""
+
+    def __init__(self, program):
+        self.program = program  # Texto do programa (o trace guarda só PCs, não as instruções)
+        self.columns = {name: array('q') for name in FIELDS}
+        for name, column in self.columns.items():
+            setattr(self, name, column)
+
+    def append(self, instruction, taken=-1, address=-1):
+        """Registra uma instrução executada. `taken`: 1/0 para desvios; `address`: para loads e stores."""
+        self.pc.append(instruction.pc)
+        self.opcode.append(instruction.opcode)
+        self.rd.append(-1 if instruction.rd is None else instruction.rd)
+        self.rs1.append(-1 if instruction.rs1 is None else instruction.rs1)
+        self.rs2.append(-1 if instruction.rs2 is None else instruction.rs2)
+        self.taken.append(taken)
+        self.address.append(address)
+
+    def __len__(self):
+        return len(self.pc)
+
+    def __getitem__(self, index):
+        return TraceRecord(*(self.columns[name][index] for name in FIELDS))
+
+
+def record_trace(program, max_instructions=None):
+    """Executa `program` no simulador funcional e retorna o trace do caminho executado."""
+    instructions, label_map = parse_program(program)
+    trace = Trace(program)
+    FunctionalSimulator(instructions, label_map, trace=trace).run(count=max_instructions)
+    return trace
@@ -0,0 +1,270 @@
+"""
+Formato binário de traces (arquivos grandes, lidos com mmap).
+
+Layout do arquivo (little-endian):
+
+    cabeçalho (64 bytes, HEADER_DTYPE)
+    texto do programa (UTF-8, `program_size` bytes)
+    blocos de registros: `chunk_records` registros de 16 bytes (RECORD_DTYPE),
+        opcionalmente comprimidos com zlib (um bloco por vez)
+    índice (INDEX_DTYPE, um item por bloco): posição, tamanho gravado,
+        primeiro registro e número de registros do bloco
+
+`TraceWriter` grava os blocos à medida que se enchem (o índice e o
+cabeçalho definitivo são escritos no `close`), de modo que traces de
+dezenas de milhões de instruções não precisam caber na memória.
+`TraceFile` mapeia o arquivo com mmap: sem compressão, `records` e
+`chunk(i)` são arrays estruturados NumPy que apontam direto para o arquivo
+(sem cópia); com compressão, cada bloco é descomprimido sob demanda.
+`TraceFile` também pode alimentar o `TomasuloCore` (`load_trace`), como o
+`Trace` em memória.
+
+Uso: python -m simulator.tracefile programa.asm -o programa.trace [--compress]
+"""
+import argparse
+import mmap
+import sys
+import zlib
+
+import numpy as np
+
+from simulator.functional import FunctionalSimulator
+from simulator.parser import parse_program
+
+MAGIC = b'TOMTRACE'
+VERSION = 1
+FLAG_ZLIB = 1
+DEFAULT_CHUNK_RECORDS = 1 << 16
+
+HEADER_DTYPE = np.dtype([
+    ('magic', 'S8'), ('version', '<u2'), ('flags', '<u2'), ('record_size', '<u4'),
+    ('chunk_records', '<u4'), ('num_chunks', '<u4'), ('num_records', '<u8'),
+    ('program_size', '<u8'), ('index_offset', '<u8'), ('reserved', 'V16'),
+])
+# -1 em rd/rs1/rs2/taken/address significa "nenhum"; 3 bytes de preenchimento completam 16 bytes
+RECORD_DTYPE = np.dtype({
+    'names': ['pc', 'address', 'opcode', 'rd', 'rs1', 'rs2', 'taken'],
+    'formats': ['<i4', '<i4', 'u1', 'i1', 'i1', 'i1', 'i1'],
+    'offsets': [0, 4, 8, 9, 10, 11, 12],
+    'itemsize': 16,
+})
+INDEX_DTYPE = np.dtype([('offset', '<u8'), ('size', '<u8'), ('first', '<u8'), ('count', '<u8')])
+
+_ADDRESS_LIMITS = (np.iinfo(np.int32).min, np.iinfo(np.int32).max)
+
+
+class TraceWriter:
+    """Grava um trace em blocos. Tem a mesma interface de gravação de `simulator.trace.Trace` (`append`)."""
+
+    def __init__(self, path, program, chunk_records=DEFAULT_CHUNK_RECORDS, compress=False):
+        if chunk_records <= 0:
+            raise ValueError("Cada bloco deve ter ao menos um registro")
+        self.program = program
+        self.chunk_records = chunk_records
+        self.compress = compress
+        self.num_records = 0
+        self._buffer = []
+        self._index = []
+        self._file = open(path, 'wb')
+        self._file.write(bytes(HEADER_DTYPE.itemsize))  # Cabeçalho definitivo no close()
+        self._file.write(program.encode('utf-8'))
+
+    def append(self, instruction, taken=-1, address=-1):
+        if not _ADDRESS_LIMITS[0] <= address <= _ADDRESS_LIMITS[1]:
+            raise ValueError(f"Endereço {address} não cabe no formato de trace (32 bits)")
+        self._buffer.append((instruction.pc, address, instruction.opcode,
+                             -1 if instruction.rd is None else instruction.rd,
+                             -1 if instruction.rs1 is None else instruction.rs1,
+                             -1 if instruction.rs2 is None else instruction.rs2, taken))
+        if len(self._buffer) >= self.chunk_records:
+            self._flush_chunk()
+
+    def extend(self, records):
+        """Grava um array estruturado (RECORD_DTYPE) de uma vez."""
+        records = np.asarray(records, dtype=RECORD_DTYPE)
+        self._flush_chunk()
+        for start in range(0, len(records), self.chunk_records):
+            self._write_chunk(records[start:start + self.chunk_records])
+
+    def __len__(self):
+        return self.num_records + len(self._buffer)
+
+    def _flush_chunk(self):
+        if self._buffer:
+            self._write_chunk(np.array(self._buffer, dtype=RECORD_DTYPE))
+            self._buffer = []
+
+    def _write_chunk(self, records):
+        data = records.tobytes()
+        if self.compress:
+            data = zlib.compress(data)
+        self._index.append((self._file.tell(), len(data), self.num_records, len(records)))
+        self._file.write(data)
+        self.num_records += len(records)
+
+    def close(self):
+        if self._file.closed:
+            return
+        self._flush_chunk()
+        index_offset = self._file.tell()
+        self._file.write(np.array(self._index, dtype=INDEX_DTYPE).tobytes())
+        header = np.zeros(1, dtype=HEADER_DTYPE)
+        header[0] = (MAGIC, VERSION, FLAG_ZLIB if self.compress else 0, RECORD_DTYPE.itemsize,
+                     self.chunk_records, len(self._index), self.num_records,
+                     len(self.program.encode('utf-8')), index_offset, bytes(16))
+        self._file.seek(0)
+        self._file.write(header.tobytes())
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _Column:
+    """Acesso por índice a um campo do trace, descomprimindo/convertendo um bloco por vez."""
+
+    def __init__(self, trace_file, name):
+        self.trace_file = trace_file
+        self.name = name
+        self._first = self._end = 0
+        self._values = []
+
+    def __len__(self):
+        return len(self.trace_file)
+
+    def __getitem__(self, index):
+        if not self._first <= index < self._end:
+            number = self.trace_file.chunk_of(index)
+            entry = self.trace_file.index[number]
+            self._first, self._end = int(entry['first']), int(entry['first'] + entry['count'])
+            self._values = self.trace_file.chunk(number)[self.name].tolist()
+        return self._values[index - self._first]
+
+
+class TraceFile:
+    """Trace gravado por `TraceWriter`, mapeado em memória (somente leitura)."""
+
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"{path}: arquivo de trace vazio") from None
+        header = np.frombuffer(self._map, dtype=HEADER_DTYPE, count=1)[0]
+        if header['magic'] != MAGIC or header['version'] != VERSION or header['record_size'] != RECORD_DTYPE.itemsize:
+            self.close()
+            raise ValueError(f"{path}: não é um arquivo de trace compatível")
+        self.compressed = bool(header['flags'] & FLAG_ZLIB)
+        self.num_records = int(header['num_records'])
+        start = HEADER_DTYPE.itemsize
+        self.program = bytes(self._map[start:start + int(header['program_size'])]).decode('utf-8')
+        self.index = np.frombuffer(self._map, dtype=INDEX_DTYPE, count=int(header['num_chunks']),
+                                   offset=int(header['index_offset']))
+        # Interface de colunas usada pelo TomasuloCore no modo trace
+        self.taken = _Column(self, 'taken')
+        self.address = _Column(self, 'address')
+        self.pc = _Column(self, 'pc')
+
+    def __len__(self):
+        return self.num_records
+
+    @property
+    def num_chunks(self):
+        return len(self.index)
+
+    def chunk_of(self, record):
+        """Número do bloco que contém o registro `record`."""
+        if not 0 <= record < self.num_records:
+            raise IndexError(record)
+        return int(np.searchsorted(self.index['first'], record, side='right')) - 1
+
+    def chunk(self, number):
+        """Registros do bloco `number`: sem compressão, uma view sobre o arquivo (sem cópia)."""
+        entry = self.index[number]
+        offset, size, count = int(entry['offset']), int(entry['size']), int(entry['count'])
+        if self.compressed:
+            return np.frombuffer(zlib.decompress(self._map[offset:offset + size]), dtype=RECORD_DTYPE)
+        return np.frombuffer(self._map, dtype=RECORD_DTYPE, count=count, offset=offset)
+
+    def iter_chunks(self):
+        """Percorre o trace bloco a bloco, sem materializar o arquivo inteiro."""
+        for number in range(self.num_chunks):
+            yield self.chunk(number)
+
+    @property
+    def records(self):
+        """Todos os registros. Sem compressão os blocos são contíguos e o resultado é uma view do arquivo."""
+        if not self.num_chunks:
+            return np.zeros(0, dtype=RECORD_DTYPE)
+        if self.compressed:
+            return np.concatenate(list(self.iter_chunks()))
+        return np.frombuffer(self._map, dtype=RECORD_DTYPE, count=self.num_records,
+                             offset=int(self.index[0]['offset']))
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.num_records
+        number = self.chunk_of(index)
+        return self.chunk(number)[index - int(self.index[number]['first'])]
+
+    def close(self):
+        self.index = None  # Solta a view antes de fechar o mmap
+        self.taken = self.address = self.pc = None
+        try:
+            self._map.close()
+        except BufferError:
+            pass  # Ainda há views do usuário; o mmap é liberado quando elas forem coletadas
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_trace(trace, path, chunk_records=DEFAULT_CHUNK_RECORDS, compress=False):
+    """Grava um `simulator.trace.Trace` em memória no formato binário."""
+    addresses = np.frombuffer(trace.columns['address'], dtype=np.int64)
+    if len(addresses) and not (_ADDRESS_LIMITS[0] <= addresses.min() and addresses.max() <= _ADDRESS_LIMITS[1]):
+        raise ValueError("Há endereços que não cabem no formato de trace (32 bits)")
+    records = np.zeros(len(trace), dtype=RECORD_DTYPE)
+    for name in RECORD_DTYPE.names:
+        records[name] = np.frombuffer(trace.columns[name], dtype=np.int64)
+    with TraceWriter(path, trace.program, chunk_records, compress) as writer:
+        writer.extend(records)
+
+
+def record_trace_file(program, path, max_instructions=None, chunk_records=DEFAULT_CHUNK_RECORDS, compress=False):
+    """Executa `program` no simulador funcional gravando o trace direto no arquivo. Retorna o número de registros."""
+    instructions, label_map = parse_program(program)
+    with TraceWriter(path, program, chunk_records, compress) as writer:
+        FunctionalSimulator(instructions, label_map, trace=writer).run(count=max_instructions)
+        return len(writer)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m simulator.tracefile",
+                                     description="Grava o trace do caminho executado de um programa em formato binário.")
+    parser.add_argument('program', help="arquivo de programa")
+    parser.add_argument('-o', '--output', required=True, help="arquivo de trace")
+    parser.add_argument('--compress', action='store_true', help="comprime cada bloco com zlib")
+    parser.add_argument('--chunk-records', type=int, default=DEFAULT_CHUNK_RECORDS, help="registros por bloco")
+    parser.add_argument('--max-instructions', type=int, default=None, help="limite de instruções gravadas")
+    args = parser.parse_args(argv)
+    with open(args.program, encoding='utf-8') as f:
+        program = f.read()
+    try:
+        count = record_trace_file(program, args.output, args.max_instructions, args.chunk_records, args.compress)
+    except ValueError as error:
+        parser.error(str(error))
+    print(f"{count} registros gravados em {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
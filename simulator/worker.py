@@ -0,0 +1,101 @@
+"""
+Execução contínua do núcleo em uma thread separada da interface.
+
+`SimulationWorker` avança o `TomasuloCore` em segundo plano, o mais rápido
+possível ou a um número fixo de ciclos por segundo, registrando os ciclos
+na linha do tempo. A interface não espera pelos ciclos: em uma taxa de
+quadros fixa, ela lê o núcleo dentro de `reading()`, entre dois lotes de
+ciclos do worker, e todos os ciclos simulados desde o quadro anterior
+aparecem de uma vez.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+from simulator import config
+
+
+class SimulationWorker:
+    """Simula `core` em uma thread até o fim do programa ou até `stop()`.
+
+    `cycles_per_second` (None: sem limite) pode ser alterado durante a
+    execução. Quem lê ou altera o núcleo enquanto o worker existe deve
+    fazê-lo dentro de `reading()`.
+    """
+
+    def __init__(self, core, timeline=None, cycles_per_second=None, batch_seconds=None):
+        self.core = core
+        self.timeline = timeline
+        self.cycles_per_second = cycles_per_second
+        self.batch_seconds = config.WORKER_BATCH_SECONDS if batch_seconds is None else batch_seconds
+        self.finished = False  # O programa terminou (não há mais ciclos)
+        self._lock = threading.Lock()
+        self._reader_waiting = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="tomasulo-worker", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Para a simulação ao fim do lote atual e espera a thread terminar."""
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    @contextmanager
+    def reading(self):
+        """Acesso exclusivo ao núcleo (o worker pausa entre dois lotes)."""
+        self._reader_waiting.set()
+        with self._lock:
+            self._reader_waiting.clear()
+            yield self.core
+
+    def step(self):
+        """Simula um ciclo; retorna False se não há mais trabalho."""
+        with self._lock:
+            return self._step()
+
+    def _step(self):
+        if not self.core.cycle_step():
+            self.finished = True
+            return False
+        if self.timeline is not None:
+            self.timeline.record(self.core)
+        return True
+
+    def _run(self):
+        start, done, rate = time.perf_counter(), 0, self.cycles_per_second
+        while not self._stop.is_set():
+            if self.cycles_per_second != rate:
+                start, done, rate = time.perf_counter(), 0, self.cycles_per_second
+            now = time.perf_counter()
+            due = None
+            if rate:
+                # Ciclos devidos até agora no ritmo pedido; sem nenhum, espera o próximo
+                due = int((now - start) * rate) - done
+                if due <= 0:
+                    self._stop.wait((done + 1) / rate - (now - start))
+                    continue
+            deadline = now + self.batch_seconds
+            count = 0
+            with self._lock:
+                while due is None or count < due:
+                    if not self._step():
+                        return
+                    count += 1
+                    if time.perf_counter() >= deadline:
+                        break
+            done += count
+            if due is not None and count < due:
+                start, done = time.perf_counter(), 0  # Atrasado: não acumula ciclos devidos
+            if self._reader_waiting.is_set():
+                time.sleep(0.001)  # Dá a vez à interface
@@ -73,7 +73,7 @@ ADDI R7, R0, 400  # R7 = 400
     
     # Mostrar estado final dos registradores
     print(f"\nEstado final dos registradores:")
-    for reg_name, value in core.registers.values.items():
+    for reg_name, value in core.registers.as_dict().items():
         if value != 0:  # Só mostrar registradores não-zero
             print(f"{reg_name}: {value}")
     